@@ -1,5 +1,13 @@
 """Network Utility package."""
 
-from .gui import NetworkUtilityApp
-
 __all__ = ["NetworkUtilityApp"]
+
+
+def __getattr__(name: str) -> object:
+    # The GUI (and with it tkinter) is only imported when asked for, so the
+    # headless CLI and the library modules work on machines without Tk.
+    if name == "NetworkUtilityApp":
+        from .gui import NetworkUtilityApp
+
+        return NetworkUtilityApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
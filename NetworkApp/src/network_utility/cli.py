@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+from typing import TextIO
+
+# Only the standard library is imported up front. Every command pulls in the
+# modules it needs, so a headless scan never loads tkinter (or asyncio when
+# all it does is a lookup) and starts in a few tens of milliseconds.
+
+FORMATS = ("json", "jsonl")
+NO_FORWARD_COMMANDS = {"daemon", "gui"}
+
+_offline_databases: dict[str, object] = {}
+_offline_lock = threading.Lock()
+# One fork-server per process, so under the daemon it stays warm between runs.
+_python_pool = None
+_python_pool_lock = threading.Lock()
+
+
+class _Writer:
+    def __init__(self, out: TextIO, fmt: str) -> None:
+        self.out = out
+        self.streaming = fmt == "jsonl"
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, payload: dict) -> None:
+        # Script output arrives on reader threads; a line must never interleave.
+        if self.streaming:
+            line = json.dumps({"type": kind, **payload}) + "\n"
+            with self._lock:
+                self.out.write(line)
+                self.out.flush()
+
+    def document(self, payload: dict) -> None:
+        if not self.streaming:
+            self.out.write(json.dumps(payload, indent=2) + "\n")
+            self.out.flush()
+
+
+def _resolve(cwd: str, path: str) -> str:
+    return os.path.normpath(os.path.join(cwd, os.path.expanduser(path)))
+
+
+def _scan(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .enrichment import lookup_vendor, resolve_names
+    from .networking import get_arp_devices, get_default_gateway, get_local_network
+
+    writer = _Writer(out, args.format)
+    gateway = get_default_gateway()
+    devices = {device.ip: device for device in get_arp_devices()}
+    writer.record("gateway", {"ip": gateway})
+
+    network = None
+    if args.sweep or args.network:
+        from .discovery import sweep_subnet
+
+        if args.network:
+            network = ipaddress.IPv4Network(args.network, strict=False)
+        else:
+            network = get_local_network(gateway)
+        if network is None:
+            err.write("error: no local IPv4 subnet to sweep; pass --network\n")
+            return 1
+        found = {}
+        options = {"concurrency": args.concurrency, "timeout": args.timeout}
+        sweep_subnet(
+            network,
+            lambda device: found.setdefault(device.ip, device),
+            **{name: value for name, value in options.items() if value is not None},
+        )
+        # Same merge as the GUI sweep: the probes filled the ARP cache, so it
+        # now knows MACs for responders and for hosts that ignored every port.
+        for device in get_arp_devices():
+            if ipaddress.ip_address(device.ip) not in network:
+                continue
+            known = found.get(device.ip)
+            if known is not None:
+                known.mac = device.mac
+            else:
+                device.note = "Passive: ARP reply only"
+                found[device.ip] = device
+        devices.update(found)
+
+    for device in devices.values():
+        device.vendor = lookup_vendor(device.mac)
+        if gateway and device.ip == gateway:
+            device.note = "Default Gateway"
+    if args.resolve:
+        def on_name(ip: str, hostname: str) -> None:
+            devices[ip].hostname = hostname
+
+        resolve_names(list(devices), on_name)
+    for device in devices.values():
+        writer.record("device", asdict(device))
+    if args.record and devices:
+        from .inventory import get_default_inventory
+
+        get_default_inventory().ingest(devices.values())
+
+    services: dict[str, list[dict]] = {}
+    if args.ports and devices:
+        from .port_scan import parse_ports, scan_ports
+
+        def on_result(record: object) -> None:
+            payload = asdict(record)
+            services.setdefault(payload["ip"], []).append(payload)
+            writer.record("service", payload)
+
+        scan_ports(list(devices), parse_ports(args.ports), on_result)
+
+    writer.document(
+        {
+            "gateway": gateway,
+            "network": str(network) if network is not None else None,
+            "devices": [
+                {**asdict(device), "services": services.get(ip, [])} for ip, device in devices.items()
+            ],
+        }
+    )
+    return 0
+
+
+def _open_offline(path: str) -> object:
+    # Kept open for the life of the process so a daemon answers repeated
+    # offline lookups from an already-mapped index.
+    from .geoip_offline import open_database
+
+    with _offline_lock:
+        database = _offline_databases.get(path)
+        if database is None:
+            database = _offline_databases[path] = open_database(path)
+        return database
+
+
+def _lookup(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .ip_lookup import lookup_ip_batch, parse_ip_list, read_ip_file
+
+    ips = parse_ip_list(" ".join(args.ips))
+    for path in args.file or []:
+        ips += parse_ip_list(stdin) if path == "-" else read_ip_file(_resolve(cwd, path))
+    ips = list(dict.fromkeys(ips))
+    if not ips:
+        err.write("error: no IP addresses given\n")
+        return 2
+
+    writer = _Writer(out, args.format)
+    results: list[dict[str, str]] = []
+
+    def on_result(result: dict[str, str]) -> None:
+        results.append(result)
+        writer.record("lookup", result)
+
+    if args.offline:
+        database = _open_offline(_resolve(cwd, args.offline))
+        for ip in ips:
+            on_result(database.lookup(ip))
+    else:
+        lookup_ip_batch(ips, on_result, use_cache=not args.no_cache)
+    writer.document({"results": results})
+    return 0
+
+
+def _latency(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    import time
+
+    from .latency import LatencyMonitor
+    from .networking import get_default_gateway
+
+    targets = {ip: "" for ip in args.targets}
+    if not targets or args.gateway:
+        gateway = get_default_gateway()
+        if gateway:
+            targets[gateway] = "gateway"
+    if not targets:
+        err.write("error: no targets given and no default gateway found\n")
+        return 2
+    try:
+        monitor = LatencyMonitor(method=args.method, interval=args.interval, timeout=args.timeout)
+    except ValueError as exc:
+        err.write(f"error: {exc}\n")
+        return 2
+
+    writer = _Writer(out, args.format)
+    monitor.set_targets(targets)
+    monitor.start()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if args.stop_event.wait(args.report if remaining is None else min(args.report, remaining)):
+                break
+            for summary in monitor.snapshot():
+                writer.record("latency", asdict(summary))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+    writer.document({"method": monitor.method, "targets": [asdict(item) for item in monitor.snapshot()]})
+    return 0
+
+
+def _parse_dependencies(specs: list[str], cwd: str) -> dict[str, list[str]]:
+    dependencies: dict[str, list[str]] = {}
+    for spec in specs:
+        script, separator, deps = spec.partition("=")
+        if not separator or not deps:
+            raise ValueError(f"Expected SCRIPT=DEP[,DEP...], got {spec!r}")
+        dependencies.setdefault(_resolve(cwd, script), []).extend(
+            _resolve(cwd, dep) for dep in deps.split(",") if dep
+        )
+    return dependencies
+
+
+def _get_python_pool():
+    global _python_pool
+    from .warm_pool import WarmPythonPool
+
+    with _python_pool_lock:
+        if _python_pool is None and WarmPythonPool.is_supported():
+            _python_pool = WarmPythonPool()
+        return _python_pool
+
+
+def _run(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .models import ScriptJob, ScriptResult
+    from .script_executor import (
+        STATUS_OK,
+        STATUS_PENDING,
+        STATUS_RUNNING,
+        STATUS_WAITING,
+        ScriptQueueExecutor,
+    )
+
+    writer = _Writer(out, args.format)
+    try:
+        dependencies = _parse_dependencies(args.depends or [], cwd)
+        paths = list(dict.fromkeys(_resolve(cwd, path) for path in args.scripts))
+        unknown = sorted(set(dependencies) - set(paths))
+        if unknown:
+            raise ValueError(f"--depends names scripts that are not queued: {', '.join(unknown)}")
+        jobs = [ScriptJob(path, dependencies.get(path, []), args.timeout, cwd) for path in paths]
+        on_line = None
+        if args.stream:
+            def on_line(job: ScriptJob, stream: str, line: str) -> None:
+                writer.record("line", {"script": job.path, "stream": stream, "line": line})
+
+        results: dict[str, dict] = {}
+        lock = threading.Lock()
+
+        def on_finished(job: ScriptJob, result: ScriptResult) -> None:
+            with lock:
+                results[job.path] = {"script": job.path, **asdict(result)}
+
+        def on_status(path: str, status: str) -> None:
+            with lock:
+                payload = {**results.get(path, {"script": path}), "status": status}
+                results[path] = payload
+            if status not in {STATUS_PENDING, STATUS_WAITING, STATUS_RUNNING}:
+                writer.record("result", payload)
+
+        executor = ScriptQueueExecutor(
+            jobs,
+            workers=args.workers,
+            on_status=on_status,
+            on_finished=on_finished,
+            on_line=on_line,
+            python_pool=_get_python_pool() if args.warm else None,
+        )
+    except ValueError as exc:
+        err.write(f"error: {exc}\n")
+        return 2
+
+    # The executor runs on its own thread so Ctrl+C can cancel the scripts
+    # (and their process groups) instead of orphaning them.
+    statuses: dict[str, str] = {}
+    runner = threading.Thread(target=lambda: statuses.update(executor.run()), daemon=True)
+    runner.start()
+    while runner.is_alive():
+        try:
+            runner.join(0.5)
+        except KeyboardInterrupt:
+            executor.cancel()
+        if args.stop_event.is_set():
+            executor.cancel()
+    writer.document({"results": [results.get(path, {"script": path}) for path in paths]})
+    return 0 if statuses and all(status == STATUS_OK for status in statuses.values()) else 1
+
+
+def _history(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .run_history import get_default_history
+
+    writer = _Writer(out, args.format)
+    history = get_default_history()
+    if args.regressions:
+        regressions = [asdict(item) for item in history.regressions(window=args.window)]
+        for item in regressions:
+            writer.record("regression", item)
+        writer.document({"regressions": regressions})
+        return 0
+
+    paths = [_resolve(cwd, path) for path in args.scripts] or history.scripts()
+    stats = []
+    for path in paths:
+        item = history.stats(path, window=args.window)
+        if item is not None:
+            stats.append(asdict(item))
+            writer.record("stats", stats[-1])
+    writer.document({"scripts": stats})
+    return 0
+
+
+def _inventory(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .inventory import get_default_inventory
+
+    writer = _Writer(out, args.format)
+    inventory = get_default_inventory()
+    if not inventory.available:
+        err.write("error: the device inventory database could not be opened\n")
+        return 1
+
+    if args.changes:
+        kind, key, items = "change", "changes", inventory.mac_changes(args.ip)
+    elif args.mac:
+        kind, key, items = "binding", "bindings", inventory.ips_for_mac(args.mac)
+    elif args.ip:
+        kind, key, items = "binding", "bindings", inventory.macs_for_ip(args.ip)
+    elif args.stale is not None:
+        kind, key, items = "device", "devices", inventory.not_seen_for(args.stale)
+    else:
+        kind, key, items = "device", "devices", inventory.devices()
+    payloads = [asdict(item) for item in items]
+    for payload in payloads:
+        writer.record(kind, payload)
+    writer.document({key: payloads})
+    return 0
+
+
+def _update_oui(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from urllib.error import URLError
+
+    from .enrichment import update_oui_registry
+
+    try:
+        counts = update_oui_registry()
+    except (URLError, OSError, ValueError) as exc:
+        err.write(f"error: could not update the OUI registry: {exc}\n")
+        return 1
+    out.write(json.dumps({"assignments": counts}, indent=2) + "\n")
+    return 0
+
+
+def _warm_up() -> None:
+    # Everything a request would otherwise load on first use.
+    from . import discovery, port_scan, script_executor  # noqa: F401
+    from .enrichment import get_oui_registry
+    from .ip_cache import get_default_cache
+
+    get_oui_registry()
+    get_default_cache()
+
+
+def _daemon(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .daemon import default_socket_path, serve
+
+    _warm_up()
+    path = _resolve(cwd, args.socket) if args.socket else default_socket_path()
+    err.write(f"network_utility daemon listening on {path}\n")
+    err.flush()
+    try:
+        serve(path, _dispatch)
+    except OSError as exc:
+        err.write(f"error: {exc}\n")
+        return 1
+    return 0
+
+
+def _gui(args: argparse.Namespace, cwd: str, stdin: str, out: TextIO, err: TextIO) -> int:
+    from .main import main as gui_main
+
+    gui_main()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m network_utility",
+        description="Network Utility Workbench. Run without a command to open the GUI.",
+    )
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="send the command to a running daemon (falls back to running it here)",
+    )
+    parser.add_argument("--socket", help="daemon socket path (default: ~/.network_utility/daemon.sock)")
+    commands = parser.add_subparsers(dest="command")
+
+    def add_format(command: argparse.ArgumentParser) -> None:
+        command.add_argument(
+            "--format", choices=FORMATS, default="json", help="JSON document or JSON lines"
+        )
+
+    scan = commands.add_parser("scan", help="gateway + ARP devices, optionally sweep and port-scan")
+    scan.add_argument("--sweep", action="store_true", help="actively sweep the local subnet")
+    scan.add_argument("--network", help="CIDR to sweep instead of the local subnet (implies --sweep)")
+    scan.add_argument("--ports", help="port-scan found devices, e.g. 22,80,8000-8100")
+    scan.add_argument("--resolve", action="store_true", help="resolve hostnames (rDNS, mDNS, NetBIOS)")
+    scan.add_argument("--concurrency", type=int, help="sweep probes in flight")
+    scan.add_argument("--timeout", type=float, help="per-probe sweep timeout in seconds")
+    scan.add_argument(
+        "--no-record", dest="record", action="store_false", help="do not add the results to the inventory"
+    )
+    add_format(scan)
+    scan.set_defaults(handler=_scan)
+
+    lookup = commands.add_parser("lookup", help="origin/company info for IP addresses")
+    lookup.add_argument("ips", nargs="*", help="addresses (or any text containing them)")
+    lookup.add_argument("--file", action="append", help="read addresses from a file, '-' for stdin")
+    lookup.add_argument("--offline", metavar="DATABASE", help="local IP-range database instead of ip-api")
+    lookup.add_argument("--no-cache", action="store_true", help="bypass the lookup cache")
+    add_format(lookup)
+    lookup.set_defaults(handler=_lookup)
+
+    latency = commands.add_parser("latency", help="probe RTT, jitter and loss to the gateway and other hosts")
+    latency.add_argument("targets", nargs="*", help="addresses to probe (default: the gateway)")
+    latency.add_argument("--gateway", action="store_true", help="probe the gateway as well as the targets")
+    latency.add_argument("--method", choices=("auto", "icmp", "tcp"), default="auto")
+    latency.add_argument("--interval", type=float, default=1.0, help="seconds between probes per target")
+    latency.add_argument("--timeout", type=float, default=1.0, help="seconds before a probe counts as lost")
+    latency.add_argument("--duration", type=float, help="stop after this many seconds (default: Ctrl+C)")
+    latency.add_argument("--report", type=float, default=5.0, help="seconds between jsonl reports")
+    add_format(latency)
+    latency.set_defaults(handler=_latency)
+
+    run = commands.add_parser("run", help="run scripts through the script queue executor")
+    run.add_argument("scripts", nargs="+")
+    run.add_argument("--workers", type=int, default=4)
+    run.add_argument("--timeout", type=float, help="per-script timeout in seconds")
+    run.add_argument("--depends", action="append", metavar="SCRIPT=DEP[,DEP]", help="run SCRIPT after DEPs")
+    run.add_argument("--stream", action="store_true", help="emit output lines as they arrive (jsonl)")
+    run.add_argument(
+        "--warm", action="store_true", help="fork .py scripts from a pre-warmed interpreter (POSIX only)"
+    )
+    add_format(run)
+    run.set_defaults(handler=_run)
+
+    history = commands.add_parser("history", help="duration and memory of past script runs")
+    history.add_argument("scripts", nargs="*", help="scripts to report on (default: all with history)")
+    history.add_argument("--regressions", action="store_true", help="list recent runs that regressed")
+    history.add_argument("--window", type=int, default=50, help="past runs to compare against")
+    add_format(history)
+    history.set_defaults(handler=_history)
+
+    inventory = commands.add_parser("inventory", help="devices seen by past scans, with IP/MAC history")
+    inventory.add_argument("--stale", type=float, metavar="DAYS", help="devices not seen in DAYS days")
+    inventory.add_argument("--mac", help="every IP address this MAC has held")
+    inventory.add_argument("--ip", help="every MAC address seen at this IP")
+    inventory.add_argument("--changes", action="store_true", help="IP->MAC changes (for --ip, or all)")
+    add_format(inventory)
+    inventory.set_defaults(handler=_inventory)
+
+    update_oui = commands.add_parser("update-oui", help="download the full IEEE MAC vendor registries")
+    update_oui.set_defaults(handler=_update_oui)
+
+    daemon = commands.add_parser("daemon", help="serve commands over a Unix socket, keeping caches warm")
+    daemon.set_defaults(handler=_daemon)
+
+    gui = commands.add_parser("gui", help="open the GUI")
+    gui.set_defaults(handler=_gui)
+    return parser
+
+
+def _dispatch(
+    argv: list[str],
+    cwd: str,
+    stdin: str,
+    out: TextIO,
+    err: TextIO,
+    stop_event: threading.Event | None = None,
+) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command in NO_FORWARD_COMMANDS or args.command is None:
+        err.write(f"error: {args.command or 'the GUI'} cannot be run through the daemon\n")
+        return 2
+    # Set by the daemon once the client hangs up, so a latency monitor or a
+    # script queue does not keep running for nobody.
+    args.stop_event = stop_event or threading.Event()
+    return args.handler(args, cwd, stdin, out, err)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        args.handler = _gui
+    args.stop_event = threading.Event()
+
+    stdin = ""
+    if args.command == "lookup" and "-" in (args.file or []):
+        stdin = sys.stdin.read()
+
+    if args.via_daemon and args.command is not None and args.command not in NO_FORWARD_COMMANDS:
+        from .daemon import default_socket_path, forward
+
+        # Arguments are validated here first, so the daemon never has to
+        # report a usage error over the socket.
+        forwarded = [arg for arg in argv if arg != "--via-daemon"]
+        code = forward(args.socket or default_socket_path(), forwarded, stdin, sys.stdout, sys.stderr)
+        if code is not None:
+            return code
+        print("warning: no daemon reachable, running locally", file=sys.stderr)
+
+    try:
+        return args.handler(args, os.getcwd(), stdin, sys.stdout, sys.stderr)
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import TextIO
+
+from .paths import data_dir
+
+# Wire protocol: the client sends one JSON line {"argv", "cwd", "stdin"}.
+# The daemon answers with plain stdout lines, stderr lines prefixed with
+# ERR_MARK, and finally EXIT_MARK followed by the exit code. JSON output
+# never contains raw control characters, so the marks cannot collide.
+EXIT_MARK = "\0"
+ERR_MARK = "\1"
+SOCKET_NAME = "daemon.sock"
+# macOS getsockopt(SOL_LOCAL, LOCAL_PEERCRED): struct xucred {u_int version; uid_t uid; ...}.
+SOL_LOCAL = 0
+LOCAL_PEERCRED = 1
+XUCRED = struct.Struct("=IIh16I")
+
+Dispatch = Callable[[list[str], str, str, TextIO, TextIO, threading.Event], int]
+
+
+def default_socket_path() -> Path:
+    return data_dir() / SOCKET_NAME
+
+
+def is_supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socketserver, "ThreadingUnixStreamServer")
+
+
+def peer_uid(sock: socket.socket) -> int | None:
+    """The uid of the process on the other end, or None where the OS cannot tell."""
+    try:
+        if hasattr(socket, "SO_PEERCRED"):
+            creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+            return struct.unpack("3i", creds)[1]
+        if sys.platform == "darwin":
+            return XUCRED.unpack(sock.getsockopt(SOL_LOCAL, LOCAL_PEERCRED, XUCRED.size))[1]
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+class _LineWriter:
+    def __init__(self, sock: socket.socket, lock: threading.Lock, prefix: str = "") -> None:
+        self.sock = sock
+        self.lock = lock
+        self.prefix = prefix
+        self._pending = ""
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        if "\n" in self._pending:
+            complete, _, self._pending = self._pending.rpartition("\n")
+            self._send(complete)
+        return len(text)
+
+    def flush(self) -> None:
+        if self._pending:
+            self._send(self._pending)
+            self._pending = ""
+
+    def _send(self, text: str) -> None:
+        payload = "".join(f"{self.prefix}{line}\n" for line in text.split("\n"))
+        with self.lock:
+            self.sock.sendall(payload.encode("utf-8"))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _DaemonServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            argv = [str(arg) for arg in request["argv"]]
+        except (ValueError, KeyError, TypeError):
+            return
+        # stdout and stderr share the socket, so whole lines go out under one lock.
+        lock = threading.Lock()
+        out = _LineWriter(self.connection, lock)
+        err = _LineWriter(self.connection, lock, ERR_MARK)
+        cwd = request.get("cwd") or os.getcwd()
+        # The client sends nothing after its request, so anything that ends
+        # the read (EOF, reset) means it is gone, e.g. Ctrl+C'd.
+        hung_up = threading.Event()
+        threading.Thread(target=self._watch_client, args=(hung_up,), daemon=True).start()
+        try:
+            code = self.server.dispatch(argv, cwd, request.get("stdin") or "", out, err, hung_up)
+        except Exception as exc:  # noqa: BLE001
+            err.write(f"error: {exc}\n")
+            code = 1
+        try:
+            out.flush()
+            err.flush()
+            self.connection.sendall(f"{EXIT_MARK}{code}\n".encode("utf-8"))
+        except OSError:
+            pass
+        try:
+            # Wakes the watcher; the request is done either way.
+            self.connection.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
+
+    def _watch_client(self, hung_up: threading.Event) -> None:
+        try:
+            while self.connection.recv(4096):
+                pass
+        except OSError:
+            pass
+        hung_up.set()
+
+
+if is_supported():
+
+    class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, dispatch: Dispatch) -> None:
+            self.dispatch = dispatch
+            super().__init__(path, _RequestHandler)
+
+        def verify_request(self, request: socket.socket, client_address: object) -> bool:
+            # "run" executes scripts as this user, so only this user may ask.
+            # The socket is 0600 in a 0700 directory as well; this covers
+            # platforms and paths where that is not enough.
+            uid = peer_uid(request)
+            return uid is None or uid == os.getuid()
+
+
+def _interrupt(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(path: str | Path, dispatch: Dispatch) -> None:
+    if not is_supported():
+        raise OSError("Daemon mode needs Unix domain sockets, which this platform does not provide")
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if path.parent == data_dir():
+        # Created earlier by a cache with the default mode; nothing in it is
+        # meant for other users.
+        os.chmod(path.parent, 0o700)
+    if path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+            except OSError:
+                path.unlink()
+            else:
+                raise OSError(f"A daemon is already listening on {path}")
+
+    # Bound under a tight umask so the socket never exists, even briefly,
+    # with permissions another local user could connect through.
+    previous_umask = os.umask(0o077)
+    try:
+        server = _DaemonServer(str(path), dispatch)
+    finally:
+        os.umask(previous_umask)
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def forward(path: str | Path, argv: list[str], stdin: str, out: TextIO, err: TextIO) -> int | None:
+    if not is_supported():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile("r", encoding="utf-8", newline="\n") as replies:
+        request = {"argv": argv, "cwd": os.getcwd(), "stdin": stdin}
+        try:
+            sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            for line in replies:
+                if line.startswith(EXIT_MARK):
+                    return int(line[1:])
+                if line.startswith(ERR_MARK):
+                    err.write(line[1:])
+                    err.flush()
+                else:
+                    out.write(line)
+                    out.flush()
+        except OSError:
+            # A daemon that refuses the request (another user's) resets the
+            # connection rather than closing it cleanly.
+            pass
+    err.write("error: daemon closed the connection\n")
+    return 1
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import bisect
+import ipaddress
+import re
+import socket
+from array import array
+from collections.abc import Iterator, MutableMapping
+
+from .models import DeviceRecord
+
+# IPv6 keys carry a flag bit above the 128-bit address so every IPv4 key
+# sorts first and a v4-compatible v6 address can never collide with it.
+V6_FLAG = 1 << 128
+# MACs are 48-bit; the placeholders the scanners emit live just above that.
+MAC_UNKNOWN = 1 << 48
+MAC_PENDING = MAC_UNKNOWN + 1
+SORT_KEYS = ("ip", "mac", "hostname", "vendor", "note")
+STRING_COLUMNS = ("hostname", "vendor", "note")
+
+MAC_PREFIX = re.compile(r"^[0-9a-f]{2}(?:[:-]?[0-9a-f]{2}){1,5}$")
+# Without a separator, shorter hex runs ("cafe", "1234") are far more likely
+# to be part of a hostname or vendor than the start of a MAC.
+MIN_BARE_MAC_DIGITS = 6
+IPV4_PREFIX = re.compile(r"^\d{1,3}(?:\.\d{1,3}){0,3}\.?$")
+
+
+def pack_ip(ip: str) -> int:
+    # inet_pton is several times faster than ipaddress for the IPv4 bulk of a
+    # sweep; IPv6 still goes through ipaddress so keys round-trip to the same
+    # canonical text the rest of the app uses.
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        pass
+    address = ipaddress.ip_address(ip)
+    return int(address) if address.version == 4 else V6_FLAG | int(address)
+
+
+def unpack_ip(key: int) -> str:
+    if key & V6_FLAG:
+        return str(ipaddress.IPv6Address(key ^ V6_FLAG))
+    return socket.inet_ntop(socket.AF_INET, key.to_bytes(4, "big"))
+
+
+def pack_mac(mac: str) -> int:
+    digits = mac.replace(":", "").replace("-", "").replace(".", "")
+    if len(digits) == 12:
+        try:
+            return int(digits, 16)
+        except ValueError:
+            pass
+    return MAC_PENDING if mac == "(pending)" else MAC_UNKNOWN
+
+
+def format_mac(value: int) -> str:
+    if value == MAC_PENDING:
+        return "(pending)"
+    if value == MAC_UNKNOWN:
+        return "(unknown)"
+    raw = f"{value:012x}"
+    return ":".join(raw[index:index + 2] for index in range(0, 12, 2))
+
+
+def _network_range(text: str) -> tuple[int, int] | None:
+    # "10.2.0.0/16", "10.2.3.4" and a dotted prefix such as "10.2." all
+    # become a contiguous key range over the IP index.
+    try:
+        if "/" in text:
+            network = ipaddress.ip_network(text, strict=False)
+        elif IPV4_PREFIX.match(text):
+            octets = [part for part in text.split(".") if part]
+            network = ipaddress.ip_network(
+                ".".join(octets + ["0"] * (4 - len(octets))) + f"/{8 * len(octets)}", strict=False
+            )
+        else:
+            network = ipaddress.ip_network(text)
+    except ValueError:
+        return None
+    flag = 0 if network.version == 4 else V6_FLAG
+    return flag | int(network.network_address), flag | int(network.broadcast_address)
+
+
+class DeviceRow:
+    # Materialized only for rows that are actually on screen.
+    __slots__ = ("index", "ip", "mac", "hostname", "vendor", "note")
+
+    def __init__(self, index: int, ip: str, mac: str, hostname: str, vendor: str, note: str) -> None:
+        self.index = index
+        self.ip = ip
+        self.mac = mac
+        self.hostname = hostname
+        self.vendor = vendor
+        self.note = note
+
+    def values(self) -> tuple[str, str, str, str, str]:
+        return (self.ip, self.mac, self.hostname, self.vendor, self.note)
+
+
+class DeviceStore(MutableMapping):
+    """Column-oriented device table keyed by IP address.
+
+    Addresses and MACs are packed into integer arrays and the text columns
+    hold ids into one interned string table, so a /16 worth of devices costs
+    a few dozen bytes per host. Reading a device back materializes a
+    ``DeviceRecord``; row numbers are only stable until the next removal.
+    """
+
+    def __init__(self) -> None:
+        self._ip_hi = array("Q")
+        self._ip_lo = array("Q")
+        self._v6 = array("B")
+        self._mac = array("Q")
+        self._columns = {name: array("I") for name in STRING_COLUMNS}
+        self._strings: list[str] = [""]
+        self._string_ids: dict[str, int] = {"": 0}
+        self._rows: dict[int, int] = {}
+        self._vendor_rows: dict[int, set[int]] = {}
+        self._orders: dict[str, tuple[int, array, list[int]]] = {}
+        self._string_ranks: tuple[int, array] | None = None
+        self.version = 0
+
+    def _intern(self, text: str) -> int:
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return string_id
+
+    def _key(self, row: int) -> int:
+        return (self._v6[row] and V6_FLAG) | (self._ip_hi[row] << 64) | self._ip_lo[row]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return (unpack_ip(key) for key in list(self._rows))
+
+    def __contains__(self, ip: object) -> bool:
+        try:
+            return pack_ip(str(ip)) in self._rows
+        except ValueError:
+            return False
+
+    def row_of(self, ip: str) -> int | None:
+        try:
+            return self._rows.get(pack_ip(ip))
+        except ValueError:
+            return None
+
+    def __getitem__(self, ip: str) -> DeviceRecord:
+        row = self.row_of(ip)
+        if row is None:
+            raise KeyError(ip)
+        return self.record(row)
+
+    def record(self, row: int) -> DeviceRecord:
+        strings = self._strings
+        return DeviceRecord(
+            ip=unpack_ip(self._key(row)),
+            mac=format_mac(self._mac[row]),
+            note=strings[self._columns["note"][row]],
+            hostname=strings[self._columns["hostname"][row]],
+            vendor=strings[self._columns["vendor"][row]],
+        )
+
+    def view(self, row: int) -> DeviceRow:
+        strings = self._strings
+        columns = self._columns
+        return DeviceRow(
+            row,
+            unpack_ip(self._key(row)),
+            format_mac(self._mac[row]),
+            strings[columns["hostname"][row]],
+            strings[columns["vendor"][row]],
+            strings[columns["note"][row]],
+        )
+
+    def __setitem__(self, ip: str, device: DeviceRecord) -> None:
+        key = pack_ip(ip)
+        vendor = self._intern(device.vendor)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._mac)
+            self._v6.append(1 if key & V6_FLAG else 0)
+            self._ip_hi.append((key >> 64) & 0xFFFFFFFFFFFFFFFF)
+            self._ip_lo.append(key & 0xFFFFFFFFFFFFFFFF)
+            self._mac.append(0)
+            for column in self._columns.values():
+                column.append(0)
+        else:
+            self._vendor_rows[self._columns["vendor"][row]].discard(row)
+        self._mac[row] = pack_mac(device.mac)
+        self._columns["hostname"][row] = self._intern(device.hostname)
+        self._columns["note"][row] = self._intern(device.note)
+        self._columns["vendor"][row] = vendor
+        self._vendor_rows.setdefault(vendor, set()).add(row)
+        self.version += 1
+
+    def __delitem__(self, ip: str) -> None:
+        row = self.row_of(ip)
+        if row is None:
+            raise KeyError(ip)
+        del self._rows[pack_ip(ip)]
+        self._vendor_rows[self._columns["vendor"][row]].discard(row)
+
+        # Swap-remove: the last row moves into the hole so the arrays stay dense.
+        last = len(self._mac) - 1
+        if row != last:
+            self._vendor_rows[self._columns["vendor"][last]].discard(last)
+            for column in (self._ip_hi, self._ip_lo, self._v6, self._mac, *self._columns.values()):
+                column[row] = column[last]
+            self._rows[self._key(row)] = row
+            self._vendor_rows[self._columns["vendor"][row]].add(row)
+        for column in (self._ip_hi, self._ip_lo, self._v6, self._mac, *self._columns.values()):
+            column.pop()
+        self.version += 1
+
+    def clear(self) -> None:
+        for column in (self._ip_hi, self._ip_lo, self._v6, self._mac, *self._columns.values()):
+            del column[:]
+        self._strings = [""]
+        self._string_ids = {"": 0}
+        self._rows.clear()
+        self._vendor_rows.clear()
+        self._orders.clear()
+        self._string_ranks = None
+        self.version += 1
+
+    def _ranks(self) -> array:
+        # Position of every interned string in case-insensitive order, so
+        # text columns sort on small integers instead of string compares.
+        if self._string_ranks is None or self._string_ranks[0] != len(self._strings):
+            ordered = sorted(range(len(self._strings)), key=lambda index: self._strings[index].casefold())
+            ranks = array("I", bytes(4 * len(ordered)))
+            for rank, string_id in enumerate(ordered):
+                ranks[string_id] = rank
+            self._string_ranks = (len(self._strings), ranks)
+        return self._string_ranks[1]
+
+    def _index(self, sort_key: str) -> tuple[array, list[int]]:
+        cached = self._orders.get(sort_key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1], cached[2]
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_key}")
+
+        ip_keys = [self._key(row) for row in range(len(self._mac))]
+        if sort_key == "ip":
+            keys = ip_keys
+        elif sort_key == "mac":
+            keys = [(mac << 130) | ip for mac, ip in zip(self._mac, ip_keys)]
+        else:
+            ranks = self._ranks()
+            keys = [(ranks[string_id] << 130) | ip for string_id, ip in zip(self._columns[sort_key], ip_keys)]
+        order = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+        sorted_keys = [keys[row] for row in order]
+        self._orders[sort_key] = (self.version, order, sorted_keys)
+        return order, sorted_keys
+
+    def order(self, sort_key: str = "ip", descending: bool = False) -> array:
+        order = self._index(sort_key)[0]
+        return order[::-1] if descending else order
+
+    def _range(self, sort_key: str, low: int, high: int) -> set[int]:
+        order, keys = self._index(sort_key)
+        start = bisect.bisect_left(keys, low)
+        end = bisect.bisect_right(keys, high)
+        return set(order[start:end])
+
+    def matching(self, text: str) -> set[int] | None:
+        """Rows matching a filter, or None when the filter is empty.
+
+        An address, CIDR or dotted prefix is a range scan over the IP index,
+        a MAC prefix ("aa:bb:cc", or at least six bare hex digits) a range
+        scan over the MAC index; anything else is a case-insensitive
+        substring of vendor, hostname or note.
+        """
+        text = text.strip().lower()
+        if not text:
+            return None
+
+        ip_range = _network_range(text)
+        if ip_range is not None:
+            return self._range("ip", *ip_range)
+
+        digits = text.replace(":", "").replace("-", "")
+        if MAC_PREFIX.match(text) and (digits != text or len(digits) >= MIN_BARE_MAC_DIGITS):
+            shift = 4 * (12 - len(digits))
+            low = int(digits, 16) << shift
+            return self._range("mac", low << 130, (((low + (1 << shift)) << 130) - 1))
+
+        string_ids = {index for index, value in enumerate(self._strings) if text in value.casefold()}
+        rows: set[int] = set()
+        for string_id in string_ids:
+            rows |= self._vendor_rows.get(string_id, set())
+        for name in ("hostname", "note"):
+            column = self._columns[name]
+            rows.update(row for row in range(len(column)) if column[row] in string_ids)
+        return rows
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import tkinter as tk
+from collections.abc import Callable
+from tkinter import ttk
+
+from .device_store import DeviceStore
+from .models import ServiceRecord
+
+COLUMNS = ("ip", "mac", "hostname", "vendor", "note")
+HEADINGS = {
+    "ip": "IP Address", "mac": "MAC Address", "hostname": "Hostname", "vendor": "Vendor", "note": "Info",
+}
+WIDTHS = {"ip": 130, "mac": 140, "hostname": 180, "vendor": 180, "note": 280}
+REFRESH_DELAY_MS = 100
+WHEEL_ROWS = 3
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualDeviceTree(ttk.Frame):
+    """Device table that only creates Treeview items for the rows on screen.
+
+    The Treeview never holds more items than fit in the window; scrolling,
+    sorting and filtering re-fill those few items from the ``DeviceStore``
+    indexes, so a /16 sweep costs the same to display as a home LAN.
+    Services are listed under their device as indented rows.
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        store: DeviceStore,
+        services: dict[str, dict[int, ServiceRecord]],
+        tags_for: Callable[[str], tuple[str, ...]],
+    ) -> None:
+        super().__init__(master)
+        self.store = store
+        self.services = services
+        self.tags_for = tags_for
+        self.sort_key = "ip"
+        self.descending = False
+        self.selected: set[str] = set()
+        self._display: list[tuple[int, int | None]] = []
+        self._offset = 0
+        self._visible_rows = 1
+        self._dirty = True
+        self._refresh_job: str | None = None
+        self._slot_ips: dict[str, str] = {}
+
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(bar, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.refresh())
+        ttk.Entry(bar, textvariable=self.filter_var, width=36).pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Label(bar, text="IP / CIDR / MAC prefix / vendor / hostname").pack(side=tk.LEFT)
+        self.count_var = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=self.count_var).pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=COLUMNS, show="tree headings", height=18)
+        self.tree.column("#0", width=28, stretch=False)
+        for column in COLUMNS:
+            self.tree.heading(column, text=HEADINGS[column], command=lambda name=column: self.sort_by(name))
+            self.tree.column(column, width=WIDTHS[column])
+        self.tree.tag_configure("joined", background="#d8f5d0")
+        self.tree.tag_configure("left", background="#f5d6d6", foreground="#777777")
+        self.tree.tag_configure("mac_changed", background="#ffd27a")
+        self.tree.tag_configure("moved", background="#d6e6f5")
+        self.tree.tag_configure("service", foreground="#555555")
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll_by(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_by(WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda event: self._on_key(-1))
+        self.tree.bind("<Down>", lambda event: self._on_key(1))
+        self.tree.bind("<Prior>", lambda event: self._scroll_by(-self._visible_rows))
+        self.tree.bind("<Next>", lambda event: self._scroll_by(self._visible_rows))
+
+    def refresh(self) -> None:
+        # Changes arrive one host at a time during a sweep; coalesce them so
+        # the indexes are rebuilt at most once per REFRESH_DELAY_MS.
+        self._dirty = True
+        if self._refresh_job is None:
+            self._refresh_job = self.after(REFRESH_DELAY_MS, self._run_refresh)
+
+    def _run_refresh(self) -> None:
+        self._refresh_job = None
+        self._render()
+
+    def clear(self) -> None:
+        self.selected.clear()
+        self._offset = 0
+        self.refresh()
+
+    def selected_ips(self) -> list[str]:
+        return [ip for ip in self.selected if ip in self.store]
+
+    def sort_by(self, column: str) -> None:
+        if column == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key, self.descending = column, False
+        for name in COLUMNS:
+            arrow = (" ▼" if self.descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=HEADINGS[name] + arrow)
+        self.refresh()
+
+    def _rebuild(self) -> None:
+        self._dirty = False
+        matching = self.store.matching(self.filter_var.get())
+        order = self.store.order(self.sort_key, self.descending)
+        rows = order if matching is None else [row for row in order if row in matching]
+
+        service_rows: dict[int, list[int]] = {}
+        for ip, ports in self.services.items():
+            row = self.store.row_of(ip)
+            if row is not None and ports:
+                service_rows[row] = sorted(ports)
+
+        if service_rows:
+            display: list[tuple[int, int | None]] = []
+            for row in rows:
+                display.append((row, None))
+                display.extend((row, port) for port in service_rows.get(row, ()))
+        else:
+            display = [(row, None) for row in rows]
+        self._display = display
+        self.count_var.set(f"{len(rows)} of {len(self.store)} device(s)")
+
+    def _render(self) -> None:
+        if self._dirty:
+            self._rebuild()
+        total = len(self._display)
+        self._offset = max(0, min(self._offset, total - self._visible_rows))
+        window = self._display[self._offset:self._offset + self._visible_rows]
+
+        slots = self.tree.get_children()
+        for index in range(len(slots), len(window)):
+            self.tree.insert("", tk.END, iid=f"slot{index}")
+        slots = self.tree.get_children()
+        if len(slots) > len(window):
+            self.tree.delete(*slots[len(window):])
+
+        self._slot_ips = {}
+        reselect = []
+        for slot, (row, port) in zip(slots, window):
+            device = self.store.view(row)
+            if port is None:
+                self.tree.item(slot, text="", values=device.values(), tags=self.tags_for(device.ip))
+            else:
+                record = self.services[device.ip][port]
+                values = (f"tcp/{record.port}", record.state, "", "", record.banner)
+                self.tree.item(slot, text="└", values=values, tags=("service",))
+            self._slot_ips[slot] = device.ip
+            if port is None and device.ip in self.selected:
+                reselect.append(slot)
+        if reselect:
+            self.tree.selection_set(reselect)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + len(window)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, offset: int) -> None:
+        offset = max(0, min(offset, len(self._display) - self._visible_rows))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _scroll_by(self, rows: int) -> str:
+        self._scroll_to(self._offset + rows)
+        return "break"
+
+    def _on_scrollbar(self, action: str, amount: str, unit: str = "") -> None:
+        if action == "moveto":
+            self._scroll_to(round(float(amount) * len(self._display)))
+        elif unit == "pages":
+            self._scroll_by(int(amount) * self._visible_rows)
+        else:
+            self._scroll_by(int(amount))
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        # Windows reports multiples of 120 per notch, macOS small deltas.
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-steps * WHEEL_ROWS)
+
+    def _on_key(self, step: int) -> str | None:
+        # Arrow keys move within the window natively; only at its edges does
+        # the window itself need to slide.
+        focus = self.tree.focus()
+        slots = self.tree.get_children()
+        if not focus or not slots:
+            return None
+        if (step < 0 and focus == slots[0]) or (step > 0 and focus == slots[-1]):
+            return self._scroll_by(step)
+        return None
+
+    def _on_resize(self, event: tk.Event) -> None:
+        style = ttk.Style(self)
+        row_height = int(style.lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        # One row's worth is left for the heading.
+        rows = max(1, event.height // row_height - 1)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render()
+
+    def _on_select(self, event: tk.Event) -> None:
+        # Selection is tracked by IP, so it survives rows scrolling out of
+        # the window and back; selecting a service selects its device.
+        visible = set(self._slot_ips.values())
+        chosen = {self._slot_ips[slot] for slot in self.tree.selection() if slot in self._slot_ips}
+        self.selected = (self.selected - visible) | chosen
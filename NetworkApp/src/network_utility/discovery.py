@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import socket
+import threading
+from collections.abc import Callable, Iterable, Iterator
+
+from .models import DeviceRecord
+
+# Ports that nearly every class of device either answers or actively refuses.
+# A refusal (RST) proves the host is up just as well as an accept does.
+DEFAULT_PROBE_PORTS = (80, 443, 22, 445)
+DEFAULT_CONCURRENCY = 128
+DEFAULT_TIMEOUT = 0.5
+
+# UDP "discard" port: the datagram itself is irrelevant, sending it forces the
+# kernel to ARP for the target so silent hosts still land in the ARP cache.
+NUDGE_PORT = 9
+
+
+def _nudge(ip: str) -> None:
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            sock.sendto(b"", (ip, NUDGE_PORT))
+    except OSError:
+        pass
+
+
+async def _probe_port(ip: str, port: int, timeout: float) -> int | None:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        return port
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return port
+
+
+async def probe_host(ip: str, ports: Iterable[int], timeout: float) -> int | None:
+    tasks = [asyncio.ensure_future(_probe_port(ip, port, timeout)) for port in ports]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            port = await next_done
+            if port is not None:
+                return port
+    finally:
+        for task in tasks:
+            task.cancel()
+    return None
+
+
+async def sweep_network(
+    hosts: Iterator[str],
+    on_host: Callable[[DeviceRecord], None],
+    *,
+    ports: Iterable[int] = DEFAULT_PROBE_PORTS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    stop_event: threading.Event | None = None,
+) -> int:
+    ports = tuple(ports)
+    found = 0
+
+    # A fixed set of workers pulling from one shared iterator keeps memory flat
+    # for a /16 instead of materializing 65k pending tasks up front.
+    async def worker() -> None:
+        nonlocal found
+        for ip in hosts:
+            if stop_event is not None and stop_event.is_set():
+                return
+            _nudge(ip)
+            port = await probe_host(ip, ports, timeout)
+            if port is not None:
+                found += 1
+                on_host(DeviceRecord(ip=ip, mac="(pending)", note=f"Active: responded on tcp/{port}"))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return found
+
+
+def sweep_subnet(
+    network: ipaddress.IPv4Network,
+    on_host: Callable[[DeviceRecord], None],
+    *,
+    ports: Iterable[int] = DEFAULT_PROBE_PORTS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    stop_event: threading.Event | None = None,
+) -> int:
+    hosts = (str(ip) for ip in network.hosts())
+    workers = min(concurrency, max(1, network.num_addresses))
+    return asyncio.run(
+        sweep_network(
+            hosts,
+            on_host,
+            ports=ports,
+            concurrency=workers,
+            timeout=timeout,
+            stop_event=stop_event,
+        )
+    )
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import random
+import socket
+import struct
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from urllib.request import urlopen
+
+from .paths import data_dir
+
+# Only a few dozen common vendors; the IEEE registries are tens of thousands
+# of rows and change weekly, so they are fetched by update_oui_registry().
+BUNDLED_OUI_PATH = Path(__file__).with_name("data") / "oui_seed.csv"
+IEEE_REGISTRY_URLS = {
+    "oui.csv": "https://standards-oui.ieee.org/oui/oui.csv",
+    "mam.csv": "https://standards-oui.ieee.org/oui28/mam.csv",
+    "oui36.csv": "https://standards-oui.ieee.org/oui36/oui36.csv",
+}
+IEEE_REGISTRY_FILES = tuple(IEEE_REGISTRY_URLS)
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 1.0
+MDNS_PORT = 5353
+NETBIOS_PORT = 137
+
+_oui_registry: dict[str, str] | None = None
+_oui_lock = threading.Lock()
+
+
+def _load_oui_registry() -> dict[str, str]:
+    # A full IEEE export (oui.csv / mam.csv / oui36.csv) dropped into the data
+    # dir takes precedence over the small bundled seed list. Assignments are
+    # keyed by their hex prefix so MA-L, MA-M and MA-S blocks share one dict.
+    registry: dict[str, str] = {}
+    paths = [BUNDLED_OUI_PATH] + [data_dir() / name for name in IEEE_REGISTRY_FILES]
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace", newline="") as handle:
+                for row in csv.DictReader(handle):
+                    prefix = (row.get("Assignment") or "").strip().upper()
+                    name = (row.get("Organization Name") or "").strip()
+                    if prefix and name:
+                        registry[prefix] = name
+        except OSError:
+            continue
+    return registry
+
+
+def get_oui_registry() -> dict[str, str]:
+    global _oui_registry
+    with _oui_lock:
+        if _oui_registry is None:
+            _oui_registry = _load_oui_registry()
+        return _oui_registry
+
+
+def update_oui_registry(urls: dict[str, str] | None = None) -> dict[str, int]:
+    """Download the IEEE MA-L/MA-M/MA-S registries into the data dir.
+
+    Returns the number of assignments in each file; the in-memory registry
+    is reloaded on next use.
+    """
+    global _oui_registry
+    counts: dict[str, int] = {}
+    for name, url in (urls or IEEE_REGISTRY_URLS).items():
+        target = data_dir() / name
+        partial = target.with_name(name + ".tmp")
+        with urlopen(url, timeout=60) as response:  # nosec: B310 - IEEE registry URLs
+            partial.write_bytes(response.read())
+        with open(partial, encoding="utf-8", errors="replace", newline="") as handle:
+            counts[name] = sum(1 for row in csv.DictReader(handle) if row.get("Assignment"))
+        if not counts[name]:
+            partial.unlink()
+            raise ValueError(f"{name} from the IEEE registry has no assignments")
+        partial.replace(target)
+    with _oui_lock:
+        _oui_registry = None
+    return counts
+
+
+def lookup_vendor(mac: str) -> str:
+    digits = "".join(ch for ch in mac if ch in "0123456789abcdefABCDEF").upper()
+    if len(digits) != 12:
+        return ""
+    registry = get_oui_registry()
+    for length in (9, 7, 6):
+        vendor = registry.get(digits[:length])
+        if vendor:
+            return vendor
+    if int(digits[1], 16) & 0x2:
+        return "(locally administered / randomized)"
+    return ""
+
+
+def _encode_name(name: str) -> bytes:
+    return b"".join(bytes([len(label)]) + label.encode("ascii") for label in name.split(".") if label) + b"\0"
+
+
+def _read_name(data: bytes, offset: int) -> tuple[str, int]:
+    labels: list[str] = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(data[offset + 1:offset + 1 + length].decode("utf-8", errors="replace"))
+        offset += 1 + length
+    return ".".join(labels), end if end is not None else offset
+
+
+def _reverse_name(ip: str) -> str:
+    return ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+
+
+def _mdns_query(ip: str) -> bytes:
+    header = struct.pack("!HHHHHH", random.randrange(1 << 16), 0, 1, 0, 0, 0)
+    return header + _encode_name(_reverse_name(ip)) + struct.pack("!HH", 12, 1)
+
+
+def _parse_mdns_reply(data: bytes) -> str:
+    try:
+        questions, answers = struct.unpack_from("!HH", data, 4)
+        offset = 12
+        for _ in range(questions):
+            _, offset = _read_name(data, offset)
+            offset += 4
+        for _ in range(answers):
+            _, offset = _read_name(data, offset)
+            rtype, _, _, length = struct.unpack_from("!HHIH", data, offset)
+            offset += 10
+            if rtype == 12:
+                name, _ = _read_name(data, offset)
+                return name.removesuffix(".local")
+            offset += length
+    except (IndexError, struct.error):
+        pass
+    return ""
+
+
+def _netbios_query() -> bytes:
+    # NBSTAT for the wildcard name "*": first-level encoding turns each of the
+    # 16 name bytes into two letters 'A' + nibble.
+    raw = b"*" + b"\0" * 15
+    encoded = bytes(ch for byte in raw for ch in (0x41 + (byte >> 4), 0x41 + (byte & 0xF)))
+    header = struct.pack("!HHHHHH", random.randrange(1 << 16), 0, 1, 0, 0, 0)
+    return header + bytes([32]) + encoded + b"\0" + struct.pack("!HH", 0x21, 1)
+
+
+def _parse_netbios_reply(data: bytes) -> str:
+    try:
+        _, offset = _read_name(data, 12)
+        offset += 10
+        count = data[offset]
+        offset += 1
+        for index in range(count):
+            entry = data[offset + index * 18:offset + index * 18 + 18]
+            suffix = entry[15]
+            (flags,) = struct.unpack_from("!H", entry, 16)
+            if suffix == 0x00 and not flags & 0x8000:
+                return entry[:15].decode("ascii", errors="replace").strip()
+    except (IndexError, struct.error):
+        pass
+    return ""
+
+
+class _SingleReply(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future) -> None:
+        self.future = future
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.future.done():
+            self.future.set_result(b"")
+
+
+async def _udp_query(ip: str, port: int, payload: bytes, timeout: float) -> bytes:
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SingleReply(future), remote_addr=(ip, port)
+        )
+    except OSError:
+        return b""
+    try:
+        transport.sendto(payload)
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return b""
+    finally:
+        transport.close()
+
+
+def _deliver(future: asyncio.Future, result: str) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+async def _reverse_dns(ip: str, timeout: float) -> str:
+    # gethostbyaddr() cannot be cancelled and may hang far past any timeout.
+    # On a shared pool a few such calls would hold every thread and starve
+    # the lookups queued behind them, so each lookup gets its own daemon
+    # thread and its own deadline; a hung one is simply abandoned.
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def lookup() -> None:
+        try:
+            hostname = socket.gethostbyaddr(ip)[0]
+        except (OSError, UnicodeError):
+            hostname = ""
+        try:
+            loop.call_soon_threadsafe(_deliver, future, hostname)
+        except RuntimeError:
+            # The sweep finished and its loop closed while this one hung.
+            pass
+
+    threading.Thread(target=lookup, daemon=True).start()
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return ""
+
+
+async def resolve_hostname(ip: str, timeout: float) -> str:
+    if ":" in ip:
+        return await _reverse_dns(ip, timeout)
+    # All three run at once; answers are taken in order of trust, so a quick
+    # PTR record returns without waiting out the mDNS and NetBIOS probes.
+    reverse = asyncio.ensure_future(_reverse_dns(ip, timeout))
+    mdns = asyncio.ensure_future(_udp_query(ip, MDNS_PORT, _mdns_query(ip), timeout))
+    netbios = asyncio.ensure_future(_udp_query(ip, NETBIOS_PORT, _netbios_query(), timeout))
+    try:
+        return await reverse or _parse_mdns_reply(await mdns) or _parse_netbios_reply(await netbios)
+    finally:
+        for task in (reverse, mdns, netbios):
+            task.cancel()
+
+
+async def resolve_names_async(
+    ips: Iterator[str],
+    on_name: Callable[[str, str], None],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    stop_event: threading.Event | None = None,
+) -> None:
+    async def worker() -> None:
+        for ip in ips:
+            if stop_event is not None and stop_event.is_set():
+                return
+            hostname = await resolve_hostname(ip, timeout)
+            if hostname:
+                on_name(ip, hostname)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+
+def resolve_names(
+    ips: Iterable[str],
+    on_name: Callable[[str, str], None],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    stop_event: threading.Event | None = None,
+) -> None:
+    ips = list(dict.fromkeys(ips))
+    if not ips:
+        return
+    asyncio.run(
+        resolve_names_async(
+            iter(ips),
+            on_name,
+            concurrency=min(concurrency, len(ips)),
+            timeout=timeout,
+            stop_event=stop_event,
+        )
+    )
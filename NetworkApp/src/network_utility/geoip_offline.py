@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import heapq
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from .ip_cache import reserved_result
+from .paths import data_dir
+
+# Compiled layout (native byte order, every section 8-byte aligned):
+#   header | v4 starts u32[] | v4 ends u32[] | v4 record ids u32[]
+#          | v6 starts 16B[] | v6 ends 16B[] | v6 record ids u32[]
+#          | record offsets u32[records + 1] | UTF-8 record blob
+# Records are "country\x1forg\x1fasn" and are shared between ranges.
+# Version 2 holds flattened, disjoint ranges; version 1 files are recompiled.
+MAGIC = b"NUGEOIP2"
+HEADER = struct.Struct("=8sBxxxIII")
+COMPILED_SUFFIX = ".nugeo"
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+FIELD_SEPARATOR = "\x1f"
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _parse_row(row: list[str], tabbed: bool) -> tuple[int, int, int, str, str, str] | None:
+    try:
+        if tabbed:
+            # ip2asn layout: range_start, range_end, AS number, country, AS description
+            start, end = ipaddress.ip_address(row[0]), ipaddress.ip_address(row[1])
+            asn, country, org = row[2], row[3], row[4]
+        elif "/" in row[0]:
+            network = ipaddress.ip_network(row[0].strip(), strict=False)
+            start, end = network.network_address, network.broadcast_address
+            country, org, asn = (row[1:] + ["", "", ""])[:3]
+        else:
+            start = ipaddress.ip_address(int(row[0]) if row[0].isdigit() else row[0].strip())
+            end = ipaddress.ip_address(int(row[1]) if row[1].isdigit() else row[1].strip())
+            country, org, asn = (row[2:] + ["", "", ""])[:3]
+    except (ValueError, IndexError):
+        return None
+    if start.version != end.version or int(start) > int(end):
+        return None
+
+    asn = asn.strip()
+    if asn in {"", "0"}:
+        asn = ""
+    elif asn.isdigit():
+        asn = f"AS{asn}"
+    return start.version, int(start), int(end), country.strip(), org.strip(), asn
+
+
+def _flatten(items: list[tuple[int, int, int]]) -> list[tuple[int, int, int]]:
+    """Disjoint, sorted ranges where every address keeps the narrowest range
+    that covered it (the later one in the file on ties)."""
+    ordered = sorted((start, end, order, record) for order, (start, end, record) in enumerate(items))
+    boundaries = sorted({point for start, end, _, _ in ordered for point in (start, end + 1)})
+    active: list[tuple[int, int, int, int]] = []
+    flat: list[tuple[int, int, int]] = []
+    position = 0
+    for index, boundary in enumerate(boundaries[:-1]):
+        while position < len(ordered) and ordered[position][0] == boundary:
+            start, end, order, record = ordered[position]
+            heapq.heappush(active, (end - start, -order, end, record))
+            position += 1
+        while active and active[0][2] < boundary:
+            heapq.heappop(active)
+        if not active:
+            continue
+        record = active[0][3]
+        last = boundaries[index + 1] - 1
+        if flat and flat[-1][1] == boundary - 1 and flat[-1][2] == record:
+            flat[-1] = (flat[-1][0], last, record)
+        else:
+            flat.append((boundary, last, record))
+    return flat
+
+
+def compile_database(source: str | Path, target: str | Path) -> Path:
+    source, target = Path(source), Path(target)
+    with open(source, encoding="utf-8", errors="replace", newline="") as handle:
+        first = handle.readline()
+        tabbed = "\t" in first
+        handle.seek(0)
+        reader = csv.reader(handle, delimiter="\t" if tabbed else ",")
+
+        records: dict[str, int] = {}
+        ranges: dict[int, list[tuple[int, int, int]]] = {4: [], 6: []}
+        for row in reader:
+            if not row or row[0].startswith("#"):
+                continue
+            parsed = _parse_row(row, tabbed)
+            if parsed is None:
+                continue
+            version, start, end, country, org, asn = parsed
+            if not (country or org or asn):
+                continue
+            key = FIELD_SEPARATOR.join((country, org, asn))
+            record = records.setdefault(key, len(records))
+            ranges[version].append((start, end, record))
+
+    # The index is searched for the last range starting at or before an
+    # address, which only works once nested and overlapping ranges are
+    # split into disjoint pieces.
+    for version, items in ranges.items():
+        ranges[version] = _flatten(items)
+
+    blob = bytearray()
+    offsets = array("I", [0])
+    for key in records:
+        blob += key.encode("utf-8")
+        offsets.append(len(blob))
+
+    v4, v6 = ranges[4], ranges[6]
+    sections = [
+        array("I", (start for start, _, _ in v4)).tobytes(),
+        array("I", (end for _, end, _ in v4)).tobytes(),
+        array("I", (record for _, _, record in v4)).tobytes(),
+        b"".join(start.to_bytes(16, "big") for start, _, _ in v6),
+        b"".join(end.to_bytes(16, "big") for _, end, _ in v6),
+        array("I", (record for _, _, record in v6)).tobytes(),
+        offsets.tobytes(),
+        bytes(blob),
+    ]
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".tmp")
+    with open(partial, "wb") as out:
+        header = HEADER.pack(MAGIC, BYTE_ORDER, len(v4), len(v6), len(records))
+        out.write(header.ljust(_align(HEADER.size), b"\0"))
+        for section in sections:
+            out.write(section.ljust(_align(len(section)), b"\0"))
+    os.replace(partial, target)
+    return target
+
+
+class _PackedAddresses:
+    # Sequence view over fixed-width big-endian keys, so bisect can search
+    # 128-bit addresses straight out of the mapping without unpacking them.
+    def __init__(self, view: memoryview, count: int) -> None:
+        self.view = view
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.view[index * 16:(index + 1) * 16].tobytes()
+
+
+class OfflineGeoIPDatabase:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{self.path} is truncated or not a compiled database")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        self._views = [view]
+        try:
+            self._load(view)
+        except ValueError:
+            self.close()
+            raise
+
+    def _load(self, view: memoryview) -> None:
+        magic, order, v4_count, v6_count, record_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or order != BYTE_ORDER:
+            raise ValueError(f"{self.path} is not a compiled database for this platform")
+
+        offset = _align(HEADER.size)
+
+        def take(size: int, cast: str = "") -> memoryview:
+            nonlocal offset
+            if offset + size > len(view):
+                raise ValueError(f"{self.path} is truncated")
+            section = view[offset:offset + size]
+            offset += _align(size)
+            # Released newest first by close(), casts before what they view.
+            self._views.insert(0, section)
+            if cast:
+                section = section.cast(cast)
+                self._views.insert(0, section)
+            return section
+
+        self.v4_count = v4_count
+        self.v6_count = v6_count
+        self._v4_starts = take(4 * v4_count, "I")
+        self._v4_ends = take(4 * v4_count, "I")
+        self._v4_records = take(4 * v4_count, "I")
+        self._v6_starts = _PackedAddresses(take(16 * v6_count), v6_count)
+        self._v6_ends = _PackedAddresses(take(16 * v6_count), v6_count)
+        self._v6_records = take(4 * v6_count, "I")
+        self._offsets = take(4 * (record_count + 1), "I")
+        self._blob = take(self._offsets[record_count])
+
+    def close(self) -> None:
+        for view in getattr(self, "_views", []):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def _record(self, index: int) -> tuple[str, str, str]:
+        raw = bytes(self._blob[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+        country, org, asn = raw.split(FIELD_SEPARATOR)
+        return country, org, asn
+
+    def find(self, ip: str) -> tuple[str, str, str] | None:
+        address = ipaddress.ip_address(ip)
+        if address.version == 4:
+            value = int(address)
+            index = bisect.bisect_right(self._v4_starts, value) - 1
+            if index < 0 or self._v4_ends[index] < value:
+                return None
+            return self._record(self._v4_records[index])
+
+        value = address.packed
+        index = bisect.bisect_right(self._v6_starts, value) - 1
+        if index < 0 or self._v6_ends[index] < value:
+            return None
+        return self._record(self._v6_records[index])
+
+    def lookup(self, ip: str) -> dict[str, str]:
+        reserved = reserved_result(ip)
+        if reserved is not None:
+            return reserved
+        found = self.find(ip)
+        if found is None:
+            return {"status": "fail", "message": "not in offline database", "query": ip}
+        country, org, asn = found
+        return {
+            "status": "success",
+            "query": ip,
+            "country": country,
+            "regionName": "",
+            "city": "",
+            "isp": org,
+            "org": org,
+            "as": f"{asn} {org}".strip(),
+        }
+
+
+def open_database(path: str | Path) -> OfflineGeoIPDatabase:
+    path = Path(path)
+    if path.suffix == COMPILED_SUFFIX:
+        return OfflineGeoIPDatabase(path)
+
+    # Range files are compiled once into the mmap-able layout next to the
+    # source (or under the data dir if that is read-only) and reused until
+    # the source changes.
+    candidates = [
+        path.with_name(path.name + COMPILED_SUFFIX),
+        data_dir() / "geoip" / (path.name + COMPILED_SUFFIX),
+    ]
+    for compiled in candidates:
+        if compiled.exists() and compiled.stat().st_mtime >= path.stat().st_mtime:
+            try:
+                return OfflineGeoIPDatabase(compiled)
+            except ValueError:
+                pass
+    for compiled in candidates:
+        try:
+            return OfflineGeoIPDatabase(compile_database(path, compiled))
+        except OSError:
+            continue
+    raise OSError(f"Could not compile {path}")
@@ -1,15 +1,74 @@
 from __future__ import annotations
 
 import ipaddress
-import queue
+import os
 import threading
+import time
 import tkinter as tk
+from collections import deque
+from collections.abc import Callable
 from tkinter import filedialog, messagebox, ttk
 
-from .ip_lookup import lookup_ip_details
-from .models import DeviceRecord
-from .networking import get_arp_devices, get_default_gateway
-from .script_runner import run_script
+from .device_store import DeviceStore
+from .device_view import VirtualDeviceTree
+from .discovery import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, sweep_subnet
+from .enrichment import lookup_vendor, resolve_names
+from .geoip_offline import OfflineGeoIPDatabase, open_database
+from .inventory import DEFAULT_STALE_DAYS, DeviceInventory, get_default_inventory
+from .ip_lookup import export_results, lookup_ip_batch, lookup_ip_details, parse_ip_list, read_ip_file
+from .latency import DEFAULT_INTERVAL as DEFAULT_LATENCY_INTERVAL
+from .latency import HISTOGRAM_LABELS, LatencyMonitor
+from .latency import METHODS as LATENCY_METHODS
+from .log_pump import LogPump, excess_lines
+from .models import DeviceDiff, DeviceRecord, InventoryDevice, ScriptJob, ScriptResult, ServiceRecord
+from .networking import get_arp_devices, get_default_gateway, get_local_network
+from .port_scan import COMMON_PORTS, parse_ports, scan_ports
+from .run_history import REGRESSION_FACTOR, RunHistory, get_default_history
+from .script_executor import (
+    DEFAULT_WORKERS,
+    STATUS_PENDING,
+    STATUS_RUNNING,
+    STATUS_WAITING,
+    ScriptQueueExecutor,
+)
+from .warm_pool import WarmPythonPool
+from .watch import DEFAULT_WATCH_INTERVAL, diff_devices, mac_change_note
+
+
+ONLINE_BACKEND = "ip-api.com (online)"
+OFFLINE_BACKEND = "Offline database"
+DEFAULT_LOG_SCROLLBACK = 5000
+QUEUE_COLUMNS = ("script", "status", "last", "p95", "memory")
+LATENCY_COLUMNS = ("target", "label", "sent", "loss", "last", "min", "avg", "p95", "jitter", "histogram")
+LATENCY_REFRESH_MS = 500
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+MAC_CHANGE_LOG_SIZE = 1000
+
+
+def _format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+
+def _format_rtt(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def _sparkline(counts: tuple[int, ...]) -> str:
+    peak = max(counts, default=0)
+    if not peak:
+        return ""
+    return "".join(
+        SPARK_BLOCKS[min(len(SPARK_BLOCKS) - 1, count * len(SPARK_BLOCKS) // peak)] if count else " "
+        for count in counts
+    )
+
+
+def _format_bytes(count: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
 
 
 class NetworkUtilityApp(tk.Tk):
@@ -19,10 +78,33 @@ class NetworkUtilityApp(tk.Tk):
         self.geometry("980x680")
 
         self.script_queue: list[str] = []
-        self.log_queue: queue.Queue[str] = queue.Queue()
+        self.script_jobs: dict[str, ScriptJob] = {}
+        self._queue_rows: dict[str, str] = {}
+        self._script_executor: ScriptQueueExecutor | None = None
+        self._python_pool: WarmPythonPool | None = None
+        self.run_history: RunHistory = get_default_history()
+        self.log_pump = LogPump()
+        self.log_queue = self.log_pump.queue
+        self.devices = DeviceStore()
+        self._services: dict[str, dict[int, ServiceRecord]] = {}
+        self._row_tags: dict[str, str] = {}
+        self._departed_ips: set[str] = set()
+        self.mac_change_log: deque[tuple[str, str, str, str]] = deque(maxlen=MAC_CHANGE_LOG_SIZE)
+        self.inventory: DeviceInventory = get_default_inventory()
+        self._scan_running = False
+        self._watch_job: str | None = None
+        self._sweep_stop: threading.Event | None = None
+        self._port_scan_stop: threading.Event | None = None
+        self.lookup_results: list[dict[str, str]] = []
+        self._bulk_lookup_stop: threading.Event | None = None
+        self.geoip_db: OfflineGeoIPDatabase | None = None
+        self.latency_monitor: LatencyMonitor | None = None
+        self._latency_targets: dict[str, str] = {}
+        self._latency_rows: dict[str, str] = {}
+        self._latency_job: str | None = None
 
         self._build_ui()
-        self.after(200, self._pump_logs)
+        self.after(self.log_pump.poll_ms, self._pump_logs)
 
     def _build_ui(self) -> None:
         notebook = ttk.Notebook(self)
@@ -30,16 +112,19 @@ class NetworkUtilityApp(tk.Tk):
 
         self.overview_tab = ttk.Frame(notebook)
         self.network_tab = ttk.Frame(notebook)
+        self.latency_tab = ttk.Frame(notebook)
         self.lookup_tab = ttk.Frame(notebook)
         self.scripts_tab = ttk.Frame(notebook)
 
         notebook.add(self.overview_tab, text="Overview")
         notebook.add(self.network_tab, text="Network Mapper")
+        notebook.add(self.latency_tab, text="Latency Monitor")
         notebook.add(self.lookup_tab, text="IP Lookup")
         notebook.add(self.scripts_tab, text="Script Queue")
 
         self._build_overview_tab()
         self._build_network_tab()
+        self._build_latency_tab()
         self._build_lookup_tab()
         self._build_scripts_tab()
 
@@ -52,9 +137,10 @@ class NetworkUtilityApp(tk.Tk):
 
         overview = (
             "This app helps inspect your local network and run utility scripts.\n\n"
-            "• Network Mapper: finds default gateway and ARP-discovered devices.\n"
-            "• IP Lookup: fetches country and organization information for public IPs.\n"
-            "• Script Queue: add .py, .bat/.cmd, and .bash/.sh scripts and run in sequence."
+            "• Network Mapper: finds the gateway and ARP-discovered devices, or sweeps the subnet.\n"
+            "• Latency Monitor: tracks RTT, jitter and loss to the gateway and chosen devices.\n"
+            "• IP Lookup: fetches country and organization information for public IPs, singly or in bulk.\n"
+            "• Script Queue: add .py, .bat/.cmd, and .bash/.sh scripts and run them in parallel."
         )
         ttk.Label(
             self.overview_tab,
@@ -74,30 +160,160 @@ class NetworkUtilityApp(tk.Tk):
             command=self.start_network_scan,
         ).pack(side=tk.LEFT)
 
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Watch every", variable=self.watch_var, command=self.toggle_watch).pack(
+            side=tk.LEFT, padx=(10, 4)
+        )
+        self.watch_interval_var = tk.IntVar(value=DEFAULT_WATCH_INTERVAL)
+        ttk.Spinbox(top, from_=5, to=3600, width=5, textvariable=self.watch_interval_var).pack(side=tk.LEFT)
+        ttk.Label(top, text="s").pack(side=tk.LEFT, padx=(2, 0))
+
+        ttk.Button(top, text="Active Sweep", command=self.start_active_sweep).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(top, text="Stop", command=self.stop_active_sweep).pack(side=tk.LEFT, padx=(6, 0))
+
+        ttk.Label(top, text="Concurrency:").pack(side=tk.LEFT, padx=(14, 4))
+        self.sweep_concurrency_var = tk.IntVar(value=DEFAULT_CONCURRENCY)
+        ttk.Spinbox(top, from_=1, to=1024, width=6, textvariable=self.sweep_concurrency_var).pack(
+            side=tk.LEFT
+        )
+
+        ttk.Label(top, text="Timeout (s):").pack(side=tk.LEFT, padx=(10, 4))
+        self.sweep_timeout_var = tk.DoubleVar(value=DEFAULT_TIMEOUT)
+        ttk.Spinbox(
+            top, from_=0.1, to=10.0, increment=0.1, width=5, textvariable=self.sweep_timeout_var
+        ).pack(side=tk.LEFT)
+
+        services = ttk.Frame(self.network_tab)
+        services.pack(fill=tk.X, padx=12, pady=(0, 8))
+
+        ttk.Label(services, text="Ports:").pack(side=tk.LEFT)
+        self.port_spec_entry = ttk.Entry(services, width=40)
+        self.port_spec_entry.insert(0, ",".join(str(port) for port in COMMON_PORTS))
+        self.port_spec_entry.pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Button(services, text="Scan Ports (selected or all)", command=self.start_port_scan).pack(
+            side=tk.LEFT
+        )
+        ttk.Button(services, text="Stop", command=self.stop_port_scan).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(services, text="MAC Change Log", command=self.show_mac_change_log).pack(side=tk.RIGHT)
+        ttk.Button(services, text="Inventory...", command=self.show_inventory).pack(
+            side=tk.RIGHT, padx=(0, 6)
+        )
+
         self.gateway_var = tk.StringVar(value="Gateway: (not scanned)")
-        ttk.Label(top, textvariable=self.gateway_var).pack(side=tk.LEFT, padx=14)
-
-        columns = ("ip", "mac", "note")
-        self.device_tree = ttk.Treeview(self.network_tab, columns=columns, show="headings", height=18)
-        self.device_tree.heading("ip", text="IP Address")
-        self.device_tree.heading("mac", text="MAC Address")
-        self.device_tree.heading("note", text="Info")
-        self.device_tree.column("ip", width=180)
-        self.device_tree.column("mac", width=230)
-        self.device_tree.column("note", width=460)
-        self.device_tree.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+        ttk.Label(self.network_tab, textvariable=self.gateway_var).pack(anchor="w", padx=12, pady=(0, 8))
+
+        self.device_view = VirtualDeviceTree(
+            self.network_tab, self.devices, self._services, self._device_tags
+        )
+        self.device_view.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+
+    def _build_latency_tab(self) -> None:
+        top = ttk.Frame(self.latency_tab)
+        top.pack(fill=tk.X, padx=12, pady=10)
+        ttk.Button(top, text="Start (Gateway + Selected Devices)", command=self.start_latency_monitor).pack(
+            side=tk.LEFT
+        )
+        ttk.Button(top, text="Add Selected Devices", command=self.add_latency_targets).pack(
+            side=tk.LEFT, padx=6
+        )
+        ttk.Button(top, text="Remove Selected", command=self.remove_latency_targets).pack(side=tk.LEFT)
+        ttk.Button(top, text="Stop", command=self.stop_latency_monitor).pack(side=tk.LEFT, padx=6)
+
+        options = ttk.Frame(self.latency_tab)
+        options.pack(fill=tk.X, padx=12, pady=(0, 8))
+        ttk.Label(options, text="Probe:").pack(side=tk.LEFT)
+        self.latency_method_var = tk.StringVar(value=LATENCY_METHODS[0])
+        ttk.Combobox(
+            options, textvariable=self.latency_method_var, values=LATENCY_METHODS, state="readonly", width=6
+        ).pack(side=tk.LEFT, padx=(4, 12))
+        ttk.Label(options, text="Every").pack(side=tk.LEFT)
+        self.latency_interval_var = tk.DoubleVar(value=DEFAULT_LATENCY_INTERVAL)
+        ttk.Spinbox(
+            options,
+            from_=0.2,
+            to=60,
+            increment=0.5,
+            width=5,
+            textvariable=self.latency_interval_var,
+            command=self._apply_latency_interval,
+        ).pack(side=tk.LEFT, padx=4)
+        ttk.Label(options, text="s").pack(side=tk.LEFT)
+        self.latency_status_var = tk.StringVar(value="Not running")
+        ttk.Label(options, textvariable=self.latency_status_var).pack(side=tk.RIGHT)
+
+        self.latency_table = ttk.Treeview(
+            self.latency_tab, columns=LATENCY_COLUMNS, show="headings", height=18
+        )
+        for column, heading, width in (
+            ("target", "Target", 130),
+            ("label", "Name", 150),
+            ("sent", "Sent", 60),
+            ("loss", "Loss", 60),
+            ("last", "Last ms", 70),
+            ("min", "Min ms", 70),
+            ("avg", "Avg ms", 70),
+            ("p95", "p95 ms", 70),
+            ("jitter", "Jitter ms", 70),
+            ("histogram", "RTT histogram", 120),
+        ):
+            self.latency_table.heading(column, text=heading)
+            anchor = "w" if column in {"target", "label"} else "e"
+            self.latency_table.column(column, width=width, anchor=anchor)
+        self.latency_table.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 4))
+        ttk.Label(
+            self.latency_tab,
+            text="Histogram buckets (ms): " + " ".join(HISTOGRAM_LABELS),
+        ).pack(anchor="w", padx=12, pady=(0, 10))
 
     def _build_lookup_tab(self) -> None:
         controls = ttk.Frame(self.lookup_tab)
         controls.pack(fill=tk.X, padx=12, pady=10)
 
-        ttk.Label(controls, text="IP Address:").pack(side=tk.LEFT)
-        self.lookup_entry = ttk.Entry(controls, width=30)
+        ttk.Label(controls, text="IP Address(es):").pack(side=tk.LEFT)
+        self.lookup_entry = ttk.Entry(controls, width=48)
         self.lookup_entry.pack(side=tk.LEFT, padx=8)
         ttk.Button(controls, text="Lookup", command=self.lookup_ip).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Bulk from File...", command=self.lookup_ip_file).pack(side=tk.LEFT, padx=6)
+        ttk.Button(controls, text="Stop", command=self.stop_bulk_lookup).pack(side=tk.LEFT)
+
+        backend = ttk.Frame(self.lookup_tab)
+        backend.pack(fill=tk.X, padx=12, pady=(0, 8))
+        ttk.Label(backend, text="Backend:").pack(side=tk.LEFT)
+        self.lookup_backend_var = tk.StringVar(value=ONLINE_BACKEND)
+        ttk.Combobox(
+            backend,
+            textvariable=self.lookup_backend_var,
+            values=(ONLINE_BACKEND, OFFLINE_BACKEND),
+            state="readonly",
+            width=22,
+        ).pack(side=tk.LEFT, padx=(4, 8))
+        ttk.Button(backend, text="Load Offline Database...", command=self.load_geoip_database).pack(
+            side=tk.LEFT
+        )
+        self.geoip_db_var = tk.StringVar(value="No offline database loaded")
+        ttk.Label(backend, textvariable=self.geoip_db_var).pack(side=tk.LEFT, padx=8)
+
+        exports = ttk.Frame(self.lookup_tab)
+        exports.pack(fill=tk.X, padx=12, pady=(0, 8))
+        ttk.Button(exports, text="Export CSV", command=lambda: self.export_lookup_results(".csv")).pack(
+            side=tk.LEFT
+        )
+        ttk.Button(exports, text="Export JSON", command=lambda: self.export_lookup_results(".json")).pack(
+            side=tk.LEFT, padx=6
+        )
+        self.lookup_status_var = tk.StringVar(value="Enter one address, or several separated by commas.")
+        ttk.Label(exports, textvariable=self.lookup_status_var).pack(side=tk.LEFT, padx=8)
+
+        self.lookup_output = tk.Text(self.lookup_tab, height=7, wrap=tk.WORD)
+        self.lookup_output.pack(fill=tk.X, padx=12, pady=(0, 8))
 
-        self.lookup_output = tk.Text(self.lookup_tab, height=28, wrap=tk.WORD)
-        self.lookup_output.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
+        columns = ("query", "status", "country", "region", "city", "isp", "org", "as")
+        headings = ("IP", "Status", "Country", "Region", "City", "ISP", "Organization", "ASN")
+        self.lookup_table = ttk.Treeview(self.lookup_tab, columns=columns, show="headings", height=14)
+        for column, heading in zip(columns, headings):
+            self.lookup_table.heading(column, text=heading)
+            self.lookup_table.column(column, width=150 if column in {"isp", "org", "as"} else 95)
+        self.lookup_table.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
 
     def _build_scripts_tab(self) -> None:
         controls = ttk.Frame(self.scripts_tab)
@@ -107,63 +323,629 @@ class NetworkUtilityApp(tk.Tk):
         ttk.Button(controls, text="Remove Selected", command=self.remove_script).pack(side=tk.LEFT, padx=6)
         ttk.Button(controls, text="Run Selected", command=self.run_selected_script).pack(side=tk.LEFT, padx=6)
         ttk.Button(controls, text="Run Queue", command=self.run_all_scripts).pack(side=tk.LEFT, padx=6)
+        ttk.Button(controls, text="Cancel Selected", command=self.cancel_selected_scripts).pack(
+            side=tk.LEFT, padx=6
+        )
+        ttk.Button(controls, text="Stop All", command=self.stop_all_scripts).pack(side=tk.LEFT, padx=6)
+
+        options = ttk.Frame(self.scripts_tab)
+        options.pack(fill=tk.X, padx=12, pady=(0, 10))
+        ttk.Label(options, text="Workers:").pack(side=tk.LEFT)
+        self.script_workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        ttk.Spinbox(options, from_=1, to=64, width=4, textvariable=self.script_workers_var).pack(
+            side=tk.LEFT, padx=(4, 12)
+        )
+        ttk.Button(options, text="Dependencies / Timeout...", command=self.edit_script_options).pack(
+            side=tk.LEFT
+        )
+        self.warm_python_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options,
+            text="Warm Python workers",
+            variable=self.warm_python_var,
+            state=tk.NORMAL if WarmPythonPool.is_supported() else tk.DISABLED,
+        ).pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Label(options, text="Log scrollback (lines):").pack(side=tk.LEFT, padx=(12, 0))
+        self.log_scrollback_var = tk.IntVar(value=DEFAULT_LOG_SCROLLBACK)
+        ttk.Spinbox(
+            options, from_=100, to=1_000_000, increment=1000, width=8, textvariable=self.log_scrollback_var
+        ).pack(side=tk.LEFT, padx=4)
+        ttk.Button(options, text="Clear Log", command=lambda: self.script_log.delete("1.0", tk.END)).pack(
+            side=tk.LEFT, padx=6
+        )
+        ttk.Button(options, text="Regressions...", command=self.show_run_regressions).pack(side=tk.LEFT)
 
         body = ttk.Frame(self.scripts_tab)
         body.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
 
-        self.queue_list = tk.Listbox(body, height=12)
+        self.queue_list = ttk.Treeview(body, columns=QUEUE_COLUMNS, show="headings", height=12)
+        for column, heading, width in (
+            ("script", "Script", 260),
+            ("status", "Status", 130),
+            ("last", "Last", 70),
+            ("p95", "p95", 70),
+            ("memory", "Peak Mem", 80),
+        ):
+            self.queue_list.heading(column, text=heading)
+            self.queue_list.column(column, width=width, anchor="w" if column in {"script", "status"} else "e")
         self.queue_list.pack(side=tk.LEFT, fill=tk.Y)
 
-        self.script_log = tk.Text(body, wrap=tk.WORD)
+        self.script_log = tk.Text(body, wrap=tk.WORD, undo=False)
+        log_scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.script_log.yview)
+        self.script_log.configure(yscrollcommand=log_scroll.set)
         self.script_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(12, 0))
+        log_scroll.pack(side=tk.LEFT, fill=tk.Y)
 
-    def _pump_logs(self) -> None:
+    def _log_scrollback(self) -> int:
         try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.script_log.insert(tk.END, msg + "\n")
-                self.script_log.see(tk.END)
-        except queue.Empty:
-            pass
-        self.after(200, self._pump_logs)
+            return max(100, int(self.log_scrollback_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_LOG_SCROLLBACK
+
+    def _pump_logs(self) -> None:
+        # Everything drained this tick goes into the widget as one insert.
+        scrollback = self._log_scrollback()
+        batch = self.log_pump.drain(scrollback)
+        if batch:
+            log = self.script_log
+            # Only follow the output while the view is already at the bottom,
+            # so scrolling up to read something is not yanked away.
+            follow = log.yview()[1] >= 0.999
+            log.insert(tk.END, "\n".join(batch) + "\n")
+            excess = excess_lines(int(log.index("end-1c").split(".")[0]) - 1, scrollback)
+            if excess:
+                log.delete("1.0", f"{excess + 1}.0")
+            if follow:
+                log.see(tk.END)
+        self.after(self.log_pump.poll_ms, self._pump_logs)
+
+    def _clear_devices(self) -> None:
+        self.devices.clear()
+        self._services.clear()
+        self._row_tags.clear()
+        self._departed_ips.clear()
+        self.device_view.clear()
+
+    def _device_tags(self, ip: str) -> tuple[str, ...]:
+        tag = self._row_tags.get(ip)
+        return (tag,) if tag else ()
+
+    def _upsert_device_row(self, device: DeviceRecord, tag: str | None = None) -> None:
+        # Rows live in the DeviceStore; the view only draws what is on screen.
+        self.devices[device.ip] = device
+        self._departed_ips.discard(device.ip)
+        if tag is not None:
+            self._row_tags[device.ip] = tag
+        elif self._row_tags.get(device.ip) == "left":
+            del self._row_tags[device.ip]
+        self.device_view.refresh()
+
+    def _remove_device_row(self, ip: str) -> None:
+        self.devices.pop(ip, None)
+        self._services.pop(ip, None)
+        self._row_tags.pop(ip, None)
+        self.device_view.refresh()
+
+    def _live_device_count(self) -> int:
+        return len(self.devices) - len(self._departed_ips)
 
     def start_network_scan(self) -> None:
-        for row in self.device_tree.get_children():
-            self.device_tree.delete(row)
+        if self._scan_running:
+            return
+        self._scan_running = True
         self.gateway_var.set("Gateway: scanning...")
 
         def worker() -> None:
             try:
                 gateway = get_default_gateway()
                 devices = get_arp_devices()
+                for device in devices:
+                    device.vendor = lookup_vendor(device.mac)
                 self.after(0, self._display_network_results, gateway, devices)
             except Exception as exc:  # noqa: BLE001
-                self.after(0, lambda: messagebox.showerror("Scan Error", str(exc)))
+                self.after(0, self._fail_network_scan, str(exc))
 
         threading.Thread(target=worker, daemon=True).start()
 
+    def _fail_network_scan(self, message: str) -> None:
+        self._scan_running = False
+        self.gateway_var.set("Gateway: scan failed")
+        if self.watch_var.get():
+            self._schedule_watch()
+        else:
+            messagebox.showerror("Scan Error", message)
+
     def _display_network_results(self, gateway: str, devices: list[DeviceRecord]) -> None:
-        self.gateway_var.set(f"Gateway: {gateway or 'not found'}")
-        if not devices:
-            self.device_tree.insert("", tk.END, values=("-", "-", "No ARP devices found"))
+        self._scan_running = False
+        for device in devices:
+            if gateway and device.ip == gateway:
+                device.note = "Default Gateway"
+
+        # Rows that departed last tick stay on screen (greyed) until now.
+        for ip in self._departed_ips:
+            self._remove_device_row(ip)
+        self._departed_ips = set()
+
+        diff = diff_devices(self.devices, devices)
+        self._apply_device_diff(diff, highlight=bool(self.devices))
+
+        summary = f"Gateway: {gateway or 'not found'} | {self._live_device_count()} device(s)"
+        if not self._live_device_count():
+            summary += " | No ARP devices found"
+        elif diff:
+            summary += (
+                f" | +{len(diff.joined)} joined, -{len(diff.left)} left, {len(diff.moved)} moved, "
+                f"{len(diff.mac_changes)} MAC change(s) at {time.strftime('%H:%M:%S')}"
+            )
+        self.gateway_var.set(summary)
+        self._record_inventory(devices)
+        changed = diff.joined + [device for device, _ in diff.mac_changes + diff.moved]
+        self._start_enrichment([device.ip for device in changed])
+        self._schedule_watch()
+
+    def _apply_device_diff(self, diff: DeviceDiff, highlight: bool) -> None:
+        # Only devices touched by this tick are written back to the store;
+        # highlights from the previous tick are simply dropped.
+        self._row_tags.clear()
+        for device in diff.joined:
+            self._upsert_device_row(device, tag="joined" if highlight else None)
+
+        changed_macs = {device.ip: old_mac for device, old_mac in diff.mac_changes}
+        for device in diff.updated:
+            old_mac = changed_macs.get(device.ip)
+            if old_mac is None:
+                self._upsert_device_row(device)
+                continue
+            device.note = mac_change_note(old_mac)
+            self.mac_change_log.append((time.strftime("%Y-%m-%d %H:%M:%S"), device.ip, old_mac, device.mac))
+            self._upsert_device_row(device, tag="mac_changed")
+
+        for device, old_ip in diff.moved:
+            self._remove_device_row(old_ip)
+            self._upsert_device_row(device, tag="moved" if highlight else None)
+
+        for device in diff.left:
+            self._row_tags[device.ip] = "left"
+            self._departed_ips.add(device.ip)
+        self.device_view.refresh()
+
+    def toggle_watch(self) -> None:
+        if self.watch_var.get():
+            self.start_network_scan()
+        elif self._watch_job is not None:
+            self.after_cancel(self._watch_job)
+            self._watch_job = None
+
+    def _schedule_watch(self) -> None:
+        if self._watch_job is not None:
+            self.after_cancel(self._watch_job)
+            self._watch_job = None
+        if not self.watch_var.get():
+            return
+        try:
+            interval = max(5, int(self.watch_interval_var.get()))
+        except (tk.TclError, ValueError):
+            interval = DEFAULT_WATCH_INTERVAL
+        self._watch_job = self.after(interval * 1000, self._watch_tick)
+
+    def _watch_tick(self) -> None:
+        self._watch_job = None
+        if self.watch_var.get():
+            self.start_network_scan()
+
+    def show_mac_change_log(self) -> None:
+        if not self.mac_change_log:
+            messagebox.showinfo("MAC Change Log", "No MAC address changes recorded.")
             return
+        lines = [
+            f"{stamp}  {ip}: {old_mac} -> {new_mac}"
+            for stamp, ip, old_mac, new_mac in list(self.mac_change_log)[-50:]
+        ]
+        messagebox.showwarning("MAC Change Log", "Possible spoofing:\n\n" + "\n".join(lines))
+
+    def _record_inventory(self, devices: list[DeviceRecord]) -> None:
+        if devices and self.inventory.available:
+            threading.Thread(target=self.inventory.ingest, args=(devices,), daemon=True).start()
+
+    def show_inventory(self) -> None:
+        if not self.inventory.available:
+            messagebox.showwarning("Inventory", "The device inventory database could not be opened.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Device Inventory")
+        dialog.transient(self)
+        dialog.geometry("860x460")
+
+        controls = ttk.Frame(dialog)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 4))
+        ttk.Button(controls, text="All Devices", command=lambda: show_devices(self.inventory.devices())).pack(
+            side=tk.LEFT
+        )
+        stale_days = tk.IntVar(value=DEFAULT_STALE_DAYS)
+        ttk.Button(controls, text="Not Seen In", command=lambda: show_stale()).pack(
+            side=tk.LEFT, padx=(10, 4)
+        )
+        ttk.Spinbox(controls, from_=0, to=3650, width=5, textvariable=stale_days).pack(side=tk.LEFT)
+        ttk.Label(controls, text="days").pack(side=tk.LEFT, padx=(2, 0))
+
+        ttk.Label(controls, text="MAC or IP:").pack(side=tk.LEFT, padx=(14, 4))
+        query = ttk.Entry(controls, width=22)
+        query.pack(side=tk.LEFT)
+        ttk.Button(controls, text="History", command=lambda: show_history(query.get().strip())).pack(
+            side=tk.LEFT, padx=(6, 0)
+        )
+        ttk.Button(controls, text="MAC Changes", command=lambda: show_changes(query.get().strip())).pack(
+            side=tk.LEFT, padx=(6, 0)
+        )
+
+        status = tk.StringVar()
+        ttk.Label(dialog, textvariable=status).pack(anchor="w", padx=10)
+        table = ttk.Treeview(dialog, show="headings")
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(4, 10))
+
+        def stamp(seconds: float) -> str:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
+        def fill(columns: tuple[tuple[str, int], ...], rows: list[tuple]) -> None:
+            table.delete(*table.get_children())
+            table.configure(columns=[heading for heading, _ in columns])
+            for heading, width in columns:
+                table.heading(heading, text=heading)
+                table.column(heading, width=width)
+            for values in rows:
+                table.insert("", tk.END, values=values)
+
+        def show_devices(devices: list[InventoryDevice]) -> None:
+            fill(
+                (("IP", 120), ("MAC", 130), ("Hostname", 150), ("Vendor", 140),
+                 ("First Seen", 140), ("Last Seen", 140), ("Seen", 50)),
+                [
+                    (item.ip, item.mac, item.hostname, item.vendor,
+                     stamp(item.first_seen), stamp(item.last_seen), item.seen_count)
+                    for item in devices
+                ],
+            )
+            status.set(f"{len(devices)} device(s); {self.inventory.scan_count()} scan(s) recorded")
+
+        def show_stale() -> None:
+            try:
+                days = max(0, int(stale_days.get()))
+            except (tk.TclError, ValueError):
+                days = DEFAULT_STALE_DAYS
+            show_devices(self.inventory.not_seen_for(days))
+
+        def show_history(text: str) -> None:
+            if not text:
+                return
+            try:
+                ipaddress.ip_address(text)
+            except ValueError:
+                bindings = self.inventory.ips_for_mac(text)
+                subject = f"IPs held by {text}"
+            else:
+                bindings = self.inventory.macs_for_ip(text)
+                subject = f"MACs seen at {text}"
+            fill(
+                (("IP", 140), ("MAC", 150), ("First Seen", 150), ("Last Seen", 150), ("Seen", 60)),
+                [
+                    (item.ip, item.mac, stamp(item.first_seen), stamp(item.last_seen), item.seen_count)
+                    for item in bindings
+                ],
+            )
+            status.set(f"{subject}: {len(bindings)}")
+
+        def show_changes(text: str) -> None:
+            changes = self.inventory.mac_changes(text or None)
+            fill(
+                (("When", 150), ("IP", 140), ("Old MAC", 150), ("New MAC", 150)),
+                [(stamp(item.seen_at), item.ip, item.old_mac, item.new_mac) for item in changes],
+            )
+            status.set(f"{len(changes)} MAC change(s)" + (f" at {text}" if text else ""))
+
+        show_devices(self.inventory.devices())
+
+    def start_active_sweep(self) -> None:
+        if self._sweep_stop is not None:
+            messagebox.showinfo("Sweep Running", "An active sweep is already in progress.")
+            return
+        try:
+            concurrency = max(1, int(self.sweep_concurrency_var.get()))
+            timeout = max(0.05, float(self.sweep_timeout_var.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Invalid Settings", "Concurrency and timeout must be numbers.")
+            return
+
+        self._clear_devices()
+        self.gateway_var.set("Gateway: resolving subnet...")
+        stop_event = threading.Event()
+        self._sweep_stop = stop_event
+
+        def worker() -> None:
+            try:
+                gateway = get_default_gateway()
+                network = get_local_network(gateway)
+                if network is None:
+                    self.after(0, self._finish_active_sweep, gateway, None, [], 0)
+                    return
+                status = f"Gateway: {gateway or 'not found'} | Sweeping {network}..."
+                self.after(0, self.gateway_var.set, status)
+
+                def on_host(device: DeviceRecord) -> None:
+                    if gateway and device.ip == gateway:
+                        device.note = "Default Gateway"
+                    self.after(0, self._upsert_device_row, device)
+
+                found = sweep_subnet(
+                    network,
+                    on_host,
+                    concurrency=concurrency,
+                    timeout=timeout,
+                    stop_event=stop_event,
+                )
+                # The probes above populated the ARP cache, so it now also knows
+                # MACs for live hosts and for ones that ignored every TCP port.
+                devices = [
+                    device for device in get_arp_devices() if ipaddress.ip_address(device.ip) in network
+                ]
+                for device in devices:
+                    device.vendor = lookup_vendor(device.mac)
+                self.after(0, self._finish_active_sweep, gateway, network, devices, found)
+            except Exception as exc:  # noqa: BLE001
+                self.after(0, self._fail_active_sweep, str(exc))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def stop_active_sweep(self) -> None:
+        if self._sweep_stop is not None:
+            self._sweep_stop.set()
+
+    def _fail_active_sweep(self, message: str) -> None:
+        self._sweep_stop = None
+        self.gateway_var.set("Gateway: sweep failed")
+        messagebox.showerror("Sweep Error", message)
+
+    def _finish_active_sweep(
+        self,
+        gateway: str,
+        network: ipaddress.IPv4Network | None,
+        devices: list[DeviceRecord],
+        found: int,
+    ) -> None:
+        stopped = self._sweep_stop is not None and self._sweep_stop.is_set()
+        self._sweep_stop = None
+        if network is None:
+            self.gateway_var.set(f"Gateway: {gateway or 'not found'} | No local IPv4 subnet to sweep")
+            return
+
+        seen: list[DeviceRecord] = []
         for device in devices:
-            note = "Default Gateway" if gateway and device.ip == gateway else device.note
-            self.device_tree.insert("", tk.END, values=(device.ip, device.mac, note))
+            known = self.devices.get(device.ip)
+            if known is not None:
+                known.mac = device.mac
+                known.vendor = device.vendor
+                device = known
+            elif gateway and device.ip == gateway:
+                device.note = "Default Gateway"
+            else:
+                device.note = "Passive: ARP reply only"
+            self._upsert_device_row(device)
+            seen.append(device)
 
-    def lookup_ip(self) -> None:
-        ip = self.lookup_entry.get().strip()
+        status = "stopped" if stopped else "complete"
+        self.gateway_var.set(
+            f"Gateway: {gateway or 'not found'} | Sweep of {network} {status}: "
+            f"{found} responded, {self._live_device_count()} total"
+        )
+        # Only what this sweep saw; the table also holds rows from earlier
+        # scans and departed hosts, which would otherwise look freshly seen.
+        self._record_inventory(seen)
+        self._start_enrichment([ip for ip, device in self.devices.items() if not device.hostname])
+
+    def _start_enrichment(self, ips: list[str]) -> None:
+        # Rows are already on screen; names fill in as each host answers.
+        if not ips:
+            return
+
+        def on_name(ip: str, hostname: str) -> None:
+            self.after(0, self._apply_hostname, ip, hostname)
+
+        threading.Thread(target=resolve_names, args=(ips, on_name), daemon=True).start()
+
+    def _apply_hostname(self, ip: str, hostname: str) -> None:
+        device = self.devices.get(ip)
+        if device is None or device.hostname == hostname:
+            return
+        device.hostname = hostname
+        self._upsert_device_row(device)
+
+    def start_port_scan(self) -> None:
+        if self._port_scan_stop is not None:
+            messagebox.showinfo("Port Scan Running", "A port scan is already in progress.")
+            return
         try:
-            ipaddress.ip_address(ip)
+            ports = parse_ports(self.port_spec_entry.get())
         except ValueError:
+            messagebox.showwarning("Invalid Ports", "Use a list like 22,80,8000-8100.")
+            return
+
+        hosts = self.device_view.selected_ips() or list(self.devices)
+        if not hosts or not ports:
+            messagebox.showinfo("Nothing to Scan", "Scan for devices first, then choose ports.")
+            return
+
+        stop_event = threading.Event()
+        self._port_scan_stop = stop_event
+        self.gateway_var.set(f"Port scan: {len(hosts)} host(s) x {len(ports)} port(s)...")
+
+        def on_result(record: ServiceRecord) -> None:
+            self.after(0, self._upsert_service_row, record)
+
+        def worker() -> None:
+            try:
+                found = scan_ports(hosts, ports, on_result, stop_event=stop_event)
+                self.after(0, self._finish_port_scan, f"Port scan complete: {found} open port(s)")
+            except Exception as exc:  # noqa: BLE001
+                self.after(0, self._finish_port_scan, f"Port scan failed: {exc}")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def stop_port_scan(self) -> None:
+        if self._port_scan_stop is not None:
+            self._port_scan_stop.set()
+
+    def _finish_port_scan(self, status: str) -> None:
+        self._port_scan_stop = None
+        self.gateway_var.set(status)
+
+    def _upsert_service_row(self, record: ServiceRecord) -> None:
+        if record.ip not in self.devices:
+            return
+        self._services.setdefault(record.ip, {})[record.port] = record
+        self.device_view.refresh()
+
+    def _latency_interval(self) -> float:
+        try:
+            return max(0.2, float(self.latency_interval_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_LATENCY_INTERVAL
+
+    def _apply_latency_interval(self) -> None:
+        if self.latency_monitor is not None:
+            self.latency_monitor.interval = self._latency_interval()
+
+    def _selected_latency_targets(self) -> dict[str, str]:
+        targets = {}
+        for ip in self.device_view.selected_ips():
+            device = self.devices[ip]
+            targets[ip] = device.hostname or device.vendor
+        return targets
+
+    def start_latency_monitor(self) -> None:
+        if self.latency_monitor is not None:
+            self.add_latency_targets()
+            return
+        try:
+            monitor = LatencyMonitor(method=self.latency_method_var.get(), interval=self._latency_interval())
+        except ValueError as exc:
+            messagebox.showerror("Latency Monitor", str(exc))
+            return
+        selected = self._selected_latency_targets()
+        self.latency_status_var.set("Finding gateway...")
+
+        def worker() -> None:
+            try:
+                gateway = get_default_gateway()
+            except Exception:  # noqa: BLE001
+                gateway = ""
+            self.after(0, self._begin_latency_monitor, monitor, gateway, selected)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _begin_latency_monitor(self, monitor: LatencyMonitor, gateway: str, selected: dict[str, str]) -> None:
+        targets = {gateway: "gateway"} if gateway else {}
+        targets.update((ip, label) for ip, label in selected.items() if ip not in targets)
+        if not targets:
+            self.latency_status_var.set("Not running")
+            messagebox.showinfo(
+                "No Targets", "No default gateway was found. Select devices in the Network Mapper first."
+            )
+            return
+        self.latency_table.delete(*self.latency_table.get_children())
+        self._latency_rows.clear()
+        self._latency_targets = targets
+        monitor.set_targets(targets)
+        try:
+            monitor.start()
+        except Exception as exc:  # noqa: BLE001
+            # Nothing is probing, so leave the tab as if it was never started.
+            monitor.stop()
+            self.latency_monitor = None
+            self._latency_targets = {}
+            self.latency_status_var.set("Not running")
+            messagebox.showerror("Latency Monitor", f"Could not start the monitor: {exc}")
+            return
+        self.latency_monitor = monitor
+        self._refresh_latency()
+
+    def add_latency_targets(self) -> None:
+        selected = self._selected_latency_targets()
+        if not selected:
+            messagebox.showinfo("No Selection", "Select devices in the Network Mapper first.")
+            return
+        for ip, label in selected.items():
+            self._latency_targets.setdefault(ip, label)
+        if self.latency_monitor is None:
+            self.start_latency_monitor()
+            return
+        self.latency_monitor.set_targets(self._latency_targets)
+
+    def remove_latency_targets(self) -> None:
+        rows = set(self.latency_table.selection())
+        for ip in [ip for ip, row in self._latency_rows.items() if row in rows]:
+            self.latency_table.delete(self._latency_rows.pop(ip))
+            self._latency_targets.pop(ip, None)
+        if self.latency_monitor is not None:
+            self.latency_monitor.set_targets(self._latency_targets)
+
+    def stop_latency_monitor(self) -> None:
+        if self._latency_job is not None:
+            self.after_cancel(self._latency_job)
+            self._latency_job = None
+        if self.latency_monitor is not None:
+            self.latency_monitor.stop()
+            self.latency_monitor = None
+            self.latency_status_var.set("Stopped")
+
+    def _refresh_latency(self) -> None:
+        # Polled rather than pushed: the monitor only updates its ring
+        # buffers, and the table costs the same however fast it probes.
+        self._latency_job = None
+        monitor = self.latency_monitor
+        if monitor is None:
+            return
+        for summary in monitor.snapshot():
+            values = (
+                summary.ip,
+                summary.label,
+                summary.sent,
+                f"{summary.loss:.0%}",
+                _format_rtt(summary.last),
+                _format_rtt(summary.minimum),
+                _format_rtt(summary.average),
+                _format_rtt(summary.p95),
+                _format_rtt(summary.jitter),
+                _sparkline(summary.histogram),
+            )
+            row = self._latency_rows.get(summary.ip)
+            if row is None:
+                self._latency_rows[summary.ip] = self.latency_table.insert("", tk.END, values=values)
+            else:
+                self.latency_table.item(row, values=values)
+        self.latency_status_var.set(
+            f"Probing {len(self._latency_targets)} target(s) by {monitor.method} every {monitor.interval:g}s"
+        )
+        self._latency_job = self.after(LATENCY_REFRESH_MS, self._refresh_latency)
+
+    def lookup_ip(self) -> None:
+        ips = parse_ip_list(self.lookup_entry.get())
+        if not ips:
             messagebox.showwarning("Invalid IP", "Please enter a valid IPv4/IPv6 address.")
             return
+        if len(ips) > 1:
+            self._start_bulk_lookup(ips)
+            return
+
+        ip = ips[0]
+        lookup = self._lookup_function()
+        if lookup is None:
+            return
 
         self.lookup_output.delete("1.0", tk.END)
         self.lookup_output.insert(tk.END, f"Looking up {ip}...\n")
 
         def worker() -> None:
-            payload = lookup_ip_details(ip)
+            payload = lookup(ip)
             self.after(0, self._render_lookup_result, payload)
 
         threading.Thread(target=worker, daemon=True).start()
@@ -184,6 +966,138 @@ class NetworkUtilityApp(tk.Tk):
         ]
         self.lookup_output.insert(tk.END, "\n".join(lines) + "\n")
 
+    def _lookup_function(self) -> Callable[[str], dict[str, str]] | None:
+        if self.lookup_backend_var.get() != OFFLINE_BACKEND:
+            return lookup_ip_details
+        if self.geoip_db is None:
+            messagebox.showinfo("No Database", "Load an offline IP-range database first.")
+            return None
+        return self.geoip_db.lookup
+
+    def load_geoip_database(self) -> None:
+        path = filedialog.askopenfilename(
+            title="Select an IP-range database",
+            filetypes=[("IP range databases", "*.csv *.tsv *.nugeo"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        self.geoip_db_var.set("Loading offline database...")
+
+        def worker() -> None:
+            try:
+                database = open_database(path)
+            except (OSError, ValueError) as exc:
+                self.after(0, self._set_geoip_database, None, str(exc))
+                return
+            self.after(0, self._set_geoip_database, database, "")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _set_geoip_database(self, database: OfflineGeoIPDatabase | None, error: str) -> None:
+        if database is None:
+            self.geoip_db_var.set("No offline database loaded")
+            messagebox.showerror("Database Error", error)
+            return
+        if self.geoip_db is not None:
+            self.geoip_db.close()
+        self.geoip_db = database
+        self.lookup_backend_var.set(OFFLINE_BACKEND)
+        self.geoip_db_var.set(
+            f"{database.path.name}: {database.v4_count} IPv4 / {database.v6_count} IPv6 ranges"
+        )
+
+    def lookup_ip_file(self) -> None:
+        path = filedialog.askopenfilename(
+            title="Select a file containing IP addresses",
+            filetypes=[("Text and logs", "*.txt *.log *.csv"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            ips = read_ip_file(path)
+        except OSError as exc:
+            messagebox.showerror("Read Error", str(exc))
+            return
+        if not ips:
+            messagebox.showinfo("No Addresses", "No IP addresses were found in that file.")
+            return
+        self._start_bulk_lookup(ips)
+
+    def _start_bulk_lookup(self, ips: list[str]) -> None:
+        if self._bulk_lookup_stop is not None:
+            messagebox.showinfo("Lookup Running", "A bulk lookup is already in progress.")
+            return
+        lookup = self._lookup_function()
+        if lookup is None:
+            return
+
+        for row in self.lookup_table.get_children():
+            self.lookup_table.delete(row)
+        self.lookup_results = []
+        self.lookup_status_var.set(f"Looking up {len(ips)} unique address(es)...")
+        stop_event = threading.Event()
+        self._bulk_lookup_stop = stop_event
+        total = len(ips)
+
+        def on_result(payload: dict[str, str]) -> None:
+            self.after(0, self._add_lookup_row, payload, total)
+
+        def worker() -> None:
+            if lookup is lookup_ip_details:
+                lookup_ip_batch(ips, on_result, stop_event=stop_event)
+            else:
+                for ip in ips:
+                    if stop_event.is_set():
+                        break
+                    on_result(lookup(ip))
+            self.after(0, self._finish_bulk_lookup, total)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def stop_bulk_lookup(self) -> None:
+        if self._bulk_lookup_stop is not None:
+            self._bulk_lookup_stop.set()
+
+    def _add_lookup_row(self, payload: dict[str, str], total: int) -> None:
+        self.lookup_results.append(payload)
+        status = payload.get("status", "fail")
+        values = (
+            payload.get("query", "-"),
+            status if status == "success" else f"fail: {payload.get('message', '')}",
+            payload.get("country", ""),
+            payload.get("regionName", ""),
+            payload.get("city", ""),
+            payload.get("isp", ""),
+            payload.get("org", ""),
+            payload.get("as", ""),
+        )
+        self.lookup_table.insert("", tk.END, values=values)
+        self.lookup_status_var.set(f"Looked up {len(self.lookup_results)}/{total}")
+
+    def _finish_bulk_lookup(self, total: int) -> None:
+        stopped = self._bulk_lookup_stop is not None and self._bulk_lookup_stop.is_set()
+        self._bulk_lookup_stop = None
+        state = "stopped" if stopped else "complete"
+        self.lookup_status_var.set(f"Bulk lookup {state}: {len(self.lookup_results)}/{total} result(s)")
+
+    def export_lookup_results(self, extension: str) -> None:
+        if not self.lookup_results:
+            messagebox.showinfo("Nothing to Export", "Run a bulk lookup first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export lookup results",
+            defaultextension=extension,
+            filetypes=[("CSV", "*.csv")] if extension == ".csv" else [("JSON", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            export_results(self.lookup_results, path)
+        except OSError as exc:
+            messagebox.showerror("Export Error", str(exc))
+            return
+        self.lookup_status_var.set(f"Exported {len(self.lookup_results)} result(s) to {path}")
+
     def add_script(self) -> None:
         files = filedialog.askopenfilenames(
             title="Select scripts",
@@ -192,44 +1106,219 @@ class NetworkUtilityApp(tk.Tk):
         for path in files:
             if path not in self.script_queue:
                 self.script_queue.append(path)
-                self.queue_list.insert(tk.END, path)
+                self.script_jobs[path] = ScriptJob(path=path)
+                self._queue_rows[path] = self.queue_list.insert("", tk.END, values=(path, ""))
+                self._show_script_stats(path)
+
+    def _selected_scripts(self) -> list[str]:
+        selected = set(self.queue_list.selection())
+        return [path for path in self.script_queue if self._queue_rows[path] in selected]
 
     def remove_script(self) -> None:
-        selected = list(self.queue_list.curselection())
-        for idx in reversed(selected):
-            self.queue_list.delete(idx)
-            self.script_queue.pop(idx)
+        if self._script_executor is not None:
+            messagebox.showinfo("Queue Running", "Wait for the queue to finish before removing scripts.")
+            return
+        for path in self._selected_scripts():
+            self.queue_list.delete(self._queue_rows.pop(path))
+            self.script_queue.remove(path)
+            del self.script_jobs[path]
+            for job in self.script_jobs.values():
+                if path in job.depends_on:
+                    job.depends_on.remove(path)
+
+    def edit_script_options(self) -> None:
+        selection = self._selected_scripts()
+        if len(selection) != 1:
+            messagebox.showinfo("Select One Script", "Select exactly one script to edit its options.")
+            return
+        job = self.script_jobs[selection[0]]
+        others = [path for path in self.script_queue if path != job.path]
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Script Options")
+        dialog.transient(self)
+        ttk.Label(dialog, text=f"Runs after (select the scripts {job.path} depends on):").pack(
+            anchor="w", padx=10, pady=(10, 4)
+        )
+        deps_list = tk.Listbox(dialog, selectmode=tk.MULTIPLE, width=80, height=min(12, max(3, len(others))))
+        for index, path in enumerate(others):
+            deps_list.insert(tk.END, path)
+            if path in job.depends_on:
+                deps_list.selection_set(index)
+        deps_list.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        row = ttk.Frame(dialog)
+        row.pack(fill=tk.X, padx=10, pady=8)
+        ttk.Label(row, text="Timeout (seconds, blank for none):").pack(side=tk.LEFT)
+        timeout_entry = ttk.Entry(row, width=8)
+        if job.timeout:
+            timeout_entry.insert(0, f"{job.timeout:g}")
+        timeout_entry.pack(side=tk.LEFT, padx=6)
+
+        def save() -> None:
+            text = timeout_entry.get().strip()
+            try:
+                timeout = float(text) if text else None
+            except ValueError:
+                messagebox.showwarning("Invalid Timeout", "Enter the timeout in seconds.", parent=dialog)
+                return
+            job.depends_on = [others[index] for index in deps_list.curselection()]
+            job.timeout = timeout if timeout and timeout > 0 else None
+            dialog.destroy()
+
+        ttk.Button(row, text="Save", command=save).pack(side=tk.RIGHT)
+        dialog.grab_set()
 
     def run_selected_script(self) -> None:
-        selection = self.queue_list.curselection()
+        selection = self._selected_scripts()
         if not selection:
             messagebox.showinfo("No Selection", "Select a script to run.")
             return
-
-        path = self.script_queue[selection[0]]
-        threading.Thread(target=self._execute_script, args=(path,), daemon=True).start()
+        self._run_scripts(selection)
 
     def run_all_scripts(self) -> None:
         if not self.script_queue:
             messagebox.showinfo("Queue Empty", "Add scripts first.")
             return
+        self._run_scripts(list(self.script_queue))
+
+    def _run_scripts(self, paths: list[str]) -> None:
+        if self._script_executor is not None:
+            messagebox.showinfo("Queue Running", "Scripts are already running.")
+            return
+        try:
+            workers = max(1, int(self.script_workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = DEFAULT_WORKERS
+
+        # Dependencies on scripts outside this run are treated as satisfied.
+        included = set(paths)
+        jobs = [
+            ScriptJob(
+                path=path,
+                depends_on=[dep for dep in self.script_jobs[path].depends_on if dep in included],
+                timeout=self.script_jobs[path].timeout,
+            )
+            for path in paths
+        ]
+        # The fork-server starts on the first warm run and is reused after.
+        if self.warm_python_var.get() and self._python_pool is None:
+            self._python_pool = WarmPythonPool()
+        try:
+            executor = ScriptQueueExecutor(
+                jobs,
+                workers=workers,
+                on_status=lambda path, status: self.after(0, self._set_script_status, path, status),
+                on_finished=self._log_script_result,
+                on_line=self._log_script_line,
+                python_pool=self._python_pool if self.warm_python_var.get() else None,
+                history=self.run_history,
+            )
+        except ValueError as exc:
+            messagebox.showerror("Invalid Dependencies", str(exc))
+            return
+
+        self._script_executor = executor
+        for path in paths:
+            self._set_script_status(path, STATUS_PENDING)
 
         def worker() -> None:
-            for path in self.script_queue:
-                self._execute_script(path)
+            try:
+                executor.run()
+            finally:
+                self.after(0, self._finish_script_run)
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def _execute_script(self, path: str) -> None:
-        self.log_queue.put(f">>> Running: {path}")
-        returncode, stdout, stderr, error = run_script(path)
+    def cancel_selected_scripts(self) -> None:
+        if self._script_executor is None:
+            return
+        for path in self._selected_scripts():
+            if path in self._script_executor.jobs:
+                self._script_executor.cancel(path)
+
+    def stop_all_scripts(self) -> None:
+        if self._script_executor is not None:
+            self._script_executor.cancel()
 
-        if error:
-            self.log_queue.put(f"[error] {error}")
+    def _finish_script_run(self) -> None:
+        self._script_executor = None
+
+    def _set_script_status(self, path: str, status: str) -> None:
+        row = self._queue_rows.get(path)
+        if row is not None:
+            self.queue_list.set(row, "status", status)
+        if status == STATUS_RUNNING:
+            self.log_queue.put(f">>> Running: {path}")
+        elif status not in {STATUS_PENDING, STATUS_WAITING}:
+            self._show_script_stats(path)
+
+    def _show_script_stats(self, path: str) -> None:
+        row = self._queue_rows.get(path)
+        stats = self.run_history.stats(path)
+        if row is None or stats is None:
+            return
+        self.queue_list.set(row, "last", _format_seconds(stats.last_duration))
+        self.queue_list.set(row, "p95", _format_seconds(stats.p95_duration) if stats.runs else "")
+        self.queue_list.set(row, "memory", _format_bytes(stats.last_peak_rss) if stats.last_peak_rss else "")
+
+    def show_run_regressions(self) -> None:
+        regressions = self.run_history.regressions()
+        if not regressions:
+            messagebox.showinfo(
+                "No Regressions", "No recent run was notably slower or larger than its history."
+            )
             return
 
-        if stdout.strip():
-            self.log_queue.put(stdout.strip())
-        if stderr.strip():
-            self.log_queue.put("[stderr] " + stderr.strip())
-        self.log_queue.put(f"<<< Exit code: {returncode}\n")
+        dialog = tk.Toplevel(self)
+        dialog.title("Run Regressions")
+        dialog.transient(self)
+        ttk.Label(
+            dialog,
+            text=f"Recent successful runs at least {REGRESSION_FACTOR:g}x worse than the median before them:",
+        ).pack(anchor="w", padx=10, pady=(10, 4))
+        columns = ("when", "script", "metric", "value", "baseline", "ratio")
+        table = ttk.Treeview(dialog, columns=columns, show="headings", height=min(20, len(regressions)))
+        for column, heading, width in (
+            ("when", "When", 140),
+            ("script", "Script", 300),
+            ("metric", "Metric", 90),
+            ("value", "This Run", 90),
+            ("baseline", "Median", 90),
+            ("ratio", "Ratio", 60),
+        ):
+            table.heading(column, text=heading)
+            table.column(column, width=width)
+        labels = {"duration": "wall time", "cpu": "CPU time", "peak_rss": "peak memory"}
+        for item in regressions:
+            formatter = _format_bytes if item.metric == "peak_rss" else _format_seconds
+            ratio = f"{item.value / item.baseline:.1f}x" if item.baseline else ""
+            table.insert(
+                "",
+                tk.END,
+                values=(
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(item.started)),
+                    item.path,
+                    labels[item.metric],
+                    formatter(item.value),
+                    formatter(item.baseline),
+                    ratio,
+                ),
+            )
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    def _log_script_line(self, job: ScriptJob, stream: str, line: str) -> None:
+        name = os.path.basename(job.path)
+        tag = name if stream == "stdout" else f"{name}:stderr"
+        self.log_queue.put(f"[{tag}] {line}")
+
+    def _log_script_result(self, job: ScriptJob, result: ScriptResult) -> None:
+        name = os.path.basename(job.path)
+        if result.error:
+            self.log_queue.put(f"[{name}:error] {result.error}")
+        if result.returncode is not None:
+            usage = f" in {_format_seconds(result.duration)}"
+            if result.peak_rss:
+                usage += f", peak memory {_format_bytes(result.peak_rss)}"
+            log_note = f" (full output: {result.log_path})" if result.log_path else ""
+            self.log_queue.put(f"<<< {name} exit code: {result.returncode}{usage}{log_note}")
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from .device_store import MAC_UNKNOWN, format_mac, pack_mac
+from .models import AddressBinding, DeviceRecord, InventoryDevice, MacChange
+from .paths import data_dir
+
+DAY = 24 * 3600
+DEFAULT_STALE_DAYS = 7
+DEFAULT_CHANGE_LIMIT = 500
+# Bound on "?" placeholders per IN (...) lookup; SQLite builds before 3.32
+# allow at most 999 parameters per statement.
+LOOKUP_CHUNK = 500
+# Devices without a known MAC are tracked by address under this prefix.
+IP_KEY_PREFIX = "ip:"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS devices ("
+    "key TEXT PRIMARY KEY, ip TEXT NOT NULL, mac TEXT NOT NULL, hostname TEXT NOT NULL, "
+    "vendor TEXT NOT NULL, note TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL, "
+    "seen_count INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS devices_by_ip ON devices (ip)",
+    "CREATE INDEX IF NOT EXISTS devices_by_mac ON devices (mac)",
+    "CREATE INDEX IF NOT EXISTS devices_by_last_seen ON devices (last_seen)",
+    # Every IP/MAC pairing ever seen: "all IPs this MAC has held" and the reverse.
+    "CREATE TABLE IF NOT EXISTS bindings ("
+    "ip TEXT NOT NULL, mac TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL, "
+    "seen_count INTEGER NOT NULL, PRIMARY KEY (ip, mac)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS bindings_by_mac ON bindings (mac, last_seen)",
+    "CREATE INDEX IF NOT EXISTS bindings_by_last_seen ON bindings (last_seen)",
+    # The MAC each IP answered with last, to spot the moment it changes.
+    "CREATE TABLE IF NOT EXISTS addresses ("
+    "ip TEXT PRIMARY KEY, mac TEXT NOT NULL, last_seen REAL NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS mac_changes ("
+    "seen_at REAL NOT NULL, ip TEXT NOT NULL, old_mac TEXT NOT NULL, new_mac TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS mac_changes_by_ip ON mac_changes (ip, seen_at)",
+    "CREATE INDEX IF NOT EXISTS mac_changes_by_time ON mac_changes (seen_at)",
+    "CREATE TABLE IF NOT EXISTS scans ("
+    "id INTEGER PRIMARY KEY, seen_at REAL NOT NULL, devices INTEGER NOT NULL)",
+)
+
+UPSERT_DEVICE = (
+    "INSERT INTO devices (key, ip, mac, hostname, vendor, note, first_seen, last_seen, seen_count) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+    "ip = excluded.ip, mac = excluded.mac, "
+    "hostname = CASE WHEN excluded.hostname != '' THEN excluded.hostname ELSE hostname END, "
+    "vendor = CASE WHEN excluded.vendor != '' THEN excluded.vendor ELSE vendor END, "
+    "note = CASE WHEN excluded.note != '' THEN excluded.note ELSE note END, "
+    "first_seen = MIN(first_seen, excluded.first_seen), last_seen = MAX(last_seen, excluded.last_seen), "
+    "seen_count = seen_count + excluded.seen_count"
+)
+# Moves an IP-keyed row onto its MAC key. What the MAC-keyed device already
+# knows wins; the orphan only fills in what is still empty.
+FOLD_ORPHAN = (
+    "INSERT INTO devices (key, ip, mac, hostname, vendor, note, first_seen, last_seen, seen_count) "
+    "SELECT ?, ip, ?, hostname, vendor, note, first_seen, last_seen, seen_count FROM devices WHERE key = ? "
+    "ON CONFLICT (key) DO UPDATE SET "
+    "hostname = COALESCE(NULLIF(hostname, ''), excluded.hostname), "
+    "vendor = COALESCE(NULLIF(vendor, ''), excluded.vendor), "
+    "note = COALESCE(NULLIF(note, ''), excluded.note), "
+    "first_seen = MIN(first_seen, excluded.first_seen), last_seen = MAX(last_seen, excluded.last_seen), "
+    "seen_count = seen_count + excluded.seen_count"
+)
+UPSERT_BINDING = (
+    "INSERT INTO bindings (ip, mac, first_seen, last_seen, seen_count) VALUES (?, ?, ?, ?, 1) "
+    "ON CONFLICT (ip, mac) DO UPDATE SET "
+    "last_seen = MAX(last_seen, excluded.last_seen), seen_count = seen_count + 1"
+)
+UPSERT_ADDRESS = (
+    "INSERT INTO addresses (ip, mac, last_seen) VALUES (?, ?, ?) "
+    "ON CONFLICT (ip) DO UPDATE SET mac = excluded.mac, last_seen = excluded.last_seen"
+)
+DEVICE_COLUMNS = "ip, mac, hostname, vendor, note, first_seen, last_seen, seen_count"
+
+
+def normalize_mac(mac: str) -> str:
+    """Canonical lowercase colon form, or "" for placeholders and junk."""
+    value = pack_mac(mac)
+    return "" if value >= MAC_UNKNOWN else format_mac(value)
+
+
+def _chunks(items: list[str]) -> Iterable[list[str]]:
+    for start in range(0, len(items), LOOKUP_CHUNK):
+        yield items[start:start + LOOKUP_CHUNK]
+
+
+class DeviceInventory:
+    """Every device sighting, folded into SQLite under the data dir.
+
+    A device is identified by its MAC; ``ingest`` upserts one scan's worth
+    of sightings in a single transaction, keeping first/last seen and a
+    sighting count per device and per IP/MAC pairing, and logging each time
+    an address starts answering with a different MAC.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self._lock = threading.Lock()
+        self._db = self._open(Path(path) if path is not None else data_dir() / "inventory.sqlite3")
+
+    def _open(self, path: Path) -> sqlite3.Connection | None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                db.execute(statement)
+        except (OSError, sqlite3.Error):
+            return None
+        return db
+
+    @property
+    def available(self) -> bool:
+        return self._db is not None
+
+    def ingest(self, devices: Iterable[DeviceRecord], seen_at: float | None = None) -> int:
+        """Record one scan's sightings; returns how many were stored."""
+        if self._db is None:
+            return 0
+        seen_at = time.time() if seen_at is None else seen_at
+        sightings = {device.ip: (device, normalize_mac(device.mac)) for device in devices}
+        if not sightings:
+            return 0
+
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.execute("BEGIN")
+                    self._ingest(sightings, seen_at)
+            except sqlite3.Error:
+                return 0
+        return len(sightings)
+
+    def _ingest(self, sightings: dict[str, tuple[DeviceRecord, str]], seen_at: float) -> None:
+        db = self._db
+        with_mac = [ip for ip, (_, mac) in sightings.items() if mac]
+        previous_macs: dict[str, str] = {}
+        # IP-keyed rows from before the address had a known MAC; they are
+        # folded into the MAC-keyed device instead of lingering as stale.
+        orphans: list[str] = []
+        for chunk in _chunks(with_mac):
+            marks = ",".join("?" * len(chunk))
+            previous_macs.update(db.execute(f"SELECT ip, mac FROM addresses WHERE ip IN ({marks})", chunk))
+            keys = [IP_KEY_PREFIX + ip for ip in chunk]
+            orphans += [key for (key,) in db.execute(f"SELECT key FROM devices WHERE key IN ({marks})", keys)]
+        if orphans:
+            macs = [sightings[key[len(IP_KEY_PREFIX):]][1] for key in orphans]
+            db.executemany(FOLD_ORPHAN, [(mac, mac, key) for mac, key in zip(macs, orphans)])
+            db.executemany("DELETE FROM devices WHERE key = ?", [(key,) for key in orphans])
+
+        # One row per device: a MAC answering at several IPs in this scan is
+        # still one sighting of it.
+        device_rows: dict[str, tuple] = {}
+        for ip, (device, mac) in sightings.items():
+            key = mac or IP_KEY_PREFIX + ip
+            hostname, vendor, note = device.hostname, device.vendor, device.note
+            earlier = device_rows.get(key)
+            if earlier is not None:
+                hostname, vendor, note = hostname or earlier[3], vendor or earlier[4], note or earlier[5]
+            device_rows[key] = (key, ip, mac, hostname, vendor, note, seen_at, seen_at, 1)
+        db.executemany(UPSERT_DEVICE, device_rows.values())
+
+        db.executemany(UPSERT_BINDING, [(ip, sightings[ip][1], seen_at, seen_at) for ip in with_mac])
+        db.executemany(UPSERT_ADDRESS, [(ip, sightings[ip][1], seen_at) for ip in with_mac])
+        db.executemany(
+            "INSERT INTO mac_changes (seen_at, ip, old_mac, new_mac) VALUES (?, ?, ?, ?)",
+            [
+                (seen_at, ip, previous_macs[ip], sightings[ip][1])
+                for ip in with_mac
+                if previous_macs.get(ip, sightings[ip][1]) != sightings[ip][1]
+            ],
+        )
+        db.execute("INSERT INTO scans (seen_at, devices) VALUES (?, ?)", (seen_at, len(sightings)))
+
+    def _query(self, sql: str, params: tuple | list = ()) -> list[tuple]:
+        if self._db is None:
+            return []
+        with self._lock:
+            try:
+                return self._db.execute(sql, params).fetchall()
+            except sqlite3.Error:
+                return []
+
+    def devices(self, limit: int | None = None) -> list[InventoryDevice]:
+        rows = self._query(
+            f"SELECT {DEVICE_COLUMNS} FROM devices ORDER BY last_seen DESC LIMIT ?",
+            (-1 if limit is None else limit,),
+        )
+        return [InventoryDevice(*row) for row in rows]
+
+    def not_seen_since(self, cutoff: float) -> list[InventoryDevice]:
+        rows = self._query(
+            f"SELECT {DEVICE_COLUMNS} FROM devices WHERE last_seen < ? ORDER BY last_seen DESC", (cutoff,)
+        )
+        return [InventoryDevice(*row) for row in rows]
+
+    def not_seen_for(
+        self, days: float = DEFAULT_STALE_DAYS, now: float | None = None
+    ) -> list[InventoryDevice]:
+        return self.not_seen_since((time.time() if now is None else now) - days * DAY)
+
+    def ips_for_mac(self, mac: str) -> list[AddressBinding]:
+        rows = self._query(
+            "SELECT ip, mac, first_seen, last_seen, seen_count FROM bindings WHERE mac = ? "
+            "ORDER BY last_seen DESC",
+            (normalize_mac(mac),),
+        )
+        return [AddressBinding(*row) for row in rows]
+
+    def macs_for_ip(self, ip: str) -> list[AddressBinding]:
+        rows = self._query(
+            "SELECT ip, mac, first_seen, last_seen, seen_count FROM bindings WHERE ip = ? "
+            "ORDER BY last_seen DESC",
+            (ip,),
+        )
+        return [AddressBinding(*row) for row in rows]
+
+    def mac_changes(self, ip: str | None = None, limit: int = DEFAULT_CHANGE_LIMIT) -> list[MacChange]:
+        if ip is None:
+            sql = "SELECT seen_at, ip, old_mac, new_mac FROM mac_changes ORDER BY seen_at DESC LIMIT ?"
+            params: tuple = (limit,)
+        else:
+            sql = (
+                "SELECT seen_at, ip, old_mac, new_mac FROM mac_changes WHERE ip = ? "
+                "ORDER BY seen_at DESC LIMIT ?"
+            )
+            params = (ip, limit)
+        return [MacChange(*row) for row in self._query(sql, params)]
+
+    def scan_count(self) -> int:
+        rows = self._query("SELECT COUNT(*) FROM scans")
+        return rows[0][0] if rows else 0
+
+
+_default_inventory: DeviceInventory | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_inventory() -> DeviceInventory:
+    global _default_inventory
+    with _default_lock:
+        if _default_inventory is None:
+            _default_inventory = DeviceInventory()
+        return _default_inventory
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+
+from .paths import data_dir
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 15 * 60
+# Seconds; override the TTLs of the shared cache used by the GUI, CLI and daemon.
+TTL_ENV = "NETWORK_UTILITY_CACHE_TTL"
+NEGATIVE_TTL_ENV = "NETWORK_UTILITY_NEGATIVE_TTL"
+DEFAULT_MEMORY_ENTRIES = 4096
+# Stale rows are still served when ip-api is unreachable, so they are only
+# purged once they are well past any useful age.
+STALE_RETENTION = 90 * 24 * 3600
+# ip-api does not report the announced prefix an address belongs to, so
+# results are shared across a fixed /24 or /48 instead: the longest prefixes
+# routed on the public internet, hence never wider than the real network.
+PREFIX_V4 = 24
+PREFIX_V6 = 48
+# Fields that describe the announced network rather than the single address.
+NETWORK_FIELDS = ("status", "country", "regionName", "city", "isp", "org", "as")
+
+
+def reserved_result(ip: str) -> dict[str, str] | None:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return {"status": "fail", "message": "invalid query", "query": ip}
+    if address.is_global:
+        return None
+    message = "private range" if address.is_private else "reserved range"
+    return {"status": "fail", "message": message, "query": ip}
+
+
+class IPLookupCache:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        max_entries: int = DEFAULT_MEMORY_ENTRIES,
+        prefix_v4: int = PREFIX_V4,
+        prefix_v6: int = PREFIX_V6,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.prefix_v4 = prefix_v4
+        self.prefix_v6 = prefix_v6
+        self._clock = clock
+        self._memory: OrderedDict[str, tuple[float, dict[str, str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open(Path(path) if path is not None else data_dir() / "ip_cache.sqlite3")
+
+    def _open(self, path: Path) -> sqlite3.Connection | None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS lookups ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM lookups WHERE expires < ?", (self._clock() - STALE_RETENTION,))
+        except (OSError, sqlite3.Error):
+            # A read-only home directory should cost us persistence, not lookups.
+            return None
+        return db
+
+    def _network_key(self, ip: str) -> str:
+        address = ipaddress.ip_address(ip)
+        prefix = self.prefix_v4 if address.version == 4 else self.prefix_v6
+        return "net:" + str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+    def _read(self, key: str) -> tuple[float, dict[str, str]] | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT expires, payload FROM lookups WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+        except (sqlite3.Error, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: tuple[float, dict[str, str]]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, ip: str, allow_stale: bool = False) -> dict[str, str] | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._read("ip:" + ip)
+            if entry is not None and (allow_stale or entry[0] >= now):
+                return dict(entry[1])
+
+            entry = self._read(self._network_key(ip))
+            if entry is None or (not allow_stale and entry[0] < now):
+                return None
+        payload = dict(entry[1])
+        payload["query"] = ip
+        return payload
+
+    def put_many(self, payloads: list[dict[str, str]]) -> None:
+        now = self._clock()
+        rows: list[tuple[str, str, float]] = []
+        with self._lock:
+            for payload in payloads:
+                ip = payload.get("query", "")
+                if not ip or reserved_result(ip) is not None:
+                    continue
+                success = payload.get("status") == "success"
+                expires = now + (self.ttl if success else self.negative_ttl)
+                entries = [("ip:" + ip, dict(payload))]
+                if success:
+                    network = {name: payload[name] for name in NETWORK_FIELDS if name in payload}
+                    entries.append((self._network_key(ip), network))
+                for key, value in entries:
+                    self._remember(key, (expires, value))
+                    rows.append((key, json.dumps(value), expires))
+
+            if self._db is not None and rows:
+                try:
+                    with self._db:
+                        self._db.execute("BEGIN")
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO lookups (key, payload, expires) VALUES (?, ?, ?)", rows
+                        )
+                except sqlite3.Error:
+                    pass
+
+    def put(self, payload: dict[str, str]) -> None:
+        self.put_many([payload])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM lookups")
+                except sqlite3.Error:
+                    pass
+
+
+def _seconds_from_env(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+_default_cache: IPLookupCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> IPLookupCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = IPLookupCache(
+                ttl=_seconds_from_env(TTL_ENV, DEFAULT_TTL),
+                negative_ttl=_seconds_from_env(NEGATIVE_TTL_ENV, DEFAULT_NEGATIVE_TTL),
+            )
+        return _default_cache
@@ -1,19 +1,212 @@
 from __future__ import annotations
 
+import csv
+import ipaddress
 import json
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.message import Message
 from urllib.error import HTTPError, URLError
-from urllib.request import urlopen
+from urllib.request import Request, urlopen
 
+from .ip_cache import IPLookupCache, get_default_cache, reserved_result
+
+LOOKUP_FIELDS = "status,message,query,country,regionName,city,isp,org,as"
+BATCH_URL = f"http://ip-api.com/batch?fields={LOOKUP_FIELDS}"
+BATCH_SIZE = 100
+DEFAULT_WORKERS = 4
+# A failing batch is retried as a batch; splitting it into single lookups
+# would spend the 45-per-minute single-IP allowance in one go.
+BATCH_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+MAX_RATE_LIMIT_WAITS = 3
+EXPORT_FIELDS = ("query", "status", "message", "country", "regionName", "city", "isp", "org", "as")
+
+IPV4_TOKEN = re.compile(r"(?<![\d.])\d{1,3}(?:\.\d{1,3}){3}(?![\d.])")
+IPV6_TOKEN = re.compile(r"(?<![0-9A-Fa-f:])[0-9A-Fa-f]{0,4}:[0-9A-Fa-f:.]*:[0-9A-Fa-f.]*")
+
+
+def _fetch_ip_details(ip: str) -> dict[str, str]:
+    url = f"http://ip-api.com/json/{ip}?fields={LOOKUP_FIELDS}"
+    with urlopen(url, timeout=10) as response:  # nosec: B310 - controlled endpoint
+        return json.loads(response.read().decode("utf-8"))
+
+
+def lookup_ip_details(ip: str, use_cache: bool = True) -> dict[str, str]:
+    reserved = reserved_result(ip)
+    if reserved is not None:
+        return reserved
+
+    cache = get_default_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(ip)
+        if cached is not None:
+            return cached
 
-def lookup_ip_details(ip: str) -> dict[str, str]:
-    url = (
-        "http://ip-api.com/json/"
-        f"{ip}?fields=status,message,query,country,regionName,city,isp,org,as"
-    )
     try:
-        with urlopen(url, timeout=10) as response:  # nosec: B310 - controlled endpoint
-            payload = json.loads(response.read().decode("utf-8"))
-    except (HTTPError, URLError, TimeoutError, OSError) as exc:
-        return {"status": "fail", "message": str(exc)}
+        payload = _fetch_ip_details(ip)
+    except (HTTPError, URLError, TimeoutError, OSError, ValueError) as exc:
+        return _failed(ip, str(exc), cache)
 
+    payload.setdefault("query", ip)
+    if cache is not None:
+        cache.put(payload)
     return payload
+
+
+def parse_ip_list(text: str) -> list[str]:
+    # Accepts anything from a plain list to raw firewall log lines; every
+    # token that parses as an address is kept once, in first-seen order.
+    found: dict[str, None] = {}
+    for pattern in (IPV4_TOKEN, IPV6_TOKEN):
+        for token in pattern.findall(text):
+            try:
+                found[str(ipaddress.ip_address(token))] = None
+            except ValueError:
+                continue
+    return list(found)
+
+
+def read_ip_file(path: str) -> list[str]:
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        return parse_ip_list(handle.read())
+
+
+def _rate_limit(headers: Message) -> tuple[int | None, int]:
+    # ip-api reports remaining requests in X-Rl and seconds until the
+    # window resets in X-Ttl.
+    try:
+        remaining = int(headers.get("X-Rl", ""))
+    except (TypeError, ValueError):
+        remaining = None
+    try:
+        ttl = int(headers.get("X-Ttl", ""))
+    except (TypeError, ValueError):
+        ttl = 60
+    return remaining, ttl
+
+
+def _post_batch(ips: list[str]) -> tuple[list[dict[str, str]], int | None, int]:
+    body = json.dumps(ips).encode("utf-8")
+    request = Request(BATCH_URL, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    with urlopen(request, timeout=20) as response:  # nosec: B310 - controlled endpoint
+        payload = json.loads(response.read().decode("utf-8"))
+        remaining, ttl = _rate_limit(response.headers)
+    return payload, remaining, ttl
+
+
+def _lookup_concurrently(
+    ips: list[str],
+    on_result: Callable[[dict[str, str]], None],
+    workers: int,
+    use_cache: bool = True,
+) -> None:
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(lookup_ip_details, ip, use_cache) for ip in ips]
+        for future in as_completed(futures):
+            on_result(future.result())
+
+
+def _pause(seconds: float, stop_event: threading.Event | None) -> bool:
+    # Sleeps unless stopped first; True means stop.
+    if stop_event is None:
+        time.sleep(seconds)
+        return False
+    return stop_event.wait(seconds)
+
+
+def _failed(ip: str, message: str, cache: IPLookupCache | None) -> dict[str, str]:
+    stale = cache.get(ip, allow_stale=True) if cache is not None else None
+    return stale or {"status": "fail", "message": message, "query": ip}
+
+
+def lookup_ip_batch(
+    ips: Iterable[str],
+    on_result: Callable[[dict[str, str]], None],
+    *,
+    batch_size: int = BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    stop_event: threading.Event | None = None,
+    use_cache: bool = True,
+) -> int:
+    unique = list(dict.fromkeys(ips))
+    cache = get_default_cache() if use_cache else None
+    misses: list[str] = []
+    for ip in unique:
+        answer = reserved_result(ip) or (cache.get(ip) if cache is not None else None)
+        if answer is None:
+            misses.append(ip)
+        else:
+            on_result(answer)
+
+    # A lone miss goes to the single-IP endpoint (the concurrent fallback
+    # for single lookups); anything more is sent through /batch, whose
+    # 15-per-minute allowance covers 100 addresses per request.
+    if len(misses) <= 1:
+        _lookup_concurrently(misses, on_result, workers, use_cache)
+        return len(unique)
+
+    chunks = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+    index = 0
+    attempts = 0
+    rate_limited = 0
+    while index < len(chunks):
+        if stop_event is not None and stop_event.is_set():
+            break
+        chunk = chunks[index]
+        try:
+            results, remaining, ttl = _post_batch(chunk)
+        except HTTPError as exc:
+            if exc.code == 429:
+                rate_limited += 1
+                if rate_limited > MAX_RATE_LIMIT_WAITS:
+                    # Still limited after waiting out several windows; give
+                    # up on everything left rather than retrying forever.
+                    for pending in chunks[index:]:
+                        for ip in pending:
+                            on_result(_failed(ip, "rate limited by ip-api.com", cache))
+                    break
+                # HTTPError.headers can be None when the response had none.
+                if _pause(_rate_limit(exc.headers or Message())[1] + 1, stop_event):
+                    break
+                continue
+            error = str(exc)
+        except (URLError, TimeoutError, OSError, ValueError) as exc:
+            error = str(exc)
+        else:
+            rate_limited = 0
+            attempts = 0
+            if cache is not None:
+                cache.put_many(results)
+            for result in results:
+                on_result(result)
+            index += 1
+            if remaining == 0 and index < len(chunks) and _pause(ttl + 1, stop_event):
+                break
+            continue
+
+        attempts += 1
+        if attempts < BATCH_ATTEMPTS:
+            if _pause(RETRY_DELAY * attempts, stop_event):
+                break
+            continue
+        for ip in chunk:
+            on_result(_failed(ip, error, cache))
+        attempts = 0
+        index += 1
+    return len(unique)
+
+
+def export_results(results: list[dict[str, str]], path: str) -> None:
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Iterable
+
+from .models import LatencySummary
+
+METHODS = ("auto", "icmp", "tcp")
+DEFAULT_INTERVAL = 1.0
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_WINDOW = 300
+MIN_INTERVAL = 0.1
+# Tried together on the first probe; whichever answers first (an accept or a
+# refusal) is used from then on.
+DEFAULT_TCP_PORTS = (80, 443, 22, 53, 445)
+DEFAULT_CONCURRENCY = 256
+# Upper bucket edges in seconds; one more bucket holds everything slower.
+HISTOGRAM_EDGES = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+HISTOGRAM_LABELS = ("<0.5", "<1", "<2", "<5", "<10", "<20", "<50", "<100", "<200", "<500", "<1000", "1000+")
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP6_ECHO_REQUEST = 128
+ICMP6_ECHO_REPLY = 129
+ICMP_PAYLOAD = b"network-utility!"
+
+
+def icmp_available(ipv6: bool = False) -> bool:
+    # Unprivileged "ping sockets": macOS always, Linux when the user's group
+    # is inside net.ipv4.ping_group_range, Windows never.
+    if ipv6:
+        family, protocol = socket.AF_INET6, socket.IPPROTO_ICMPV6
+    else:
+        family, protocol = socket.AF_INET, socket.IPPROTO_ICMP
+    try:
+        socket.socket(family, socket.SOCK_DGRAM, protocol).close()
+    except OSError:
+        return False
+    return True
+
+
+def resolve_method(method: str) -> str:
+    if method not in METHODS:
+        raise ValueError(f"Unknown probe method: {method}")
+    if method == "auto":
+        return "icmp" if icmp_available() else "tcp"
+    if method == "icmp" and not icmp_available():
+        raise ValueError(
+            "Unprivileged ICMP sockets are not available here "
+            "(on Linux, see net.ipv4.ping_group_range); use TCP instead"
+        )
+    return method
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+async def icmp_probe(ip: str, timeout: float, sequence: int) -> float | None:
+    loop = asyncio.get_running_loop()
+    ipv6 = ":" in ip
+    if ipv6:
+        family, protocol = socket.AF_INET6, socket.IPPROTO_ICMPV6
+        request, reply = ICMP6_ECHO_REQUEST, ICMP6_ECHO_REPLY
+    else:
+        family, protocol = socket.AF_INET, socket.IPPROTO_ICMP
+        request, reply = ICMP_ECHO_REQUEST, ICMP_ECHO_REPLY
+    sequence &= 0xFFFF
+    # Linux replaces the identifier with the socket's own and fills in the
+    # checksum itself; macOS uses both as given.
+    header = struct.pack("!BBHHH", request, 0, 0, os.getpid() & 0xFFFF, sequence)
+    packet = header + ICMP_PAYLOAD
+    if not ipv6:
+        packet = packet[:2] + struct.pack("!H", _checksum(packet)) + packet[4:]
+
+    try:
+        sock = socket.socket(family, socket.SOCK_DGRAM, protocol)
+    except OSError:
+        return None
+    try:
+        sock.setblocking(False)
+        sock.connect((ip, 0))
+        started = time.perf_counter()
+        deadline = started + timeout
+        await loop.sock_sendall(sock, packet)
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024), remaining)
+            if not ipv6 and data and data[0] >> 4 == 4:
+                # macOS hands IPv4 replies over with the IP header attached.
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) >= 8 and data[0] == reply and struct.unpack_from("!H", data, 6)[0] == sequence:
+                return time.perf_counter() - started
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        sock.close()
+
+
+async def _tcp_connect_time(ip: str, port: int, timeout: float) -> float | None:
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout)
+    except ConnectionRefusedError:
+        pass
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        sock.close()
+    return time.perf_counter() - started
+
+
+async def tcp_probe(ip: str, ports: Iterable[int], timeout: float) -> tuple[float | None, int | None]:
+    """Time a TCP handshake (or refusal) to the first of ``ports`` that answers."""
+    tasks = {asyncio.ensure_future(_tcp_connect_time(ip, port, timeout)): port for port in ports}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rtt = task.result()
+                if rtt is not None:
+                    return rtt, tasks[task]
+    finally:
+        for task in pending:
+            task.cancel()
+    return None, None
+
+
+class TargetStats:
+    """Fixed-size RTT ring buffer and lifetime histogram for one target.
+
+    A lost probe is stored as NaN, so loss, min/avg/p95 and jitter all come
+    from the same last ``window`` samples and memory never grows.
+    """
+
+    __slots__ = ("ip", "label", "samples", "position", "filled", "sent", "histogram")
+
+    def __init__(self, ip: str, label: str, window: int) -> None:
+        self.ip = ip
+        self.label = label
+        self.samples = array("d", [math.nan]) * max(1, window)
+        self.position = 0
+        self.filled = 0
+        self.sent = 0
+        self.histogram = array("Q", bytes(8 * (len(HISTOGRAM_EDGES) + 1)))
+
+    def add(self, rtt: float | None) -> None:
+        self.samples[self.position] = math.nan if rtt is None else rtt
+        self.position = (self.position + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+        self.sent += 1
+        if rtt is not None:
+            bucket = 0
+            while bucket < len(HISTOGRAM_EDGES) and rtt >= HISTOGRAM_EDGES[bucket]:
+                bucket += 1
+            self.histogram[bucket] += 1
+
+    def ordered(self) -> list[float]:
+        # Oldest first.
+        size = len(self.samples)
+        start = (self.position - self.filled) % size
+        return [self.samples[(start + index) % size] for index in range(self.filled)]
+
+    def summary(self) -> LatencySummary:
+        summary = LatencySummary(self.ip, self.label, self.sent, histogram=tuple(self.histogram))
+        samples = self.ordered()
+        if not samples:
+            return summary
+        answered = [rtt for rtt in samples if not math.isnan(rtt)]
+        summary.loss = 1 - len(answered) / len(samples)
+        summary.last = None if math.isnan(samples[-1]) else samples[-1]
+        if not answered:
+            return summary
+        ranked = sorted(answered)
+        summary.minimum = ranked[0]
+        summary.average = sum(answered) / len(answered)
+        summary.p95 = ranked[max(0, math.ceil(0.95 * len(ranked)) - 1)]
+        # Mean difference between consecutive answers (RFC 3550's D, unsmoothed).
+        if len(answered) > 1:
+            summary.jitter = sum(abs(b - a) for a, b in zip(answered, answered[1:])) / (len(answered) - 1)
+        return summary
+
+
+class LatencyMonitor:
+    """Probes a changing set of targets on a fixed cadence from a background thread.
+
+    Every target has its own probe loop, staggered across the interval so a
+    hundred targets do not all fire in the same millisecond. ``interval`` and
+    ``timeout`` may be changed while it runs; ``snapshot()`` is safe to call
+    from any thread.
+    """
+
+    def __init__(
+        self,
+        method: str = "auto",
+        interval: float = DEFAULT_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+        window: int = DEFAULT_WINDOW,
+        ports: Iterable[int] = DEFAULT_TCP_PORTS,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        self.method = resolve_method(method)
+        self.interval = max(MIN_INTERVAL, interval)
+        self.timeout = timeout
+        self.window = window
+        self.ports = tuple(ports)
+        self.concurrency = max(1, concurrency)
+        self._targets: dict[str, str] = {}
+        self._stats: dict[str, TargetStats] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._stopped: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_targets(self, targets: dict[str, str]) -> None:
+        """Replace the targets (ip -> label); kept targets keep their history."""
+        with self._lock:
+            self._targets = dict(targets)
+            for ip in list(self._stats):
+                if ip not in self._targets:
+                    del self._stats[ip]
+            for ip, label in self._targets.items():
+                stats = self._stats.get(ip)
+                if stats is None:
+                    self._stats[ip] = TargetStats(ip, label, self.window)
+                else:
+                    stats.label = label
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._sync_tasks)
+            except RuntimeError:
+                # The loop closed in between; start() picks up the targets.
+                pass
+
+    def snapshot(self) -> list[LatencySummary]:
+        with self._lock:
+            return [stats.summary() for stats in self._stats.values()]
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            error, self._error = self._error, None
+            raise error
+
+    def stop(self) -> None:
+        loop, stopped = self._loop, self._stopped
+        if loop is not None and stopped is not None:
+            try:
+                loop.call_soon_threadsafe(stopped.set)
+            except RuntimeError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except BaseException as exc:  # noqa: BLE001
+            if self._ready.is_set():
+                raise
+            # Failed while starting; start() re-raises it in the caller.
+            self._error = exc
+        finally:
+            self._ready.set()
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._stopped = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._sync_tasks()
+            self._ready.set()
+            await self._stopped.wait()
+        finally:
+            self._loop = None
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+
+    def _sync_tasks(self) -> None:
+        with self._lock:
+            wanted = list(self._targets)
+        for ip in list(self._tasks):
+            if ip not in wanted:
+                self._tasks.pop(ip).cancel()
+        new = [ip for ip in wanted if ip not in self._tasks]
+        for index, ip in enumerate(new):
+            offset = self.interval * index / len(new)
+            self._tasks[ip] = asyncio.ensure_future(self._probe_loop(ip, offset))
+
+    async def _probe_loop(self, ip: str, offset: float) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(offset)
+        port: int | None = None
+        sequence = 0
+        next_at = loop.time()
+        while True:
+            async with self._slots:
+                if self.method == "icmp":
+                    rtt = await icmp_probe(ip, self.timeout, sequence)
+                else:
+                    rtt, port = await tcp_probe(ip, (port,) if port else self.ports, self.timeout)
+            sequence += 1
+            with self._lock:
+                stats = self._stats.get(ip)
+                if stats is not None:
+                    stats.add(rtt)
+
+            # Keep the cadence; a probe that overran its slot skips the ones
+            # it missed rather than firing them back to back.
+            next_at += self.interval
+            now = loop.time()
+            if next_at < now:
+                next_at += math.ceil((now - next_at) / self.interval) * self.interval
+            await asyncio.sleep(next_at - now)
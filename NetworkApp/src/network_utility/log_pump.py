@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import queue
+from collections import deque
+
+LOG_POLL_BUSY_MS = 50
+LOG_POLL_IDLE_MS = 400
+# Messages taken off the log queue per tick. A chatty script can outrun any
+# drain loop, so the rest waits for the next tick and Tk gets to run between.
+LOG_DRAIN_LIMIT = 2000
+LOG_POLL_BACKLOG_MS = 1
+
+
+class LogPump:
+    """The Tk-free half of the script log: a thread-safe queue drained in
+    bounded batches on a poll interval that backs off while nothing arrives."""
+
+    def __init__(self, limit: int = LOG_DRAIN_LIMIT) -> None:
+        self.queue: queue.Queue[str] = queue.Queue()
+        self.limit = limit
+        self.poll_ms = LOG_POLL_BUSY_MS
+
+    def drain(self, scrollback: int) -> list[str]:
+        # At most ``limit`` messages per call. Of those, lines that the
+        # scrollback cap would trim anyway are dropped here, before they ever
+        # reach the widget.
+        batch: deque[str] = deque(maxlen=scrollback)
+        backlog = True
+        try:
+            for _ in range(self.limit):
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            backlog = False
+
+        if batch:
+            self.poll_ms = LOG_POLL_BACKLOG_MS if backlog else LOG_POLL_BUSY_MS
+        else:
+            self.poll_ms = min(max(self.poll_ms, LOG_POLL_BUSY_MS) * 2, LOG_POLL_IDLE_MS)
+        return list(batch)
+
+
+def excess_lines(line_count: int, scrollback: int) -> int:
+    """How many of the oldest lines to delete to get back under the cap."""
+    return max(0, line_count - scrollback)
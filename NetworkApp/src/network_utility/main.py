@@ -1,7 +1,8 @@
-from .gui import NetworkUtilityApp
-
-
 def main() -> None:
+    # Imported here so the package (and its headless CLI) never loads tkinter
+    # unless the GUI is actually opened.
+    from .gui import NetworkUtilityApp
+
     app = NetworkUtilityApp()
     app.mainloop()
 
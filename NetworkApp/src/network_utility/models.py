@@ -1,4 +1,17 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+# Script queue statuses; run_history keys its baselines on STATUS_OK.
+STATUS_PENDING = "pending"
+STATUS_WAITING = "waiting on deps"
+STATUS_RUNNING = "running"
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_TIMED_OUT = "timed out"
+STATUS_CANCELLED = "cancelled"
+STATUS_SKIPPED = "skipped (dependency)"
+STATUS_ERROR = "error"
 
 
 @dataclass
@@ -6,3 +19,116 @@ class DeviceRecord:
     ip: str
     mac: str
     note: str = ""
+    hostname: str = ""
+    vendor: str = ""
+
+
+@dataclass
+class ServiceRecord:
+    ip: str
+    port: int
+    state: str
+    banner: str = ""
+    rtt: float = 0.0
+
+
+@dataclass
+class DeviceDiff:
+    joined: list[DeviceRecord] = field(default_factory=list)
+    left: list[DeviceRecord] = field(default_factory=list)
+    updated: list[DeviceRecord] = field(default_factory=list)
+    mac_changes: list[tuple[DeviceRecord, str]] = field(default_factory=list)
+    # (device at its new address, previous address) for MACs that changed IP.
+    moved: list[tuple[DeviceRecord, str]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.joined or self.left or self.updated or self.moved)
+
+
+@dataclass
+class InventoryDevice:
+    # Times are Unix timestamps. A device is one MAC address, or one IP
+    # address for sightings that never had a MAC.
+    ip: str
+    mac: str
+    hostname: str = ""
+    vendor: str = ""
+    note: str = ""
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    seen_count: int = 0
+
+
+@dataclass
+class AddressBinding:
+    ip: str
+    mac: str
+    first_seen: float
+    last_seen: float
+    seen_count: int
+
+
+@dataclass
+class MacChange:
+    seen_at: float
+    ip: str
+    old_mac: str
+    new_mac: str
+
+
+@dataclass
+class LatencySummary:
+    # Times in seconds over the monitor's sample window; None until a probe
+    # has been answered. The histogram counts every answer since the start.
+    ip: str
+    label: str = ""
+    sent: int = 0
+    loss: float = 0.0
+    last: float | None = None
+    minimum: float | None = None
+    average: float | None = None
+    p95: float | None = None
+    jitter: float | None = None
+    histogram: tuple[int, ...] = ()
+
+
+@dataclass
+class ScriptJob:
+    path: str
+    depends_on: list[str] = field(default_factory=list)
+    timeout: float | None = None
+    # Working directory for the script; None keeps this process's own.
+    cwd: str | None = None
+
+
+@dataclass
+class ScriptResult:
+    returncode: int | None
+    stdout: str = ""
+    stderr: str = ""
+    error: str | None = None
+    log_path: str = ""
+    # Wall time in seconds, CPU seconds and peak resident set size in bytes
+    # of the script's own process; zero where the platform cannot tell.
+    duration: float = 0.0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    peak_rss: int = 0
+
+
+@dataclass
+class ScriptStats:
+    path: str
+    runs: int
+    last_duration: float
+    last_peak_rss: int
+    p95_duration: float
+
+
+@dataclass
+class RunRegression:
+    path: str
+    started: float
+    metric: str
+    value: float
+    baseline: float
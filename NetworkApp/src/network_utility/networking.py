@@ -3,58 +3,145 @@ from __future__ import annotations
 import ipaddress
 import os
 import re
+import socket
 import subprocess
+import sys
 
 from .models import DeviceRecord
 
 IP_PATTERN = re.compile(r"(\d+\.\d+\.\d+\.\d+)")
-MAC_PATTERN = re.compile(r"(([0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2})")
+MAC_SEPARATOR = re.compile(r"[:-]")
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+# One pass over the whole `arp -a` text: the first valid IPv4 address on each
+# line plus the first MAC after it. Windows "Interface: <own address>" header
+# lines are skipped, since that address is not a neighbour. macOS drops leading
+# zeros ("0:1a:2b:3:4:5"), so MAC groups may be one digit.
+ARP_ENTRY = re.compile(
+    rf"^(?!Interface:)[^\n]*?(?<![\d.])({_OCTET}(?:\.{_OCTET}){{3}})(?![\d.]*\d)"
+    r"(?:[^\n]*?((?:[0-9a-fA-F]{1,2}[:-]){5}[0-9a-fA-F]{1,2}))?",
+    re.MULTILINE,
+)
+CIDR_PATTERN = re.compile(r"inet (\d+\.\d+\.\d+\.\d+)/(\d+)")
+NETMASK_PATTERN = re.compile(r"inet (\d+\.\d+\.\d+\.\d+) netmask (0x[0-9a-fA-F]{8}|\d+\.\d+\.\d+\.\d+)")
 
+# Sweeping anything wider than a /16 is never what a user on a LAN wants.
+MAX_SWEEP_PREFIX = 16
+FALLBACK_PREFIX = 24
 
-def get_default_gateway() -> str:
+
+def _gateway_command() -> list[str]:
     if os.name == "nt":
-        cmd = ["route", "print", "0.0.0.0"]
-    else:
-        cmd = ["ip", "route"]
+        return ["route", "print", "0.0.0.0"]
+    if sys.platform == "darwin":
+        return ["netstat", "-rn", "-f", "inet"]
+    return ["ip", "route"]
 
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    output = result.stdout + "\n" + result.stderr
 
-    if os.name == "nt":
+def parse_default_gateway(output: str, windows: bool | None = None) -> str:
+    if windows is None:
+        windows = os.name == "nt"
+
+    if windows:
         for line in output.splitlines():
             if line.strip().startswith("0.0.0.0"):
                 parts = line.split()
-                if len(parts) >= 3:
+                # "On-link" in the gateway column is not a gateway.
+                if len(parts) >= 3 and IP_PATTERN.fullmatch(parts[2]):
                     return parts[2]
-    else:
-        for line in output.splitlines():
-            if line.startswith("default"):
-                parts = line.split()
-                if "via" in parts:
-                    return parts[parts.index("via") + 1]
+        return ""
+
+    for line in output.splitlines():
+        if line.startswith("default"):
+            parts = line.split()
+            if "via" in parts:
+                # Linux: "default via 192.168.1.1 dev eth0 ..."
+                return parts[parts.index("via") + 1]
+            if len(parts) >= 2 and IP_PATTERN.fullmatch(parts[1]):
+                # macOS netstat -rn: "default  192.168.1.1  UGScg  en0"
+                return parts[1]
     return ""
 
 
+def get_default_gateway() -> str:
+    result = subprocess.run(_gateway_command(), capture_output=True, text=True, check=False)
+    return parse_default_gateway(result.stdout + "\n" + result.stderr)
+
+
+def _normalize_mac(mac: str) -> str:
+    # Windows prints aa-bb-..., macOS 0:1a:..., Linux aa:bb:...; one spelling
+    # keeps watch-mode diffs from flagging a format change as a new MAC.
+    if len(mac) == 17:
+        return mac.replace("-", ":").lower()
+    return ":".join(part.zfill(2) for part in MAC_SEPARATOR.split(mac)).lower()
+
+
+def parse_arp_output(output: str) -> list[DeviceRecord]:
+    devices: dict[str, DeviceRecord] = {}
+    for match in ARP_ENTRY.finditer(output):
+        ip, mac = match.groups()
+        devices[ip] = DeviceRecord(ip=ip, mac=_normalize_mac(mac) if mac else "(unknown)")
+    return list(devices.values())
+
+
 def get_arp_devices() -> list[DeviceRecord]:
     result = subprocess.run(["arp", "-a"], capture_output=True, text=True, check=False)
-    output = result.stdout + "\n" + result.stderr
+    return parse_arp_output(result.stdout + "\n" + result.stderr)
 
-    devices: list[DeviceRecord] = []
-    for line in output.splitlines():
-        ip_match = IP_PATTERN.search(line)
-        if not ip_match:
-            continue
 
-        ip = ip_match.group(1)
-        mac_match = MAC_PATTERN.search(line)
-        mac = mac_match.group(1) if mac_match else "(unknown)"
+def get_local_ip(gateway: str) -> str:
+    # Connecting a UDP socket sends nothing but makes the OS pick the
+    # interface (and source address) it would route to the gateway through.
+    target = gateway or "192.0.2.1"
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect((target, 9))
+            return sock.getsockname()[0]
+    except OSError:
+        return ""
+
+
+def _interface_prefixes() -> dict[str, int]:
+    if os.name == "nt":
+        cmd = ["ipconfig"]
+    elif sys.platform == "darwin":
+        cmd = ["ifconfig"]
+    else:
+        cmd = ["ip", "-o", "-f", "inet", "addr", "show"]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except OSError:
+        return {}
+    output = result.stdout
+
+    prefixes: dict[str, int] = {}
+    if os.name == "nt":
+        address = ""
+        for line in output.splitlines():
+            if "IPv4" in line:
+                match = IP_PATTERN.search(line)
+                address = match.group(1) if match else ""
+            elif "Subnet Mask" in line and address:
+                match = IP_PATTERN.search(line)
+                if match:
+                    prefixes[address] = ipaddress.IPv4Network(f"0.0.0.0/{match.group(1)}").prefixlen
+                address = ""
+        return prefixes
+
+    for address, prefix in CIDR_PATTERN.findall(output):
+        prefixes[address] = int(prefix)
+    for address, mask in NETMASK_PATTERN.findall(output):
+        if mask.startswith("0x"):
+            mask = str(ipaddress.IPv4Address(int(mask, 16)))
+        prefixes[address] = ipaddress.IPv4Network(f"0.0.0.0/{mask}").prefixlen
+    return prefixes
 
-        try:
-            ipaddress.ip_address(ip)
-        except ValueError:
-            continue
 
-        devices.append(DeviceRecord(ip=ip, mac=mac))
+def get_local_network(gateway: str) -> ipaddress.IPv4Network | None:
+    local_ip = get_local_ip(gateway)
+    if not local_ip or local_ip.startswith("127."):
+        return None
 
-    unique: dict[str, DeviceRecord] = {record.ip: record for record in devices}
-    return list(unique.values())
+    prefix = _interface_prefixes().get(local_ip, FALLBACK_PREFIX)
+    prefix = max(prefix, MAX_SWEEP_PREFIX)
+    return ipaddress.IPv4Network(f"{local_ip}/{prefix}", strict=False)
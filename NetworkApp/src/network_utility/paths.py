@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+HOME_ENV = "NETWORK_UTILITY_HOME"
+
+
+def data_dir() -> Path:
+    # Caches, histories, run logs and the daemon socket all live here.
+    return Path(os.environ.get(HOME_ENV) or Path.home() / ".network_utility")
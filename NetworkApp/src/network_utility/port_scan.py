@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+from collections.abc import Callable, Iterable, Iterator
+
+from .models import ServiceRecord
+
+COMMON_PORTS = (
+    21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 465, 587, 631, 993, 995,
+    1433, 1883, 3306, 3389, 5000, 5432, 5900, 6379, 8000, 8008, 8080, 8443, 8888, 9100,
+)
+
+# Protocols where the server talks first, so a plain read yields the banner.
+BANNER_FIRST_PORTS = {21, 22, 23, 25, 110, 143, 587, 3306, 5900}
+HTTP_PORTS = {80, 5000, 8000, 8008, 8080, 8888}
+
+# Kept under the common 1024 descriptor soft limit; every in-flight probe holds a socket.
+DEFAULT_CONCURRENCY = 512
+DEFAULT_HOST_IN_FLIGHT = 128
+DEFAULT_HOST_RATE = 2000.0
+MIN_TIMEOUT = 0.05
+MAX_TIMEOUT = 1.5
+BANNER_TIMEOUT = 1.0
+BANNER_BYTES = 512
+
+
+def parse_ports(spec: str) -> list[int]:
+    ports: list[int] = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = end = int(part)
+        if not 0 < start <= end <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        ports.extend(range(start, end + 1))
+    return list(dict.fromkeys(ports))
+
+
+class _HostState:
+    # RFC 6298 style smoothed RTT estimate; the connect timeout tracks it so
+    # filtered ports on a fast LAN host cost milliseconds instead of seconds.
+    def __init__(self, in_flight: int, rate: float, min_timeout: float, max_timeout: float) -> None:
+        self.slots = asyncio.Semaphore(in_flight)
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = 0.0
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+    def observe(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+            return
+        self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+        self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    async def acquire(self, loop: asyncio.AbstractEventLoop) -> None:
+        await self.slots.acquire()
+        if not self.interval:
+            return
+        now = loop.time()
+        delay = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _clean_banner(data: bytes, port: int) -> str:
+    text = data.decode("utf-8", errors="replace")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return ""
+    if port in HTTP_PORTS:
+        for line in lines[1:]:
+            if line.lower().startswith("server:"):
+                return f"{lines[0]} | {line}"[:160]
+    return "".join(ch for ch in lines[0] if ch.isprintable())[:160]
+
+
+async def grab_banner(loop: asyncio.AbstractEventLoop, sock: socket.socket, port: int) -> str:
+    if port in HTTP_PORTS:
+        request = b"HEAD / HTTP/1.0\r\n\r\n"
+    elif port in BANNER_FIRST_PORTS:
+        request = b""
+    else:
+        return ""
+    try:
+        if request:
+            await asyncio.wait_for(loop.sock_sendall(sock, request), BANNER_TIMEOUT)
+        data = await asyncio.wait_for(loop.sock_recv(sock, BANNER_BYTES), BANNER_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return ""
+    return _clean_banner(data, port)
+
+
+async def probe_port(
+    loop: asyncio.AbstractEventLoop,
+    ip: str,
+    port: int,
+    host: _HostState,
+    banners: bool,
+) -> ServiceRecord:
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    started = loop.time()
+    try:
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), host.timeout)
+        except ConnectionRefusedError:
+            rtt = loop.time() - started
+            host.observe(rtt)
+            return ServiceRecord(ip=ip, port=port, state="closed", rtt=rtt)
+        except (OSError, asyncio.TimeoutError):
+            return ServiceRecord(ip=ip, port=port, state="filtered")
+
+        rtt = loop.time() - started
+        host.observe(rtt)
+        banner = await grab_banner(loop, sock, port) if banners else ""
+        return ServiceRecord(ip=ip, port=port, state="open", banner=banner, rtt=rtt)
+    finally:
+        sock.close()
+
+
+async def scan_targets(
+    targets: Iterator[tuple[str, int]],
+    on_result: Callable[[ServiceRecord], None],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    host_in_flight: int = DEFAULT_HOST_IN_FLIGHT,
+    host_rate: float = DEFAULT_HOST_RATE,
+    min_timeout: float = MIN_TIMEOUT,
+    max_timeout: float = MAX_TIMEOUT,
+    banners: bool = True,
+    report_closed: bool = False,
+    stop_event: threading.Event | None = None,
+) -> int:
+    loop = asyncio.get_running_loop()
+    hosts: dict[str, _HostState] = {}
+    open_count = 0
+
+    async def worker() -> None:
+        nonlocal open_count
+        for ip, port in targets:
+            if stop_event is not None and stop_event.is_set():
+                return
+            host = hosts.get(ip)
+            if host is None:
+                host = hosts[ip] = _HostState(host_in_flight, host_rate, min_timeout, max_timeout)
+            await host.acquire(loop)
+            try:
+                record = await probe_port(loop, ip, port, host, banners)
+            finally:
+                host.slots.release()
+            if record.state == "open":
+                open_count += 1
+                on_result(record)
+            elif report_closed:
+                on_result(record)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return open_count
+
+
+def scan_ports(
+    hosts: Iterable[str],
+    ports: Iterable[int],
+    on_result: Callable[[ServiceRecord], None],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    host_in_flight: int = DEFAULT_HOST_IN_FLIGHT,
+    host_rate: float = DEFAULT_HOST_RATE,
+    min_timeout: float = MIN_TIMEOUT,
+    max_timeout: float = MAX_TIMEOUT,
+    banners: bool = True,
+    report_closed: bool = False,
+    stop_event: threading.Event | None = None,
+) -> int:
+    hosts = list(dict.fromkeys(hosts))
+    ports = list(ports)
+    # Port-major order spreads consecutive probes across hosts, so the
+    # per-host limits rarely stall the global worker pool.
+    targets = ((ip, port) for port in ports for ip in hosts)
+    return asyncio.run(
+        scan_targets(
+            targets,
+            on_result,
+            concurrency=min(concurrency, max(1, len(hosts) * len(ports))),
+            host_in_flight=host_in_flight,
+            host_rate=host_rate,
+            min_timeout=min_timeout,
+            max_timeout=max_timeout,
+            banners=banners,
+            report_closed=report_closed,
+            stop_event=stop_event,
+        )
+    )
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from .models import STATUS_OK, RunRegression, ScriptResult, ScriptStats
+from .paths import data_dir
+
+DEFAULT_WINDOW = 50
+DEFAULT_RECENT = 5
+DEFAULT_KEEP_RUNS = 500
+REGRESSION_FACTOR = 1.5
+MIN_BASELINE_RUNS = 5
+# Differences below these are noise, whatever the ratio: a 10 ms script
+# taking 20 ms is not a regression anyone needs to hear about.
+NOISE_FLOOR = {"duration": 0.05, "cpu": 0.05, "peak_rss": 4 * 1024 * 1024}
+METRICS = tuple(NOISE_FLOOR)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    # Nearest-rank, so the result is always a duration that really happened.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class RunHistory:
+    """Resource usage of past script runs, kept in SQLite under the data dir.
+
+    Only successful runs feed the p95 and the regression baselines; a
+    cancelled or timed-out run's duration says nothing about the script.
+    """
+
+    def __init__(self, path: str | Path | None = None, keep: int = DEFAULT_KEEP_RUNS) -> None:
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._db = self._open(Path(path) if path is not None else data_dir() / "run_history.sqlite3")
+
+    def _open(self, path: Path) -> sqlite3.Connection | None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY, script TEXT NOT NULL, started REAL NOT NULL, status TEXT NOT NULL, "
+                "returncode INTEGER, duration REAL NOT NULL, cpu_user REAL NOT NULL, "
+                "cpu_system REAL NOT NULL, peak_rss INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS runs_by_script ON runs (script, id)")
+        except (OSError, sqlite3.Error):
+            # Like the lookup cache: no writable home means no history, not no runs.
+            return None
+        return db
+
+    def record(self, path: str, result: ScriptResult, status: str) -> None:
+        if self._db is None:
+            return
+        row = (
+            path, time.time() - result.duration, status, result.returncode,
+            result.duration, result.cpu_user, result.cpu_system, result.peak_rss,
+        )
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.execute("BEGIN")
+                    self._db.execute(
+                        "INSERT INTO runs (script, started, status, returncode, duration, cpu_user, "
+                        "cpu_system, peak_rss) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    self._db.execute(
+                        "DELETE FROM runs WHERE script = ? AND id <= "
+                        "(SELECT id FROM runs WHERE script = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (path, path, self.keep),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        if self._db is None:
+            return []
+        with self._lock:
+            try:
+                return self._db.execute(sql, params).fetchall()
+            except sqlite3.Error:
+                return []
+
+    def scripts(self) -> list[str]:
+        return [row[0] for row in self._query("SELECT DISTINCT script FROM runs ORDER BY script", ())]
+
+    def stats(self, path: str, window: int = DEFAULT_WINDOW) -> ScriptStats | None:
+        last = self._query(
+            "SELECT duration, peak_rss FROM runs WHERE script = ? ORDER BY id DESC LIMIT 1", (path,)
+        )
+        if not last:
+            return None
+        durations = [
+            row[0]
+            for row in self._query(
+                "SELECT duration FROM runs WHERE script = ? AND status = ? ORDER BY id DESC LIMIT ?",
+                (path, STATUS_OK, window),
+            )
+        ]
+        return ScriptStats(path, len(durations), last[0][0], last[0][1], percentile(durations, 0.95))
+
+    def regressions(
+        self,
+        window: int = DEFAULT_WINDOW,
+        recent: int = DEFAULT_RECENT,
+        factor: float = REGRESSION_FACTOR,
+    ) -> list[RunRegression]:
+        """Recent runs of each script that were ``factor`` times worse than
+        the median of the (up to ``window``) successful runs before them."""
+        found: list[RunRegression] = []
+        for path in self.scripts():
+            rows = self._query(
+                "SELECT started, duration, cpu_user + cpu_system, peak_rss FROM runs "
+                "WHERE script = ? AND status = ? ORDER BY id DESC LIMIT ?",
+                (path, STATUS_OK, window + recent),
+            )
+            rows.reverse()
+            for index in range(max(MIN_BASELINE_RUNS, len(rows) - recent), len(rows)):
+                before = rows[max(0, index - window):index]
+                started = rows[index][0]
+                for column, metric in enumerate(METRICS, start=1):
+                    value = rows[index][column]
+                    baseline = statistics.median(row[column] for row in before)
+                    if value > baseline * factor and value - baseline > NOISE_FLOOR[metric]:
+                        found.append(RunRegression(path, started, metric, value, baseline))
+        found.sort(key=lambda item: item.started, reverse=True)
+        return found
+
+
+_default_history: RunHistory | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_history() -> RunHistory:
+    global _default_history
+    with _default_lock:
+        if _default_history is None:
+            _default_history = RunHistory()
+        return _default_history
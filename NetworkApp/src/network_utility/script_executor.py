@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .models import (
+    STATUS_CANCELLED,
+    STATUS_ERROR,
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_PENDING,
+    STATUS_RUNNING,
+    STATUS_SKIPPED,
+    STATUS_TIMED_OUT,
+    STATUS_WAITING,
+    ScriptJob,
+    ScriptResult,
+)
+from .run_history import RunHistory, get_default_history
+from .script_runner import prune_run_logs, run_log_dir, run_script
+from .warm_pool import WarmPythonPool
+
+DEFAULT_WORKERS = 4
+
+
+def order_jobs(jobs: list[ScriptJob]) -> list[str]:
+    paths = {job.path for job in jobs}
+    remaining = {job.path: set(job.depends_on) for job in jobs}
+    for path, deps in remaining.items():
+        unknown = deps - paths
+        if unknown:
+            raise ValueError(f"{path} depends on scripts that are not queued: {', '.join(sorted(unknown))}")
+
+    ordered: list[str] = []
+    ready = deque(job.path for job in jobs if not remaining[job.path])
+    while ready:
+        path = ready.popleft()
+        ordered.append(path)
+        for job in jobs:
+            deps = remaining[job.path]
+            if path in deps:
+                deps.discard(path)
+                if not deps:
+                    ready.append(job.path)
+    if len(ordered) != len(jobs):
+        cyclic = sorted(path for path, deps in remaining.items() if deps)
+        raise ValueError(f"Dependency cycle between: {', '.join(cyclic)}")
+    return ordered
+
+
+class ScriptQueueExecutor:
+    def __init__(
+        self,
+        jobs: list[ScriptJob],
+        workers: int = DEFAULT_WORKERS,
+        on_status: Callable[[str, str], None] | None = None,
+        on_finished: Callable[[ScriptJob, ScriptResult], None] | None = None,
+        on_line: Callable[[ScriptJob, str, str], None] | None = None,
+        log_dir: str | Path | None = None,
+        python_pool: WarmPythonPool | None = None,
+        history: RunHistory | None = None,
+    ) -> None:
+        order_jobs(jobs)
+        self.jobs = {job.path: job for job in jobs}
+        self.workers = max(1, workers)
+        self.on_status = on_status
+        self.on_finished = on_finished
+        self.on_line = on_line
+        self.log_dir = run_log_dir() if log_dir is None else log_dir
+        self.python_pool = python_pool
+        self.history = get_default_history() if history is None else history
+        self.statuses = {job.path: STATUS_PENDING for job in jobs}
+        # Guards statuses: cancel() runs on the caller's thread, run() on another.
+        self._lock = threading.RLock()
+        self._stop_events = {job.path: threading.Event() for job in jobs}
+        self._dependants: dict[str, list[str]] = {job.path: [] for job in jobs}
+        for job in jobs:
+            for dep in job.depends_on:
+                self._dependants[dep].append(job.path)
+
+    def cancel(self, path: str | None = None) -> None:
+        targets = self._stop_events if path is None else {path: self._stop_events[path]}
+        with self._lock:
+            for event in targets.values():
+                event.set()
+            # Jobs that have not started are cancelled right away rather than
+            # when a worker (or their dependencies) would have got to them.
+            queued = [
+                target for target in targets if self.statuses[target] in {STATUS_PENDING, STATUS_WAITING}
+            ]
+            for target in queued:
+                self._set_status(target, STATUS_CANCELLED)
+            for target in queued:
+                self._skip_dependants(target)
+
+    def _set_status(self, path: str, status: str) -> None:
+        with self._lock:
+            self.statuses[path] = status
+        if self.on_status is not None:
+            self.on_status(path, status)
+
+    def _run_job(self, job: ScriptJob) -> str:
+        stop_event = self._stop_events[job.path]
+        on_line = None
+        if self.on_line is not None:
+            callback = self.on_line
+
+            def on_line(stream: str, line: str) -> None:
+                callback(job, stream, line)
+
+        result = run_script(
+            job.path,
+            timeout=job.timeout,
+            stop_event=stop_event,
+            on_line=on_line,
+            log_dir=self.log_dir,
+            python_pool=self.python_pool,
+            cwd=job.cwd,
+        )
+        if stop_event.is_set():
+            status = STATUS_CANCELLED
+        elif result.error:
+            # run_script only reports an error alongside an exit code when it
+            # had to kill the process, which outside a cancel means timeout.
+            status = STATUS_TIMED_OUT if result.returncode is not None else STATUS_ERROR
+        else:
+            status = STATUS_OK if result.returncode == 0 else STATUS_FAILED
+
+        # Recorded before on_finished so listeners already see this run in
+        # the history; runs that never started have nothing to record.
+        if result.returncode is not None:
+            self.history.record(job.path, result, status)
+        if self.on_finished is not None:
+            self.on_finished(job, result)
+        return status
+
+    def _skip_dependants(self, path: str) -> None:
+        with self._lock:
+            pending = list(self._dependants[path])
+            while pending:
+                dependant = pending.pop()
+                if self.statuses[dependant] in {STATUS_PENDING, STATUS_WAITING}:
+                    self._set_status(dependant, STATUS_SKIPPED)
+                    pending.extend(self._dependants[dependant])
+
+    def run(self) -> dict[str, str]:
+        prune_run_logs(self.log_dir)
+        remaining = {path: set(job.depends_on) for path, job in self.jobs.items()}
+        ready: deque[str] = deque()
+        with self._lock:
+            for path, deps in remaining.items():
+                if self.statuses[path] != STATUS_PENDING:
+                    continue
+                if deps:
+                    self._set_status(path, STATUS_WAITING)
+                else:
+                    ready.append(path)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running: dict[Future[str], str] = {}
+            while ready or running:
+                while ready and len(running) < self.workers:
+                    path = ready.popleft()
+                    with self._lock:
+                        if self.statuses[path] not in {STATUS_PENDING, STATUS_WAITING}:
+                            # Cancelled (or skipped) while it sat in the queue.
+                            continue
+                        self._set_status(path, STATUS_RUNNING)
+                    running[pool.submit(self._run_job, self.jobs[path])] = path
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception:  # noqa: BLE001
+                        status = STATUS_ERROR
+                    self._set_status(path, status)
+                    if status != STATUS_OK:
+                        self._skip_dependants(path)
+                        continue
+                    with self._lock:
+                        for dependant in self._dependants[path]:
+                            deps = remaining[dependant]
+                            deps.discard(path)
+                            if not deps and self.statuses[dependant] == STATUS_WAITING:
+                                ready.append(dependant)
+        return dict(self.statuses)
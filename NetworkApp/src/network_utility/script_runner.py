@@ -1,8 +1,29 @@
 from __future__ import annotations
 
+import codecs
+import locale
 import os
+import signal
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO
+
+from .models import ScriptResult
+from .paths import data_dir
+from .warm_pool import WarmProcess, WarmPythonPool, peak_rss_bytes
+
+POLL_INTERVAL = 0.2
+DEFAULT_TAIL_LINES = 200
+# readline() is capped so a script that never prints a newline cannot make a
+# single "line" grow without bound; longer lines arrive in chunks.
+MAX_LINE_BYTES = 16 * 1024
+READER_JOIN_TIMEOUT = 5.0
+DEFAULT_KEEP_LOGS = 500
 
 
 def build_command(path: str) -> list[str] | None:
@@ -18,18 +39,230 @@ def build_command(path: str) -> list[str] | None:
     return None
 
 
-def run_script(path: str) -> tuple[int | None, str, str, str | None]:
+def run_log_dir() -> Path:
+    return data_dir() / "runs"
+
+
+def prune_run_logs(log_dir: str | Path, keep: int = DEFAULT_KEEP_LOGS) -> None:
+    try:
+        logs = sorted(Path(log_dir).glob("*.log"), key=lambda item: item.stat().st_mtime)
+    except OSError:
+        return
+    for stale in logs[:-keep] if keep else logs:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def _process_group_options() -> dict[str, object]:
+    # Each script leads its own process group so a timeout or cancel also
+    # takes down anything the script spawned.
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(process: subprocess.Popen | WarmProcess) -> None:
+    if isinstance(process, WarmProcess):
+        process.kill()
+        return
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True, check=False)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _wait_with_usage(
+    process: subprocess.Popen | WarmProcess,
+    lock: threading.Lock,
+) -> tuple[float, float, int]:
+    """Wait for the script; return its user CPU, system CPU and peak RSS.
+
+    wait4() reports the usage of exactly that child, which getrusage() of
+    RUSAGE_CHILDREN cannot do while other scripts run in parallel. This is
+    the only place the child is waited for. It is reaped under ``lock``, so
+    a kill made under the same lock never targets a pid already reaped
+    (and possibly reused). Warm-pool scripts are reaped by the fork-server
+    instead, which therefore also does their kills (WarmProcess.kill).
+    """
+    if isinstance(process, WarmProcess):
+        process.wait()
+        return process.usage
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return 0.0, 0.0, 0
+    try:
+        if hasattr(os, "waitid"):
+            # Block until it exits but leave it unreaped, so the lock is
+            # only held for the wait4() below, which then returns at once.
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        with lock:
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+    except ChildProcessError:
+        with lock:
+            process.wait()
+        return 0.0, 0.0, 0
+    return usage.ru_utime, usage.ru_stime, peak_rss_bytes(usage.ru_maxrss)
+
+
+class _OutputCollector:
+    def __init__(
+        self,
+        log_path: Path | None,
+        tail_lines: int,
+        on_line: Callable[[str, str], None] | None,
+    ) -> None:
+        self.tails = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+        self.on_line = on_line
+        self.encoding = locale.getpreferredencoding(False)
+        self._lock = threading.Lock()
+        self.log_path = ""
+        self._log: IO[str] | None = None
+        if log_path is not None:
+            try:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                self._log = open(log_path, "w", encoding="utf-8", errors="replace")
+                self.log_path = str(log_path)
+            except OSError:
+                self._log = None
+
+    def pump(self, stream: str, pipe: IO[bytes]) -> None:
+        # A line cut at MAX_LINE_BYTES can end inside a multibyte character;
+        # the incremental decoder carries those bytes over to the next chunk.
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        try:
+            for raw in iter(lambda: pipe.readline(MAX_LINE_BYTES), b""):
+                text = decoder.decode(raw)
+                if text:
+                    self._emit(stream, text.rstrip("\r\n"))
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                self._emit(stream, tail)
+        finally:
+            pipe.close()
+
+    def _emit(self, stream: str, line: str) -> None:
+        self.tails[stream].append(line)
+        with self._lock:
+            if self._log is not None:
+                self._log.write(("" if stream == "stdout" else "[stderr] ") + line + "\n")
+        if self.on_line is not None:
+            self.on_line(stream, line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def text(self, stream: str) -> str:
+        return "\n".join(self.tails[stream])
+
+
+def _log_path_for(path: str, log_dir: str | Path | None) -> Path | None:
+    if log_dir is None:
+        return None
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    name = os.path.basename(path)
+    return Path(log_dir) / f"{stamp}-{name}-{os.getpid()}-{threading.get_ident()}.log"
+
+
+def run_script(
+    path: str,
+    timeout: float | None = None,
+    stop_event: threading.Event | None = None,
+    on_line: Callable[[str, str], None] | None = None,
+    log_dir: str | Path | None = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    python_pool: WarmPythonPool | None = None,
+    cwd: str | None = None,
+) -> ScriptResult:
+    if cwd:
+        path = os.path.join(cwd, path)
     command = build_command(path)
     if command is None:
         ext = os.path.splitext(path)[1].lower()
         if ext in {".bat", ".cmd"} and os.name != "nt":
-            return None, "", "", ".bat/.cmd scripts can only run on Windows"
-        return None, "", "", f"Unsupported extension: {ext}"
+            return ScriptResult(None, error=".bat/.cmd scripts can only run on Windows")
+        return ScriptResult(None, error=f"Unsupported extension: {ext}")
+
+    started = time.monotonic()
+    process: subprocess.Popen | WarmProcess | None = None
+    if python_pool is not None and command[0] == sys.executable:
+        try:
+            process = python_pool.spawn(path, cwd=cwd)
+        except OSError:
+            # A pool that cannot start is only a slower path, not a failure.
+            process = None
 
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=False)
-        return result.returncode, result.stdout, result.stderr, None
+        if process is None:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                **_process_group_options(),
+            )
     except FileNotFoundError as exc:
-        return None, "", "", f"Missing runtime for script: {exc}"
+        return ScriptResult(None, error=f"Missing runtime for script: {exc}")
     except Exception as exc:  # noqa: BLE001
-        return None, "", "", f"Failed running script: {exc}"
+        return ScriptResult(None, error=f"Failed running script: {exc}")
+
+    # Both pipes are drained concurrently so neither can fill up and stall
+    # the child; only the last tail_lines of each are kept in memory.
+    collector = _OutputCollector(_log_path_for(path, log_dir), tail_lines, on_line)
+    readers = [
+        threading.Thread(target=collector.pump, args=(stream, pipe), daemon=True)
+        for stream, pipe in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+
+    # A blocking wait on its own thread wakes the moment the child exits;
+    # Popen.wait(timeout=...) would instead poll with sleeps of up to 50 ms.
+    exited = threading.Event()
+    reap_lock = threading.Lock()
+    measured: dict[str, float] = {}
+
+    def reap() -> None:
+        cpu_user, cpu_system, peak_rss = _wait_with_usage(process, reap_lock)
+        measured.update(
+            duration=time.monotonic() - started, cpu_user=cpu_user, cpu_system=cpu_system, peak_rss=peak_rss
+        )
+        exited.set()
+
+    threading.Thread(target=reap, daemon=True).start()
+
+    deadline = time.monotonic() + timeout if timeout else None
+    error = None
+    while not exited.wait(POLL_INTERVAL):
+        if stop_event is not None and stop_event.is_set():
+            error = "Cancelled"
+        elif deadline is not None and time.monotonic() >= deadline:
+            error = f"Timed out after {timeout:g}s"
+        else:
+            continue
+        with reap_lock:
+            if process.returncode is None:
+                kill_process_tree(process)
+        exited.wait()
+        break
+
+    for reader in readers:
+        reader.join(READER_JOIN_TIMEOUT if error else None)
+    collector.close()
+    return ScriptResult(
+        process.returncode,
+        collector.text("stdout"),
+        collector.text("stderr"),
+        error,
+        collector.log_path,
+        **measured,
+    )
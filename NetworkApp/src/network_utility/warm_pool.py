@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import argparse
+import atexit
+import builtins
+import importlib
+import json
+import os
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+import types
+import weakref
+from pathlib import Path
+from typing import IO
+
+# Imported once by the fork-server so every script forked from it starts
+# with them already loaded.
+DEFAULT_PRELOAD = (
+    "argparse", "asyncio", "csv", "datetime", "email", "hashlib", "http.client", "ipaddress", "json",
+    "logging", "pathlib", "re", "shutil", "socket", "sqlite3", "subprocess", "tempfile", "urllib.request",
+)
+SOCKET_NAME = "pool.sock"
+READY = b"ready\n"
+KILL = b"kill\n"
+MAX_REQUEST = 64 * 1024
+SERVER_STOP_TIMEOUT = 2.0
+
+_POOLS: weakref.WeakSet[WarmPythonPool] = weakref.WeakSet()
+
+
+def peak_rss_bytes(max_rss: int) -> int:
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class WarmProcess:
+    """Popen-like handle for a script forked by the warm pool's server."""
+
+    def __init__(
+        self,
+        pid: int,
+        stdout: IO[bytes],
+        stderr: IO[bytes],
+        channel: socket.socket,
+        replies: IO[bytes],
+    ) -> None:
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: int | None = None
+        # (user CPU seconds, system CPU seconds, peak RSS bytes) once reaped.
+        self.usage = (0.0, 0.0, 0)
+        self._channel = channel
+        self._replies = replies
+        self._lock = threading.Lock()
+
+    def kill(self) -> None:
+        """SIGKILL the script's process group.
+
+        The server reaps the script, so only the server can tell whether the
+        pid is still the script's; a killpg() from here could hit a reused pid.
+        """
+        with self._lock:
+            if self.returncode is None:
+                try:
+                    self._channel.sendall(KILL)
+                except OSError:
+                    pass
+
+    def wait(self) -> int:
+        # The server answers on this connection once it has reaped the child.
+        if self.returncode is None:
+            line = self._replies.readline()
+            try:
+                reply = json.loads(line)
+                self.returncode = int(reply["returncode"])
+                self.usage = (float(reply["user"]), float(reply["system"]), int(reply["peak_rss"]))
+            except (ValueError, KeyError, TypeError):
+                # The server died before it could report; treat as killed.
+                self.returncode = -int(signal.SIGKILL)
+            with self._lock:
+                self._replies.close()
+                self._channel.close()
+        return self.returncode
+
+    def poll(self) -> int | None:
+        return self.returncode
+
+
+class WarmPythonPool:
+    """Runs .py scripts as forks of a pre-warmed interpreter (POSIX only).
+
+    A long-lived fork-server imports ``preload`` once; each script is then a
+    fresh ``fork()`` of it, so it skips interpreter start-up and those
+    imports while still getting its own process, process group, argv, cwd,
+    stdout/stderr pipes and exit code.
+    """
+
+    def __init__(self, preload: tuple[str, ...] = DEFAULT_PRELOAD) -> None:
+        self.preload = preload
+        self._server: subprocess.Popen | None = None
+        self._dir = ""
+        self._lock = threading.Lock()
+        _POOLS.add(self)
+
+    @staticmethod
+    def is_supported() -> bool:
+        return hasattr(os, "fork") and hasattr(socket, "send_fds") and hasattr(socket, "AF_UNIX")
+
+    def _socket_path(self) -> str:
+        with self._lock:
+            if self._server is not None and self._server.poll() is None:
+                return os.path.join(self._dir, SOCKET_NAME)
+            self._stop_server()
+
+            self._dir = tempfile.mkdtemp(prefix="network-utility-pool-")
+            path = os.path.join(self._dir, SOCKET_NAME)
+            env = dict(os.environ)
+            package_root = str(Path(__file__).resolve().parent.parent)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, (package_root, env.get("PYTHONPATH"))))
+            # The server holds the read end of stdin; when this process goes
+            # away, however abruptly, the server sees EOF and exits.
+            self._server = subprocess.Popen(
+                [sys.executable, "-m", "network_utility.warm_pool", path,
+                 "--preload", ",".join(self.preload)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=env,
+            )
+            if self._server.stdout.readline() != READY:
+                self._stop_server()
+                raise OSError("Warm Python pool server failed to start")
+            return path
+
+    def spawn(self, path: str, args: list[str] | None = None, cwd: str | None = None) -> WarmProcess:
+        if not self.is_supported():
+            raise OSError("The warm Python pool needs fork() and Unix domain sockets")
+        socket_path = self._socket_path()
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        channel = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # The exit status can follow the pid right away for a short script, so
+        # both replies are read through the same buffered reader.
+        replies = channel.makefile("rb")
+        try:
+            channel.connect(socket_path)
+            request = {"path": os.path.abspath(path), "args": list(args or []), "cwd": cwd or os.getcwd()}
+            socket.send_fds(channel, [json.dumps(request).encode("utf-8")], [out_write, err_write])
+            reply = replies.readline()
+            if not reply:
+                raise OSError("Warm Python pool server closed the connection")
+            pid = int(json.loads(reply)["pid"])
+        except (OSError, ValueError, KeyError):
+            replies.close()
+            channel.close()
+            for fd in (out_read, err_read):
+                os.close(fd)
+            raise
+        finally:
+            os.close(out_write)
+            os.close(err_write)
+        return WarmProcess(pid, open(out_read, "rb"), open(err_read, "rb"), channel, replies)
+
+    def _stop_server(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.stdin.close()
+                self._server.wait(SERVER_STOP_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                self._server.kill()
+                self._server.wait()
+            self._server.stdout.close()
+            self._server = None
+        if self._dir:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = ""
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop_server()
+
+
+def _close_pools() -> None:
+    for pool in list(_POOLS):
+        pool.close()
+
+
+# One handler for all pools; registering a bound method per pool would also
+# keep every pool alive until exit.
+atexit.register(_close_pools)
+
+
+# --- fork-server side -------------------------------------------------------
+
+
+def _run_child(
+    request: dict,
+    fds: list[int],
+    inherited: list[int],
+    started: int,
+    selector: selectors.BaseSelector,
+) -> None:
+    # Runs in the forked child and never returns.
+    code = 1
+    try:
+        # Only drops this process's handle (e.g. the epoll fd); the server's
+        # registrations are untouched.
+        selector.close()
+        for fd in inherited:
+            os.close(fd)
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGCHLD, signal.SIGTERM):
+            signal.signal(signum, signal.SIG_DFL)
+        # As in a fresh interpreter, Ctrl+C raises KeyboardInterrupt.
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        os.setsid()
+        # Closing this tells the server the process group now exists.
+        os.close(started)
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for fd in (devnull, *fds):
+            os.close(fd)
+
+        path = request["path"]
+        os.chdir(request["cwd"])
+        sys.argv = [path, *request["args"]]
+        sys.path[0] = os.path.dirname(path)
+
+        # Run it the way "python script.py" does: a fresh __main__ module
+        # with __spec__ set to None. runpy would work too but pays for a
+        # pkgutil import in every child.
+        main_module = types.ModuleType("__main__")
+        main_module.__file__ = path
+        main_module.__builtins__ = builtins
+        main_module.__spec__ = None
+        sys.modules["__main__"] = main_module
+        try:
+            with open(path, "rb") as handle:
+                source = handle.read()
+        except OSError as exc:
+            # Same message and status as the interpreter's own.
+            print(f"{sys.executable}: can't open file {path!r}: [Errno {exc.errno}] {exc.strerror}",
+                  file=sys.stderr)
+            code = 2
+            return
+        try:
+            exec(compile(source, path, "exec"), main_module.__dict__)
+            code = 0
+        except SystemExit as exc:
+            if exc.code is None:
+                code = 0
+            elif isinstance(exc.code, int):
+                code = exc.code
+            else:
+                print(exc.code, file=sys.stderr)
+                code = 1
+        except BaseException as exc:  # noqa: BLE001
+            # Drop this function's own frame so the traceback starts in the script.
+            traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+            code = 1
+
+        # What interpreter shutdown would do: wait for non-daemon threads,
+        # run atexit handlers, flush the standard streams.
+        for thread in threading.enumerate():
+            if thread is not threading.main_thread() and not thread.daemon:
+                thread.join()
+        atexit._run_exitfuncs()
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        os._exit(code & 0xFF)
+
+
+def serve(path: str, preload: list[str]) -> None:
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+
+    # Ctrl+C in a terminal reaches the whole foreground group; the client
+    # cancels scripts itself, so the server ignores it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    wake_read, wake_write = os.pipe()
+    os.set_blocking(wake_read, False)
+    os.set_blocking(wake_write, False)
+    signal.set_wakeup_fd(wake_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(64)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wake_read, selectors.EVENT_READ)
+    selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+
+    sys.stdout.buffer.write(READY)
+    sys.stdout.flush()
+    try:
+        _serve_forever(selector, listener, (wake_read, wake_write))
+    finally:
+        # Clean up after a client that exited without calling close().
+        listener.close()
+        try:
+            os.unlink(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+def _serve_forever(selector: selectors.BaseSelector, listener: socket.socket, wake: tuple[int, int]) -> None:
+    wake_read, wake_write = wake
+    waiting: dict[int, socket.socket] = {}
+    while True:
+        try:
+            events = selector.select()
+        except InterruptedError:
+            continue
+        for key, _ in events:
+            if key.fileobj is listener:
+                conn, _ = listener.accept()
+                try:
+                    message, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST, 2)
+                    request = json.loads(message)
+                except (OSError, ValueError):
+                    conn.close()
+                    continue
+                if len(fds) != 2:
+                    for fd in fds:
+                        os.close(fd)
+                    conn.close()
+                    continue
+
+                # The pid is only handed out once the child has called
+                # setsid(); before that, killpg(pid) would find no group and
+                # a cancel would be lost.
+                started_read, started_write = os.pipe()
+                inherited = [listener.fileno(), wake_read, wake_write, conn.fileno(), started_read]
+                inherited += [other.fileno() for other in waiting.values()]
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(request, fds, inherited, started_write, selector)
+                for fd in (*fds, started_write):
+                    os.close(fd)
+                try:
+                    os.read(started_read, 1)
+                finally:
+                    os.close(started_read)
+                try:
+                    conn.sendall(json.dumps({"pid": pid}).encode("utf-8") + b"\n")
+                except OSError:
+                    pass
+                waiting[pid] = conn
+                selector.register(conn, selectors.EVENT_READ, pid)
+            elif key.fileobj == wake_read:
+                try:
+                    os.read(wake_read, 4096)
+                except BlockingIOError:
+                    pass
+            elif key.data is not None:
+                _kill_request(selector, key.fileobj, key.data, waiting)
+            elif not os.read(sys.stdin.fileno(), 4096):
+                return
+        _reap(waiting, selector)
+
+
+def _kill_request(
+    selector: selectors.BaseSelector,
+    conn: socket.socket,
+    pid: int,
+    waiting: dict[int, socket.socket],
+) -> None:
+    try:
+        data = conn.recv(64)
+    except OSError:
+        data = b""
+    if not data:
+        # The client is gone without waiting for the script; nobody will
+        # read its output, so it goes too.
+        selector.unregister(conn)
+    if (not data or KILL in data) and pid in waiting:
+        # Not reaped yet (that happens only in _reap, on this thread), so the
+        # pid and its process group are still the script's.
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _reap(waiting: dict[int, socket.socket], selector: selectors.BaseSelector) -> None:
+    while True:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        conn = waiting.pop(pid, None)
+        if conn is None:
+            continue
+        try:
+            selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        try:
+            reply = {
+                "returncode": os.waitstatus_to_exitcode(status),
+                "user": usage.ru_utime,
+                "system": usage.ru_stime,
+                "peak_rss": peak_rss_bytes(usage.ru_maxrss),
+            }
+            conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fork-server for the warm Python script pool")
+    parser.add_argument("socket")
+    parser.add_argument("--preload", default="")
+    args = parser.parse_args()
+    serve(args.socket, [name for name in args.preload.split(",") if name])
+
+
+if __name__ == "__main__":
+    main()
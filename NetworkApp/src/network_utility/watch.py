@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import fields
+
+from .models import DeviceDiff, DeviceRecord
+
+DEFAULT_WATCH_INTERVAL = 30
+PLACEHOLDER_MACS = {"", "(unknown)", "(pending)"}
+MAC_CHANGE_NOTE = "MAC changed from {} (possible spoofing)"
+_MAC_CHANGE_PREFIX = MAC_CHANGE_NOTE.split("{}")[0]
+
+
+def mac_change_note(old_mac: str) -> str:
+    return MAC_CHANGE_NOTE.format(old_mac)
+
+
+def _merge(previous: DeviceRecord, current: DeviceRecord) -> DeviceRecord:
+    # A fresh ARP sighting only knows ip/mac; keep whatever earlier stages
+    # (sweep notes, enrichment) already learned about the device.
+    merged = DeviceRecord(ip=current.ip, mac=current.mac)
+    for item in fields(DeviceRecord):
+        if item.name == "ip":
+            continue
+        value = getattr(current, item.name)
+        if not value or (item.name == "mac" and value in PLACEHOLDER_MACS):
+            value = getattr(previous, item.name)
+            # The spoofing warning is about the last tick only; once the MAC
+            # holds steady again the row goes back to normal.
+            if item.name == "note" and value.startswith(_MAC_CHANGE_PREFIX):
+                value = ""
+        setattr(merged, item.name, value)
+    return merged
+
+
+def diff_devices(previous: dict[str, DeviceRecord], current: Iterable[DeviceRecord]) -> DeviceDiff:
+    diff = DeviceDiff()
+    seen: set[str] = set()
+
+    for device in current:
+        seen.add(device.ip)
+        known = previous.get(device.ip)
+        if known is None:
+            diff.joined.append(device)
+            continue
+
+        merged = _merge(known, device)
+        if merged == known:
+            continue
+        diff.updated.append(merged)
+        if known.mac not in PLACEHOLDER_MACS and merged.mac != known.mac:
+            diff.mac_changes.append((merged, known.mac))
+
+    diff.left = [device for ip, device in previous.items() if ip not in seen]
+    _match_moves(diff)
+    return diff
+
+
+def _match_moves(diff: DeviceDiff) -> None:
+    # A known MAC that left one address and joined another is the same
+    # device on a new lease, not a departure plus a stranger.
+    left_by_mac: dict[str, DeviceRecord] = {}
+    for device in diff.left:
+        if device.mac not in PLACEHOLDER_MACS:
+            left_by_mac.setdefault(device.mac.lower(), device)
+    if not left_by_mac:
+        return
+
+    joined = []
+    for device in diff.joined:
+        known = left_by_mac.pop(device.mac.lower(), None) if device.mac not in PLACEHOLDER_MACS else None
+        if known is None:
+            joined.append(device)
+        else:
+            diff.moved.append((_merge(known, device), known.ip))
+    moved_from = {old_ip for _, old_ip in diff.moved}
+    diff.joined = joined
+    diff.left = [device for device in diff.left if device.ip not in moved_from]
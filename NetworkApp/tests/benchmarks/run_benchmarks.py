@@ -0,0 +1,393 @@
+"""Benchmark suite for network_utility.
+
+Times the ARP and routing-table parsers on synthetic output (with
+``subprocess.run`` mocked out), ``run_script`` overhead and output
+throughput, the script queue executor, device inventory ingest and queries, and
+discovery/port scanning against local listening sockets. Results are written as JSON and checked against
+a previous results file from the same machine. The absolute limits in ``thresholds.json`` are calibrated
+for the CI runners and only enforced with ``--thresholds``.
+
+    python tests/benchmarks/run_benchmarks.py --output results.json
+    python tests/benchmarks/run_benchmarks.py --quick --baseline results.json
+    python tests/benchmarks/run_benchmarks.py --thresholds  # CI hardware only
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import synthetic  # noqa: E402
+from network_utility import networking  # noqa: E402
+from network_utility.discovery import sweep_network  # noqa: E402
+from network_utility.inventory import DAY, DeviceInventory  # noqa: E402
+from network_utility.models import DeviceRecord, ScriptJob  # noqa: E402
+from network_utility.port_scan import scan_ports  # noqa: E402
+from network_utility.run_history import RunHistory  # noqa: E402
+from network_utility.script_executor import STATUS_OK, ScriptQueueExecutor  # noqa: E402
+from network_utility.script_runner import run_script  # noqa: E402
+from network_utility.warm_pool import WarmPythonPool  # noqa: E402
+
+THRESHOLDS_PATH = Path(__file__).with_name("thresholds.json")
+SIZES = (1_000, 10_000, 100_000)
+QUICK_SIZES = (1_000, 10_000)
+DEFAULT_TOLERANCE = 0.25
+LISTENERS = 16
+INVENTORY_POPULATION = 3000
+INVENTORY_SCAN_SIZE = 2000
+
+
+class Results:
+    def __init__(self) -> None:
+        self.metrics: dict[str, dict[str, object]] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str) -> None:
+        self.metrics[name] = {"value": round(value, 6), "unit": unit, "better": better}
+        print(f"  {name:<44} {value:>14.3f} {unit}", file=sys.stderr)
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _host_format() -> str:
+    if os.name == "nt":
+        return "windows"
+    return "macos" if sys.platform == "darwin" else "linux"
+
+
+def _completed(text: str) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=[], returncode=0, stdout=text, stderr="")
+
+
+def bench_arp(results: Results, sizes: tuple[int, ...], repeat: int) -> None:
+    for name in synthetic.PLATFORMS:
+        for size in sizes:
+            text, expected = synthetic.arp_output(name, size)
+            found = len(networking.parse_arp_output(text))
+            if found != expected:
+                raise AssertionError(f"{name} arp output: parsed {found} devices, expected {expected}")
+            elapsed = _best(lambda: networking.parse_arp_output(text), repeat)
+            results.add(f"arp.parse.{name}.{size}", elapsed * 1e6 / size, "us/line", "lower")
+
+    # get_arp_devices as called by the app, with the subprocess replaced by
+    # canned output of the largest size.
+    text, expected = synthetic.arp_output(_host_format(), sizes[-1])
+    with mock.patch.object(networking.subprocess, "run", return_value=_completed(text)):
+        elapsed = _best(networking.get_arp_devices, repeat)
+    results.add(f"arp.get_arp_devices.{sizes[-1]}", elapsed * 1000, "ms", "lower")
+
+
+def bench_gateway(results: Results, sizes: tuple[int, ...], repeat: int) -> None:
+    for name in synthetic.PLATFORMS:
+        for size in sizes:
+            text = synthetic.route_output(name, size)
+            windows = name == "windows"
+            gateway = networking.parse_default_gateway(text, windows=windows)
+            if gateway != synthetic.DEFAULT_GATEWAY:
+                raise AssertionError(f"{name} route output: parsed gateway {gateway!r}")
+            elapsed = _best(lambda: networking.parse_default_gateway(text, windows=windows), repeat)
+            results.add(f"gateway.parse.{name}.{size}", elapsed * 1e6 / size, "us/line", "lower")
+
+    text = synthetic.route_output(_host_format(), sizes[-1])
+    with mock.patch.object(networking.subprocess, "run", return_value=_completed(text)):
+        elapsed = _best(networking.get_default_gateway, repeat)
+    results.add(f"gateway.get_default_gateway.{sizes[-1]}", elapsed * 1000, "ms", "lower")
+
+
+def bench_scripts(results: Results, quick: bool) -> None:
+    runs = 10 if quick else 30
+    chatty_lines = 50_000 if quick else 200_000
+    with tempfile.TemporaryDirectory() as workdir:
+        noop = Path(workdir, "noop.py")
+        noop.write_text("pass\n")
+        chatty = Path(workdir, "chatty.py")
+        chatty.write_text(
+            "import sys\n"
+            f"sys.stdout.writelines(f'line {{index}} of output\\n' for index in range({chatty_lines}))\n"
+        )
+
+        def median_ms(func: Callable[[], object]) -> float:
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            return statistics.median(timings) * 1000
+
+        # Bare and wrapped runs alternate so both see the same machine load;
+        # the overhead compares their best runs and is clamped at zero, since
+        # noise can make a single wrapped run beat a single bare one.
+        bare_runs, wrapped_runs = [], []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, str(noop)], capture_output=True)
+            bare_runs.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            run_script(str(noop), log_dir=workdir)
+            wrapped_runs.append(time.perf_counter() - started)
+        results.add("run_script.noop_py", statistics.median(wrapped_runs) * 1000, "ms", "lower")
+        overhead = max(0.0, min(wrapped_runs) - min(bare_runs))
+        results.add("run_script.overhead", overhead * 1000, "ms", "lower")
+
+        if WarmPythonPool.is_supported():
+            pool = WarmPythonPool()
+            try:
+                run_script(str(noop), python_pool=pool)  # starts the fork-server
+                warm = median_ms(lambda: run_script(str(noop), log_dir=workdir, python_pool=pool))
+            finally:
+                pool.close()
+            results.add("run_script.noop_py_warm", warm, "ms", "lower")
+
+        if os.name != "nt" and shutil.which("bash"):
+            noop_sh = Path(workdir, "noop.sh")
+            noop_sh.write_text("exit 0\n")
+            results.add("run_script.noop_sh", median_ms(lambda: run_script(str(noop_sh))), "ms", "lower")
+
+        received = 0
+
+        def on_line(stream: str, line: str) -> None:
+            nonlocal received
+            received += 1
+
+        started = time.perf_counter()
+        result = run_script(str(chatty), on_line=on_line, log_dir=workdir)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0 or received != chatty_lines:
+            raise AssertionError(f"chatty script: exit {result.returncode}, {received} lines")
+        results.add("run_script.stream_throughput", chatty_lines / elapsed, "lines/s", "higher")
+
+        paths = []
+        for index in range(16):
+            path = Path(workdir, f"job{index}.py")
+            path.write_text("pass\n")
+            paths.append(str(path))
+        jobs = [ScriptJob(path) for path in paths]
+        started = time.perf_counter()
+        history = RunHistory(Path(workdir, "history.sqlite3"))
+        statuses = ScriptQueueExecutor(jobs, workers=4, log_dir=workdir, history=history).run()
+        elapsed = time.perf_counter() - started
+        if any(status != STATUS_OK for status in statuses.values()):
+            raise AssertionError(f"executor: {statuses}")
+        results.add("executor.16_noop_jobs_4_workers", elapsed * 1000, "ms", "lower")
+
+
+def bench_inventory(results: Results, quick: bool, repeat: int) -> None:
+    # Hourly scans of a network where most devices come and go and a few
+    # change address; the history grows with every scan.
+    rng = random.Random(42)
+    population = [
+        (f"10.0.{index >> 8}.{index & 255}", f"02:00:00:00:{index >> 8:02x}:{index & 255:02x}")
+        for index in range(1, INVENTORY_POPULATION + 1)
+    ]
+    scans = 48 if quick else 240
+    workdir = tempfile.mkdtemp(prefix="nu-bench-inventory-")
+    try:
+        inventory = DeviceInventory(Path(workdir, "inventory.sqlite3"))
+        start = time.time() - scans * 3600
+        timings = []
+        for scan in range(scans):
+            devices = [DeviceRecord(ip, mac) for ip, mac in rng.sample(population, INVENTORY_SCAN_SIZE)]
+            for device in rng.sample(devices, 5):
+                device.ip = rng.choice(population)[0]
+            started = time.perf_counter()
+            inventory.ingest(devices, seen_at=start + scan * 3600)
+            timings.append(time.perf_counter() - started)
+        results.add(
+            f"inventory.ingest_{INVENTORY_SCAN_SIZE}", statistics.median(timings) * 1000, "ms/scan", "lower"
+        )
+
+        now = start + scans * 3600
+        ip, mac = population[0]
+        for name, query in (
+            ("not_seen_1d", lambda: inventory.not_seen_for(1, now=now)),
+            ("ips_for_mac", lambda: inventory.ips_for_mac(mac)),
+            ("macs_for_ip", lambda: inventory.macs_for_ip(ip)),
+            ("mac_changes_ip", lambda: inventory.mac_changes(ip)),
+        ):
+            results.add(f"inventory.query.{name}", _best(query, repeat) * 1000, "ms", "lower")
+        if not inventory.not_seen_since(now + DAY):
+            raise AssertionError("inventory lost its devices")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class _Listeners:
+    # Listening sockets on 127.0.0.1 with a thread that accepts and closes,
+    # so the backlog never fills while the scanners hammer them. Other
+    # loopback addresses answer the sweep with a refusal, which counts too.
+    def __init__(self, count: int) -> None:
+        self.sockets = []
+        for _ in range(count):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(("127.0.0.1", 0))
+            server.listen(1024)
+            server.settimeout(0.2)
+            self.sockets.append(server)
+        self.ports = [server.getsockname()[1] for server in self.sockets]
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._accept, args=(server,), daemon=True) for server in self.sockets
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _accept(self, server: socket.socket) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                continue
+            conn.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        for server in self.sockets:
+            server.close()
+
+
+def bench_network(results: Results, quick: bool) -> None:
+    listeners = _Listeners(LISTENERS)
+    try:
+        # Every 127.0.0.0/8 address is local on Linux and Windows; macOS only
+        # configures 127.0.0.1, so the sweep is skipped there.
+        if sys.platform != "darwin":
+            hosts = [f"127.0.0.{index}" for index in range(1, 255)]
+            started = time.perf_counter()
+            found = asyncio.run(
+                sweep_network(iter(hosts), lambda device: None, ports=listeners.ports[:1], concurrency=128)
+            )
+            elapsed = time.perf_counter() - started
+            if found != len(hosts):
+                raise AssertionError(f"sweep found {found} of {len(hosts)} loopback hosts")
+            results.add("discovery.sweep_254_hosts", len(hosts) / elapsed, "hosts/s", "higher")
+
+        closed = list(range(20000, 21000 if quick else 24000))
+        ports = [port for port in closed if port not in listeners.ports] + listeners.ports
+        started = time.perf_counter()
+        # Per-host pacing is switched off so this measures the scan engine,
+        # not the configured rate limit.
+        open_count = scan_ports(["127.0.0.1"], ports, lambda record: None, banners=False, host_rate=0)
+        elapsed = time.perf_counter() - started
+        if open_count < len(listeners.ports):
+            raise AssertionError(f"port scan found {open_count} of {len(listeners.ports)} listeners")
+        results.add("port_scan.loopback_unpaced", len(ports) / elapsed, "pairs/s", "higher")
+    finally:
+        listeners.close()
+
+
+def check_thresholds(
+    metrics: dict[str, dict[str, object]], thresholds: dict[str, dict[str, float]]
+) -> list[str]:
+    failures = []
+    for name, limits in thresholds.items():
+        metric = metrics.get(name)
+        if metric is None:
+            continue
+        value = float(metric["value"])
+        if "max" in limits and value > limits["max"]:
+            failures.append(f"{name}: {value:.3f} {metric['unit']} exceeds max {limits['max']}")
+        if "min" in limits and value < limits["min"]:
+            failures.append(f"{name}: {value:.3f} {metric['unit']} below min {limits['min']}")
+    return failures
+
+
+def compare_baseline(metrics: dict[str, dict[str, object]], baseline: dict, tolerance: float) -> list[str]:
+    failures = []
+    for name, previous in baseline.get("metrics", {}).items():
+        metric = metrics.get(name)
+        if metric is None or not previous.get("value"):
+            continue
+        ratio = float(metric["value"]) / float(previous["value"])
+        worse = ratio > 1 + tolerance if metric["better"] == "lower" else ratio < 1 - tolerance
+        if worse:
+            failures.append(
+                f"{name}: {metric['value']} {metric['unit']} vs baseline {previous['value']} ({ratio:.2f}x)"
+            )
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write results JSON")
+    parser.add_argument(
+        "--thresholds",
+        nargs="?",
+        const=str(THRESHOLDS_PATH),
+        help="enforce absolute limits (default file: thresholds.json, calibrated for CI hardware)",
+    )
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown vs baseline"
+    )
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, fewer repeats")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=("arp", "gateway", "scripts", "inventory", "network"),
+        help="run a subset",
+    )
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    repeat = 3 if args.quick else 5
+    selected = set(args.only or ("arp", "gateway", "scripts", "inventory", "network"))
+    results = Results()
+    if "arp" in selected:
+        bench_arp(results, sizes, repeat)
+    if "gateway" in selected:
+        bench_gateway(results, sizes, repeat)
+    if "scripts" in selected:
+        bench_scripts(results, args.quick)
+    if "inventory" in selected:
+        bench_inventory(results, args.quick, repeat)
+    if "network" in selected:
+        bench_network(results, args.quick)
+
+    failures = []
+    if args.thresholds:
+        failures += check_thresholds(results.metrics, json.loads(Path(args.thresholds).read_text()))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        failures += compare_baseline(results.metrics, baseline, args.tolerance)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "metrics": results.metrics,
+        "regressions": failures,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Synthetic `arp -a` and routing-table output in each platform's format."""
+
+from __future__ import annotations
+
+PLATFORMS = ("windows", "linux", "macos")
+DEFAULT_GATEWAY = "192.168.1.1"
+# One Windows interface block per this many neighbours, as on a multi-homed host.
+WINDOWS_BLOCK = 1000
+# Every this-many Linux/macOS entries is an unresolved neighbour.
+INCOMPLETE_EVERY = 50
+
+
+def _ip(index: int) -> str:
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def _mac(index: int) -> tuple[int, ...]:
+    return (0x02, 0x00, (index >> 24) & 255, (index >> 16) & 255, (index >> 8) & 255, index & 255)
+
+
+def arp_output(platform: str, lines: int) -> tuple[str, int]:
+    """Return ``arp -a`` text of about ``lines`` lines and its neighbour count."""
+    out: list[str] = []
+    count = 0
+    index = 0
+    while len(out) < lines:
+        index += 1
+        ip = _ip(index)
+        mac = _mac(index)
+        if platform == "windows":
+            if (index - 1) % WINDOWS_BLOCK == 0:
+                out += ["", f"Interface: 192.168.{index // WINDOWS_BLOCK % 256}.100 --- 0xb"]
+                out.append("  Internet Address      Physical Address      Type")
+            out.append(f"  {ip:<22}{'-'.join(f'{octet:02x}' for octet in mac):<22}dynamic")
+        elif platform == "linux":
+            if index % INCOMPLETE_EVERY == 0:
+                out.append(f"? ({ip}) at <incomplete> on eth0")
+            else:
+                out.append(f"? ({ip}) at {':'.join(f'{octet:02x}' for octet in mac)} [ether] on eth0")
+        elif platform == "macos":
+            if index % INCOMPLETE_EVERY == 0:
+                out.append(f"? ({ip}) at (incomplete) on en0 ifscope [ethernet]")
+            else:
+                # macOS drops leading zeros from each MAC group.
+                out.append(f"? ({ip}) at {':'.join(f'{octet:x}' for octet in mac)} on en0 ifscope [ethernet]")
+        else:
+            raise ValueError(f"Unknown platform: {platform}")
+        count += 1
+    return "\n".join(out) + "\n", count
+
+
+def route_output(platform: str, lines: int) -> str:
+    """Return a routing table of about ``lines`` lines with the default route last."""
+    out: list[str] = []
+    if platform == "windows":
+        out += [
+            "=" * 75,
+            "IPv4 Route Table",
+            "=" * 75,
+            "Active Routes:",
+            "Network Destination        Netmask          Gateway       Interface  Metric",
+        ]
+        for index in range(lines):
+            network = f"10.{(index >> 8) & 255}.{index & 255}.0"
+            out.append(f"{network:>17}    255.255.255.0         10.0.0.1      10.0.0.100     25")
+        out.append(f"          0.0.0.0          0.0.0.0      {DEFAULT_GATEWAY}    192.168.1.100     25")
+    elif platform == "linux":
+        for index in range(lines):
+            network = f"10.{(index >> 8) & 255}.{index & 255}.0/24"
+            out.append(f"{network} via 10.0.0.1 dev eth0 proto static metric 100")
+        out.append(f"default via {DEFAULT_GATEWAY} dev eth0 proto dhcp src 192.168.1.100 metric 100")
+    elif platform == "macos":
+        out += ["Routing tables", "", "Internet:"]
+        out.append("Destination        Gateway            Flags        Netif Expire")
+        for index in range(lines):
+            network = f"10.{(index >> 8) & 255}.{index & 255}/24"
+            out.append(f"{network:<19}10.0.0.1           UGSc           en0")
+        out.append(f"default            {DEFAULT_GATEWAY}        UGScg          en0")
+    else:
+        raise ValueError(f"Unknown platform: {platform}")
+    return "\n".join(out) + "\n"
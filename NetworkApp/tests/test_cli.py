@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from network_utility import cli, daemon
+from network_utility.paths import HOME_ENV
+
+needs_daemon = pytest.mark.skipif(not daemon.is_supported(), reason="needs Unix domain sockets")
+
+
+@pytest.fixture
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv(HOME_ENV, str(tmp_path / "home"))
+    work = tmp_path / "work"
+    work.mkdir()
+    (work / "where.py").write_text("import os\nprint(os.getcwd())\n", encoding="utf-8")
+    monkeypatch.chdir(work)
+    return work
+
+
+def _script_stdout(output: str) -> str:
+    (result,) = json.loads(output)["results"]
+    return result["stdout"]
+
+
+@needs_daemon
+def test_no_daemon_falls_back_to_running_locally(workdir: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    code = cli.main(["--via-daemon", "--socket", str(workdir / "none.sock"), "run", "where.py"])
+    assert code == 0
+    captured = capsys.readouterr()
+    assert _script_stdout(captured.out) == str(workdir)
+    assert "running locally" in captured.err
+
+
+@needs_daemon
+def test_forwarded_run_uses_the_client_cwd(
+    workdir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "d.sock"
+    server = daemon._DaemonServer(str(path), cli._dispatch)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # The daemon's own cwd differs from the one the client sends.
+    monkeypatch.chdir(tmp_path)
+    request = {"argv": ["run", "where.py"], "cwd": str(workdir), "stdin": ""}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(path))
+            client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            replies = client.makefile("r", encoding="utf-8").read()
+    finally:
+        server.shutdown()
+        server.server_close()
+    output, _, code = replies.rpartition(daemon.EXIT_MARK)
+    assert code.strip() == "0"
+    assert _script_stdout(output) == str(workdir)
+
+
+def test_via_daemon_without_a_command_is_not_forwarded(monkeypatch: pytest.MonkeyPatch) -> None:
+    forwarded = []
+    monkeypatch.setattr(daemon, "forward", lambda *args: forwarded.append(args) or 0)
+    monkeypatch.setattr(cli, "_gui", lambda *args: 7)
+    assert cli.main(["--via-daemon"]) == 7
+    assert forwarded == []
+
+
+def test_daemon_refuses_to_open_the_gui() -> None:
+    err = io.StringIO()
+    assert cli._dispatch([], os.getcwd(), "", err, err) == 2
+    assert "cannot be run through the daemon" in err.getvalue()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import io
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from network_utility import daemon
+
+pytestmark = pytest.mark.skipif(not daemon.is_supported(), reason="needs Unix domain sockets")
+
+
+@pytest.fixture
+def start_server(tmp_path: Path):
+    servers = []
+
+    def start(dispatch: daemon.Dispatch) -> Path:
+        path = tmp_path / "d.sock"
+        server = daemon._DaemonServer(str(path), dispatch)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return path
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_peer_uid_is_this_user() -> None:
+    left, right = socket.socketpair(socket.AF_UNIX)
+    with left, right:
+        assert daemon.peer_uid(left) in {None, os.getuid()}
+
+
+def test_forward_relays_output_streams_and_exit_code(start_server) -> None:
+    seen = {}
+
+    def dispatch(argv, cwd, stdin, out, err, stop_event) -> int:
+        seen.update(argv=argv, cwd=cwd, stdin=stdin)
+        out.write('{"a": 1}\nno newline')
+        err.write("warning: careful\n")
+        return 3
+
+    path = start_server(dispatch)
+    out, err = io.StringIO(), io.StringIO()
+    assert daemon.forward(path, ["lookup", "-"], "1.1.1.1", out, err) == 3
+    assert out.getvalue() == '{"a": 1}\nno newline\n'
+    assert err.getvalue() == "warning: careful\n"
+    assert seen == {"argv": ["lookup", "-"], "cwd": os.getcwd(), "stdin": "1.1.1.1"}
+
+
+def test_other_users_are_refused(start_server, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(daemon, "peer_uid", lambda sock: os.getuid() + 1)
+    calls = []
+    path = start_server(lambda *args: calls.append(args) or 0)
+    err = io.StringIO()
+    assert daemon.forward(path, ["history"], "", io.StringIO(), err) == 1
+    assert "closed the connection" in err.getvalue()
+    assert calls == []
+
+
+def test_client_hang_up_sets_the_stop_event(start_server) -> None:
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def dispatch(argv, cwd, stdin, out, err, stop_event) -> int:
+        started.set()
+        if stop_event.wait(10):
+            stopped.set()
+        return 0
+
+    path = start_server(dispatch)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(path))
+        client.sendall(b'{"argv": ["latency"]}\n')
+        assert started.wait(5)
+    assert stopped.wait(5)
+
+
+def test_forward_without_a_daemon_returns_none(tmp_path: Path) -> None:
+    assert daemon.forward(tmp_path / "missing.sock", ["history"], "", io.StringIO(), io.StringIO()) is None
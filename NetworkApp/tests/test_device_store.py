@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+from network_utility.device_store import DeviceStore
+from network_utility.models import DeviceRecord
+
+
+@pytest.fixture
+def store() -> DeviceStore:
+    store = DeviceStore()
+    store["10.0.0.1"] = DeviceRecord("10.0.0.1", "00:1a:2b:00:00:01", note="Default Gateway", vendor="Acme")
+    store["10.0.1.7"] = DeviceRecord("10.0.1.7", "ca:fe:00:00:00:07", hostname="printer", vendor="Acme")
+    store["10.2.0.9"] = DeviceRecord(
+        "10.2.0.9", "00:1a:2c:00:00:09", hostname="cafe-kiosk", vendor="Beef Ltd"
+    )
+    store["fe80::1"] = DeviceRecord("fe80::1", "(pending)")
+    return store
+
+
+def _ips(store: DeviceStore, rows: set[int] | None) -> set[str]:
+    assert rows is not None
+    return {store.record(row).ip for row in rows}
+
+
+def test_set_get_and_update(store: DeviceStore) -> None:
+    assert len(store) == 4
+    assert store["10.0.1.7"] == DeviceRecord(
+        "10.0.1.7", "ca:fe:00:00:00:07", hostname="printer", vendor="Acme"
+    )
+    assert store["fe80::1"].mac == "(pending)"
+
+    store["10.0.1.7"] = DeviceRecord("10.0.1.7", "CA-FE-00-00-00-08", vendor="Other")
+    assert len(store) == 4
+    assert store["10.0.1.7"] == DeviceRecord("10.0.1.7", "ca:fe:00:00:00:08", vendor="Other")
+    assert _ips(store, store.matching("acme")) == {"10.0.0.1"}
+
+
+def test_delete_keeps_the_remaining_rows_intact(store: DeviceStore) -> None:
+    del store["10.0.0.1"]
+    assert "10.0.0.1" not in store
+    assert sorted(store) == ["10.0.1.7", "10.2.0.9", "fe80::1"]
+    assert store["10.2.0.9"].hostname == "cafe-kiosk"
+    assert _ips(store, store.matching("acme")) == {"10.0.1.7"}
+    with pytest.raises(KeyError):
+        del store["10.0.0.1"]
+
+
+def test_clear_empties_the_store(store: DeviceStore) -> None:
+    version = store.version
+    store.clear()
+    assert len(store) == 0
+    assert store.version > version
+    assert list(store.order()) == []
+    store["10.0.0.5"] = DeviceRecord("10.0.0.5", "00:00:00:00:00:05", vendor="Acme")
+    assert _ips(store, store.matching("acme")) == {"10.0.0.5"}
+
+
+def test_matching_by_address(store: DeviceStore) -> None:
+    assert store.matching("  ") is None
+    assert _ips(store, store.matching("10.0.")) == {"10.0.0.1", "10.0.1.7"}
+    assert _ips(store, store.matching("10.2.0.0/16")) == {"10.2.0.9"}
+    assert _ips(store, store.matching("10.0.1.7")) == {"10.0.1.7"}
+    assert _ips(store, store.matching("fe80::/64")) == {"fe80::1"}
+
+
+def test_matching_by_mac_prefix(store: DeviceStore) -> None:
+    assert _ips(store, store.matching("00:1a:2b")) == {"10.0.0.1"}
+    assert _ips(store, store.matching("00-1A")) == {"10.0.0.1", "10.2.0.9"}
+    assert _ips(store, store.matching("001a2c")) == {"10.2.0.9"}
+
+
+def test_short_bare_hex_words_match_text_not_macs(store: DeviceStore) -> None:
+    assert _ips(store, store.matching("cafe")) == {"10.2.0.9"}
+    assert _ips(store, store.matching("BEEF")) == {"10.2.0.9"}
+    assert _ips(store, store.matching("gateway")) == {"10.0.0.1"}
+
+
+def test_order_sorts_by_column(store: DeviceStore) -> None:
+    def ordered(key: str, descending: bool = False) -> list[str]:
+        return [store.record(row).ip for row in store.order(key, descending)]
+
+    assert ordered("ip") == ["10.0.0.1", "10.0.1.7", "10.2.0.9", "fe80::1"]
+    assert ordered("mac")[:3] == ["10.0.0.1", "10.2.0.9", "10.0.1.7"]
+    assert ordered("hostname", descending=True)[:2] == ["10.0.1.7", "10.2.0.9"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import socket
+import sys
+import threading
+
+import pytest
+
+from network_utility.discovery import _probe_port, probe_host, sweep_network, sweep_subnet
+from network_utility.models import DeviceRecord
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    stop = threading.Event()
+
+    def accept() -> None:
+        server.settimeout(0.05)
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                continue
+            conn.close()
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield server.getsockname()[1]
+    stop.set()
+    thread.join()
+    server.close()
+
+
+def _closed_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_probe_host_counts_accepts_and_refusals(listener: int) -> None:
+    assert asyncio.run(probe_host("127.0.0.1", [listener], 1.0)) == listener
+    closed = _closed_port()
+    assert asyncio.run(probe_host("127.0.0.1", [closed], 1.0)) == closed
+
+
+def test_probe_port_waits_for_the_connection_to_close(monkeypatch: pytest.MonkeyPatch) -> None:
+    class Writer:
+        closed = waited = False
+
+        def close(self) -> None:
+            self.closed = True
+
+        async def wait_closed(self) -> None:
+            self.waited = self.closed
+
+    writer = Writer()
+
+    async def open_connection(ip: str, port: int) -> tuple[None, Writer]:
+        return None, writer
+
+    monkeypatch.setattr(asyncio, "open_connection", open_connection)
+    assert asyncio.run(_probe_port("192.0.2.1", 80, 1.0)) == 80
+    assert writer.waited
+
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="macOS only configures 127.0.0.1")
+def test_sweep_reports_every_loopback_host(listener: int) -> None:
+    found: list[DeviceRecord] = []
+    count = sweep_subnet(ipaddress.ip_network("127.0.0.0/28"), found.append, ports=[listener], concurrency=4)
+    assert count == 14
+    assert {device.ip for device in found} == {f"127.0.0.{index}" for index in range(1, 15)}
+    assert all(device.note.startswith("Active: responded on tcp/") for device in found)
+
+
+def test_sweep_stops_when_asked(listener: int) -> None:
+    stop = threading.Event()
+    stop.set()
+    found: list[DeviceRecord] = []
+    hosts = iter(["127.0.0.1"] * 10)
+    assert asyncio.run(sweep_network(hosts, found.append, ports=[listener], stop_event=stop)) == 0
+    assert found == []
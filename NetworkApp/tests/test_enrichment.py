@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from network_utility import enrichment
+from network_utility.enrichment import (
+    _encode_name,
+    _mdns_query,
+    _netbios_query,
+    _parse_mdns_reply,
+    _parse_netbios_reply,
+    lookup_vendor,
+    resolve_names,
+    update_oui_registry,
+)
+
+
+def _mdns_reply(hostname: str) -> bytes:
+    question = _mdns_query("192.168.1.20")[12:]
+    answer = (
+        b"\xc0\x0c"  # pointer back to the question's name
+        + struct.pack("!HHIH", 12, 0x8001, 120, len(_encode_name(hostname)))
+        + _encode_name(hostname)
+    )
+    return struct.pack("!HHHHHH", 0, 0x8400, 1, 1, 0, 0) + question + answer
+
+
+def _netbios_entry(name: str, suffix: int, flags: int) -> bytes:
+    return name.encode("ascii").ljust(15) + bytes([suffix]) + struct.pack("!H", flags)
+
+
+def _netbios_reply(entries: list[bytes]) -> bytes:
+    question = _netbios_query()[12:-4]
+    body = bytes([len(entries)]) + b"".join(entries) + b"\0" * 46
+    return (
+        struct.pack("!HHHHHH", 0, 0x8400, 0, 1, 0, 0)
+        + question
+        + struct.pack("!HHIH", 0x21, 1, 0, len(body))
+        + body
+    )
+
+
+def test_parse_mdns_reply_follows_name_compression() -> None:
+    assert _parse_mdns_reply(_mdns_reply("living-room-tv.local")) == "living-room-tv"
+
+
+@pytest.mark.parametrize("data", [b"", b"\0" * 11, _mdns_reply("host.local")[:-5]])
+def test_parse_mdns_reply_tolerates_garbage(data: bytes) -> None:
+    assert _parse_mdns_reply(data) == ""
+
+
+def test_parse_netbios_reply_takes_the_unique_workstation_name() -> None:
+    reply = _netbios_reply([
+        _netbios_entry("WORKGROUP", 0x00, 0x8400),  # group name
+        _netbios_entry("DESKTOP-42", 0x20, 0x0400),  # file server service
+        _netbios_entry("DESKTOP-42", 0x00, 0x0400),
+    ])
+    assert _parse_netbios_reply(reply) == "DESKTOP-42"
+
+
+def test_parse_netbios_reply_tolerates_garbage() -> None:
+    assert _parse_netbios_reply(b"") == ""
+    assert _parse_netbios_reply(_netbios_reply([_netbios_entry("ONLY-GROUP", 0x00, 0x8000)])) == ""
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
+    table = {"001A2B": "Acme Large", "001A2B3": "Acme Medium", "001A2B3C4": "Acme Small"}
+    monkeypatch.setattr(enrichment, "_oui_registry", table)
+    return table
+
+
+def test_lookup_vendor_prefers_the_longest_assignment(registry: dict[str, str]) -> None:
+    assert lookup_vendor("00:1a:2b:3c:4d:5e") == "Acme Small"
+    assert lookup_vendor("00-1A-2B-3F-00-01") == "Acme Medium"
+    assert lookup_vendor("001a.2b99.0001") == "Acme Large"
+
+
+def test_lookup_vendor_flags_randomized_macs(registry: dict[str, str]) -> None:
+    assert lookup_vendor("da:a1:19:00:00:01") == "(locally administered / randomized)"
+    assert lookup_vendor("00:11:22:33:44:55") == ""
+    assert lookup_vendor("(unknown)") == ""
+
+
+def test_update_oui_registry_installs_files_and_reloads(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("NETWORK_UTILITY_HOME", str(tmp_path / "home"))
+    (tmp_path / "home").mkdir()
+    source = tmp_path / "oui.csv"
+    source.write_text('Registry,Assignment,Organization Name\nMA-L,F0F0F0,"Fresh Vendor, Inc."\n')
+    monkeypatch.setattr(enrichment, "_oui_registry", {})
+
+    assert update_oui_registry({"oui.csv": source.as_uri()}) == {"oui.csv": 1}
+    assert lookup_vendor("f0:f0:f0:00:00:01") == "Fresh Vendor, Inc."
+
+    empty = tmp_path / "empty.csv"
+    empty.write_text("Registry,Assignment,Organization Name\n")
+    with pytest.raises(ValueError):
+        update_oui_registry({"oui.csv": empty.as_uri()})
+    assert (tmp_path / "home" / "oui.csv").read_text() == source.read_text()
+
+
+def test_hung_reverse_lookups_do_not_block_the_others(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+
+    def gethostbyaddr(ip: str) -> tuple[str, list[str], list[str]]:
+        if ip.endswith((".1", ".2")):
+            release.wait(10)
+            raise socket.herror("hung")
+        return f"host-{ip.rsplit('.', 1)[1]}", [], [ip]
+
+    monkeypatch.setattr(socket, "gethostbyaddr", gethostbyaddr)
+    names: dict[str, str] = {}
+    started = time.monotonic()
+    try:
+        resolve_names(
+            [f"127.0.0.{index}" for index in range(1, 11)],
+            names.__setitem__,
+            concurrency=2,
+            timeout=0.3,
+        )
+    finally:
+        release.set()
+    # Two hung lookups cost one deadline each; the other eight still resolve.
+    assert names == {f"127.0.0.{index}": f"host-{index}" for index in range(3, 11)}
+    assert time.monotonic() - started < 3
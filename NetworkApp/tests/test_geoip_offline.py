@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from network_utility.geoip_offline import OfflineGeoIPDatabase, compile_database
+
+
+def _compile(tmp_path: Path, text: str) -> OfflineGeoIPDatabase:
+    source = tmp_path / "ranges.csv"
+    source.write_text(text, encoding="utf-8")
+    return OfflineGeoIPDatabase(compile_database(source, tmp_path / "ranges.csv.nugeo"))
+
+
+@pytest.fixture
+def database(tmp_path: Path):
+    database = _compile(
+        tmp_path,
+        "# start,end,country,org,asn\n"
+        "10.0.0.0/8,US,Wide Corp,100\n"
+        "10.1.0.0/16,DE,Nested GmbH,200\n"
+        "10.1.2.0/24,FR,Deeper SA,300\n"
+        "3232235776,3232236031,NL,Integer BV,0\n"
+        "2001:db8::,2001:db8::ffff,JP,V6 KK,400\n"
+        "2001:db8::/32,JP,Wide V6 KK,500\n"
+        "not,an,address\n",
+    )
+    yield database
+    database.close()
+
+
+def test_find_returns_the_range_record(database: OfflineGeoIPDatabase) -> None:
+    assert database.find("192.168.1.77") == ("NL", "Integer BV", "")
+    assert database.find("2001:db8::1") == ("JP", "V6 KK", "AS400")
+    assert database.find("2001:db8:1::1") == ("JP", "Wide V6 KK", "AS500")
+
+
+def test_nested_ranges_resolve_to_the_narrowest(database: OfflineGeoIPDatabase) -> None:
+    assert database.find("10.1.2.3") == ("FR", "Deeper SA", "AS300")
+    assert database.find("10.1.3.3") == ("DE", "Nested GmbH", "AS200")
+    # After the nested /16 the enclosing /8 applies again.
+    assert database.find("10.2.0.1") == ("US", "Wide Corp", "AS100")
+    assert database.find("10.0.0.1") == ("US", "Wide Corp", "AS100")
+    assert database.find("10.255.255.255") == ("US", "Wide Corp", "AS100")
+
+
+def test_addresses_outside_every_range_are_not_found(database: OfflineGeoIPDatabase) -> None:
+    assert database.find("11.0.0.0") is None
+    assert database.find("9.255.255.255") is None
+    assert database.find("2001:db9::1") is None
+    assert database.lookup("11.0.0.0")["status"] == "fail"
+
+
+def test_partial_overlap_goes_to_the_narrower_range(tmp_path: Path) -> None:
+    database = _compile(tmp_path, "1.0.0.0,1.0.0.99,AA,First,1\n1.0.0.50,1.0.0.200,BB,Second,2\n")
+    try:
+        assert database.find("1.0.0.10")[0] == "AA"
+        assert database.find("1.0.0.60")[0] == "AA"
+        assert database.find("1.0.0.150")[0] == "BB"
+    finally:
+        database.close()
+
+
+def test_tab_separated_ip2asn_layout(tmp_path: Path) -> None:
+    database = _compile(tmp_path, "1.0.0.0\t1.0.0.255\t13335\tUS\tCLOUDFLARENET\n")
+    try:
+        assert database.lookup("1.0.0.1")["as"] == "AS13335 CLOUDFLARENET"
+    finally:
+        database.close()
+
+
+@pytest.mark.parametrize("keep", [0, 10, 40, -8])
+def test_truncated_database_is_rejected(tmp_path: Path, keep: int) -> None:
+    _compile(tmp_path, "1.0.0.0,1.0.0.255,AA,First,1\n2001:db8::/32,BB,Second,2\n").close()
+    compiled = tmp_path / "ranges.csv.nugeo"
+    data = compiled.read_bytes()
+    compiled.write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        OfflineGeoIPDatabase(compiled)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from network_utility.inventory import DAY, DeviceInventory, normalize_mac
+from network_utility.models import DeviceRecord
+
+MAC_A = "00:1a:2b:3c:4d:5e"
+MAC_B = "a4:5e:60:0b:1c:2d"
+
+
+@pytest.fixture
+def inventory(tmp_path: Path) -> DeviceInventory:
+    inventory = DeviceInventory(tmp_path / "inventory.sqlite3")
+    assert inventory.available
+    return inventory
+
+
+def test_normalize_mac() -> None:
+    assert normalize_mac("00-1A-2B-3C-4D-5E") == MAC_A
+    assert normalize_mac("(unknown)") == ""
+    assert normalize_mac("<incomplete>") == ""
+
+
+def test_ingest_tracks_first_and_last_seen(inventory: DeviceInventory) -> None:
+    assert inventory.ingest([DeviceRecord("10.0.0.5", MAC_A, vendor="Acme")], seen_at=100.0) == 1
+    inventory.ingest([DeviceRecord("10.0.0.5", MAC_A.upper(), hostname="nas")], seen_at=200.0)
+    [device] = inventory.devices()
+    assert (device.ip, device.mac, device.hostname, device.vendor) == ("10.0.0.5", MAC_A, "nas", "Acme")
+    assert (device.first_seen, device.last_seen, device.seen_count) == (100.0, 200.0, 2)
+    assert inventory.scan_count() == 2
+
+
+def test_ip_keyed_sighting_is_folded_into_the_mac_device(inventory: DeviceInventory) -> None:
+    inventory.ingest([DeviceRecord("10.0.0.7", "(unknown)", hostname="printer")], seen_at=100.0)
+    [orphan] = inventory.devices()
+    assert orphan.mac == ""
+
+    inventory.ingest([DeviceRecord("10.0.0.7", MAC_B)], seen_at=300.0)
+    [device] = inventory.devices()
+    assert device.mac == MAC_B
+    assert device.hostname == "printer"
+    assert (device.first_seen, device.last_seen, device.seen_count) == (100.0, 300.0, 2)
+
+
+def test_folded_orphan_only_fills_in_what_the_device_lacks(inventory: DeviceInventory) -> None:
+    inventory.ingest([DeviceRecord("10.0.0.3", MAC_A, hostname="nas")], seen_at=50.0)
+    inventory.ingest(
+        [DeviceRecord("10.0.0.7", "(unknown)", hostname="old-name", vendor="Acme", note="rack 2")],
+        seen_at=100.0,
+    )
+    inventory.ingest([DeviceRecord("10.0.0.7", MAC_A)], seen_at=300.0)
+    [device] = inventory.devices()
+    assert (device.ip, device.hostname, device.vendor, device.note) == ("10.0.0.7", "nas", "Acme", "rack 2")
+    assert (device.first_seen, device.last_seen, device.seen_count) == (50.0, 300.0, 3)
+
+
+def test_one_mac_at_two_ips_counts_once_per_scan(inventory: DeviceInventory) -> None:
+    inventory.ingest(
+        [DeviceRecord("10.0.0.1", MAC_A, vendor="Acme"), DeviceRecord("10.0.0.2", MAC_A, hostname="router")],
+        seen_at=100.0,
+    )
+    [device] = inventory.devices()
+    assert (device.ip, device.hostname, device.vendor) == ("10.0.0.2", "router", "Acme")
+    assert device.seen_count == 1
+    assert {binding.ip for binding in inventory.ips_for_mac(MAC_A)} == {"10.0.0.1", "10.0.0.2"}
+
+
+def test_mac_changes_and_bindings(inventory: DeviceInventory) -> None:
+    inventory.ingest([DeviceRecord("10.0.0.1", MAC_A)], seen_at=100.0)
+    inventory.ingest([DeviceRecord("10.0.0.1", MAC_A)], seen_at=200.0)
+    assert inventory.mac_changes() == []
+
+    inventory.ingest([DeviceRecord("10.0.0.1", MAC_B), DeviceRecord("10.0.0.2", MAC_A)], seen_at=300.0)
+    [change] = inventory.mac_changes()
+    assert (change.seen_at, change.ip, change.old_mac, change.new_mac) == (300.0, "10.0.0.1", MAC_A, MAC_B)
+    assert inventory.mac_changes(ip="10.0.0.2") == []
+
+    assert [(b.ip, b.first_seen, b.seen_count) for b in inventory.ips_for_mac(MAC_A.upper())] == [
+        ("10.0.0.2", 300.0, 1),
+        ("10.0.0.1", 100.0, 2),
+    ]
+    assert [b.mac for b in inventory.macs_for_ip("10.0.0.1")] == [MAC_B, MAC_A]
+
+
+def test_not_seen_for(inventory: DeviceInventory) -> None:
+    now = 100 * DAY
+    inventory.ingest([DeviceRecord("10.0.0.1", MAC_A)], seen_at=now - 10 * DAY)
+    inventory.ingest([DeviceRecord("10.0.0.2", MAC_B)], seen_at=now - DAY)
+    assert [device.ip for device in inventory.not_seen_for(7, now=now)] == ["10.0.0.1"]
+    assert len(inventory.not_seen_for(0.5, now=now)) == 2
+
+
+def test_empty_scan_is_not_recorded(inventory: DeviceInventory) -> None:
+    assert inventory.ingest([]) == 0
+    assert inventory.scan_count() == 0
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from network_utility import ip_cache
+from network_utility.ip_cache import IPLookupCache, reserved_result
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def cache(tmp_path: Path, clock: Clock) -> IPLookupCache:
+    return IPLookupCache(tmp_path / "ip_cache.sqlite3", ttl=100, negative_ttl=10, clock=clock)
+
+
+def _success(ip: str, org: str = "Example Org") -> dict[str, str]:
+    return {"status": "success", "query": ip, "country": "NL", "org": org, "as": "AS64500 Example"}
+
+
+def test_success_expires_after_the_ttl(cache: IPLookupCache, clock: Clock) -> None:
+    cache.put(_success("93.184.216.5"))
+    clock.now += 99
+    assert cache.get("93.184.216.5")["org"] == "Example Org"
+    clock.now += 2
+    assert cache.get("93.184.216.5") is None
+    # Still there for when ip-api cannot be reached.
+    assert cache.get("93.184.216.5", allow_stale=True)["org"] == "Example Org"
+
+
+def test_failures_are_cached_for_the_negative_ttl(cache: IPLookupCache, clock: Clock) -> None:
+    cache.put({"status": "fail", "message": "timeout", "query": "80.80.80.7"})
+    assert cache.get("80.80.80.7")["message"] == "timeout"
+    clock.now += 11
+    assert cache.get("80.80.80.7") is None
+    # A failure says nothing about its neighbours.
+    assert cache.get("80.80.80.8") is None
+
+
+def test_reserved_ranges_are_answered_locally_not_cached(cache: IPLookupCache) -> None:
+    assert reserved_result("192.168.1.10")["message"] == "private range"
+    assert reserved_result("8.8.8.8") is None
+    cache.put({"status": "fail", "message": "private range", "query": "10.0.0.1"})
+    assert cache.get("10.0.0.1") is None
+
+
+def test_results_are_reused_within_the_covering_prefix(cache: IPLookupCache, clock: Clock) -> None:
+    cache.put(_success("93.184.216.5"))
+    reused = cache.get("93.184.216.200")
+    assert reused["query"] == "93.184.216.200"
+    assert reused["org"] == "Example Org"
+    assert cache.get("93.184.217.5") is None
+
+    cache.put(_success("2a00:1450:1:2::1", org="V6 Org"))
+    assert cache.get("2a00:1450:1:ffff::9")["org"] == "V6 Org"
+    assert cache.get("2a00:1450:2::1") is None
+
+    clock.now += 101
+    assert cache.get("93.184.216.200") is None
+
+
+def test_exact_entry_wins_over_the_prefix(cache: IPLookupCache) -> None:
+    cache.put(_success("93.184.216.5", org="First"))
+    cache.put(_success("93.184.216.6", org="Second"))
+    assert cache.get("93.184.216.5")["org"] == "First"
+
+
+def test_entries_persist_in_sqlite(tmp_path: Path, cache: IPLookupCache, clock: Clock) -> None:
+    cache.put(_success("93.184.216.5"))
+    reopened = IPLookupCache(tmp_path / "ip_cache.sqlite3", ttl=100, clock=clock)
+    assert reopened.get("93.184.216.5")["org"] == "Example Org"
+    reopened.clear()
+    assert IPLookupCache(tmp_path / "ip_cache.sqlite3", clock=clock).get("93.184.216.5") is None
+
+
+def test_memory_is_bounded(tmp_path: Path, clock: Clock) -> None:
+    cache = IPLookupCache(tmp_path / "ip_cache.sqlite3", max_entries=4, clock=clock)
+    for index in range(10):
+        cache.put(_success(f"93.184.{index}.1"))
+    assert len(cache._memory) == 4
+    # Evicted entries come back from SQLite.
+    assert cache.get("93.184.0.1")["org"] == "Example Org"
+
+
+def test_default_cache_ttls_come_from_the_environment(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("NETWORK_UTILITY_HOME", str(tmp_path))
+    monkeypatch.setenv(ip_cache.TTL_ENV, "3600")
+    monkeypatch.setenv(ip_cache.NEGATIVE_TTL_ENV, "soon")
+    monkeypatch.setattr(ip_cache, "_default_cache", None)
+    cache = ip_cache.get_default_cache()
+    assert cache.ttl == 3600
+    assert cache.negative_ttl == ip_cache.DEFAULT_NEGATIVE_TTL
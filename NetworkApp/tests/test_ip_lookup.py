@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from email.message import Message
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+from network_utility import ip_lookup
+from network_utility.ip_lookup import BATCH_ATTEMPTS, MAX_RATE_LIMIT_WAITS, lookup_ip_batch, parse_ip_list
+
+
+def _public(count: int) -> list[str]:
+    return [f"8.{index // 250}.{index % 250}.1" for index in range(count)]
+
+
+def _answer(ips: list[str]) -> list[dict[str, str]]:
+    return [{"status": "success", "query": ip} for ip in ips]
+
+
+def _too_many(ttl: str | None) -> HTTPError:
+    headers = None
+    if ttl is not None:
+        headers = Message()
+        headers["X-Ttl"] = ttl
+    return HTTPError("http://ip-api.com/batch", 429, "Too Many Requests", headers, None)
+
+
+@pytest.fixture
+def pauses(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    waited: list[float] = []
+
+    def pause(seconds: float, stop_event: object) -> bool:
+        waited.append(seconds)
+        return False
+
+    monkeypatch.setattr(ip_lookup, "_pause", pause)
+    return waited
+
+
+def test_parse_ip_list_pulls_unique_addresses_from_log_lines() -> None:
+    text = (
+        "Jan 1 DROP SRC=203.0.113.5 DST=10.0.0.2 PROTO=TCP\n"
+        "Jan 1 DROP SRC=203.0.113.5 DST=2001:db8::1 PROTO=UDP\n"
+        "version 1.2.3.4.5 and 999.1.1.1 are not addresses\n"
+    )
+    assert parse_ip_list(text) == ["203.0.113.5", "10.0.0.2", "2001:db8::1"]
+
+
+def test_batch_is_deduplicated_and_sent_in_chunks_of_100(
+    monkeypatch: pytest.MonkeyPatch, pauses: list[float]
+) -> None:
+    sent: list[list[str]] = []
+
+    def post(ips: list[str]) -> tuple[list[dict[str, str]], int | None, int]:
+        sent.append(list(ips))
+        return _answer(ips), 10, 60
+
+    monkeypatch.setattr(ip_lookup, "_post_batch", post)
+    ips = _public(250)
+    results: list[dict[str, str]] = []
+    assert lookup_ip_batch(ips + ips[:10] + ["192.168.1.1"], results.append, use_cache=False) == 251
+    assert [len(chunk) for chunk in sent] == [100, 100, 50]
+    assert len(results) == 251
+    assert pauses == []
+
+
+def test_batch_waits_out_the_window_when_no_requests_remain(
+    monkeypatch: pytest.MonkeyPatch, pauses: list[float]
+) -> None:
+    monkeypatch.setattr(ip_lookup, "_post_batch", lambda ips: (_answer(ips), 0, 12))
+    results: list[dict[str, str]] = []
+    lookup_ip_batch(_public(300), results.append, use_cache=False)
+    # X-Rl hit zero after each request; no wait after the last one.
+    assert pauses == [13, 13]
+    assert len(results) == 300
+
+
+def test_failing_batch_is_retried_then_reported(monkeypatch: pytest.MonkeyPatch, pauses: list[float]) -> None:
+    calls: list[int] = []
+
+    def post(ips: list[str]) -> tuple[list[dict[str, str]], int | None, int]:
+        calls.append(len(ips))
+        raise URLError("unreachable")
+
+    monkeypatch.setattr(ip_lookup, "_post_batch", post)
+    results: list[dict[str, str]] = []
+    lookup_ip_batch(_public(150), results.append, use_cache=False)
+    assert len(calls) == 2 * BATCH_ATTEMPTS
+    assert len(pauses) == 2 * (BATCH_ATTEMPTS - 1)
+    assert len(results) == 150
+    assert all(result["status"] == "fail" and "unreachable" in result["message"] for result in results)
+
+
+def test_rate_limited_batches_give_up_after_the_cap(
+    monkeypatch: pytest.MonkeyPatch, pauses: list[float]
+) -> None:
+    def post(ips: list[str]) -> tuple[list[dict[str, str]], int | None, int]:
+        raise _too_many("30")
+
+    monkeypatch.setattr(ip_lookup, "_post_batch", post)
+    results: list[dict[str, str]] = []
+    lookup_ip_batch(_public(150), results.append, use_cache=False)
+    assert pauses == [31] * MAX_RATE_LIMIT_WAITS
+    assert len(results) == 150
+    assert {result["message"] for result in results} == {"rate limited by ip-api.com"}
+
+
+def test_rate_limit_without_headers_uses_the_default_window(
+    monkeypatch: pytest.MonkeyPatch, pauses: list[float]
+) -> None:
+    replies = iter([_too_many(None)])
+
+    def post(ips: list[str]) -> tuple[list[dict[str, str]], int | None, int]:
+        error = next(replies, None)
+        if error is not None:
+            raise error
+        return _answer(ips), 10, 60
+
+    monkeypatch.setattr(ip_lookup, "_post_batch", post)
+    results: list[dict[str, str]] = []
+    lookup_ip_batch(_public(2), results.append, use_cache=False)
+    assert pauses == [61]
+    assert [result["status"] for result in results] == ["success", "success"]
+
+
+def test_single_miss_uses_the_single_lookup(monkeypatch: pytest.MonkeyPatch) -> None:
+    looked_up: list[str] = []
+
+    def single(ip: str, use_cache: bool = True) -> dict[str, str]:
+        looked_up.append(ip)
+        return {"status": "success", "query": ip}
+
+    monkeypatch.setattr(ip_lookup, "lookup_ip_details", single)
+    monkeypatch.setattr(ip_lookup, "_post_batch", lambda ips: pytest.fail("batch used for one address"))
+    results: list[dict[str, str]] = []
+    lookup_ip_batch(["8.8.8.8", "8.8.8.8"], results.append, use_cache=False)
+    assert looked_up == ["8.8.8.8"]
+    assert len(results) == 1
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import socket
+import time
+
+import pytest
+
+from network_utility.latency import LatencyMonitor, TargetStats
+
+
+def test_target_stats_ring_keeps_only_the_window() -> None:
+    stats = TargetStats("10.0.0.1", "gw", window=4)
+    for rtt in (0.001, None, 0.003, 0.002, 0.004, None):
+        stats.add(rtt)
+    summary = stats.summary()
+    assert summary.sent == 6
+    assert summary.loss == 0.25
+    assert summary.last is None
+    assert summary.minimum == 0.002
+    assert sum(summary.histogram) == 4
+
+
+def test_start_reraises_a_startup_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    monitor = LatencyMonitor(method="tcp")
+
+    def broken() -> None:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(monitor, "_sync_tasks", broken)
+    with pytest.raises(RuntimeError, match="boom"):
+        monitor.start()
+    assert not monitor.running
+    monitor.set_targets({"127.0.0.1": "lo"})
+
+
+def test_probes_loopback_and_survives_target_changes_around_stop() -> None:
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(16)
+        port = listener.getsockname()[1]
+        monitor = LatencyMonitor(method="tcp", interval=0.1, timeout=1.0, ports=(port,))
+        monitor.set_targets({"127.0.0.1": "lo"})
+        monitor.start()
+        try:
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and not monitor.snapshot()[0].sent:
+                time.sleep(0.05)
+        finally:
+            monitor.stop()
+    assert monitor.snapshot()[0].sent > 0
+    assert monitor.snapshot()[0].minimum is not None
+    monitor.set_targets({})
+    assert monitor.snapshot() == []
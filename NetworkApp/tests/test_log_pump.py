@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from network_utility.log_pump import (
+    LOG_POLL_BACKLOG_MS,
+    LOG_POLL_BUSY_MS,
+    LOG_POLL_IDLE_MS,
+    LogPump,
+    excess_lines,
+)
+
+
+def _fill(pump: LogPump, count: int) -> None:
+    for index in range(count):
+        pump.queue.put(f"line {index}")
+
+
+def test_drain_stops_at_the_limit_and_polls_again_at_once() -> None:
+    pump = LogPump(limit=2000)
+    _fill(pump, 2500)
+    first = pump.drain(scrollback=10_000)
+    assert len(first) == 2000
+    assert first[0] == "line 0"
+    assert pump.poll_ms == LOG_POLL_BACKLOG_MS
+
+    second = pump.drain(scrollback=10_000)
+    assert second == [f"line {index}" for index in range(2000, 2500)]
+    assert pump.poll_ms == LOG_POLL_BUSY_MS
+
+
+def test_idle_poll_interval_backs_off_to_the_cap() -> None:
+    pump = LogPump()
+    intervals = []
+    for _ in range(6):
+        assert pump.drain(scrollback=100) == []
+        intervals.append(pump.poll_ms)
+    assert intervals == [100, 200, LOG_POLL_IDLE_MS, LOG_POLL_IDLE_MS, LOG_POLL_IDLE_MS, LOG_POLL_IDLE_MS]
+    pump.queue.put("wake")
+    assert pump.drain(scrollback=100) == ["wake"]
+    assert pump.poll_ms == LOG_POLL_BUSY_MS
+
+
+def test_batch_keeps_only_the_newest_scrollback_lines() -> None:
+    pump = LogPump()
+    _fill(pump, 250)
+    assert pump.drain(scrollback=100) == [f"line {index}" for index in range(150, 250)]
+    assert pump.queue.empty()
+
+
+def test_excess_lines() -> None:
+    assert excess_lines(90, 100) == 0
+    assert excess_lines(100, 100) == 0
+    assert excess_lines(130, 100) == 30
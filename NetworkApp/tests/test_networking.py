@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from network_utility.networking import parse_arp_output, parse_default_gateway
+
+WINDOWS_ARP = """
+Interface: 192.168.1.100 --- 0xb
+  Internet Address      Physical Address      Type
+  192.168.1.1           00-1a-2b-3c-4d-5e     dynamic
+  192.168.1.20          a4-5e-60-0b-1c-2d     dynamic
+  192.168.1.255         ff-ff-ff-ff-ff-ff     static
+"""
+
+LINUX_ARP = """\
+? (192.168.1.1) at 00:1a:2b:3c:4d:5e [ether] on eth0
+router.lan (192.168.1.20) at a4:5e:60:0b:1c:2d [ether] on eth0
+? (192.168.1.30) at <incomplete> on eth0
+"""
+
+MACOS_ARP = """\
+? (192.168.1.1) at 0:1a:2b:3c:4d:5e on en0 ifscope [ethernet]
+? (192.168.1.20) at a4:5e:60:b:1c:2d on en0 ifscope [ethernet]
+? (192.168.1.30) at (incomplete) on en0 ifscope [ethernet]
+"""
+
+WINDOWS_ROUTES = """\
+===========================================================================
+IPv4 Route Table
+===========================================================================
+Active Routes:
+Network Destination        Netmask          Gateway       Interface  Metric
+          0.0.0.0          0.0.0.0         On-link     192.168.1.100     35
+          0.0.0.0          0.0.0.0      192.168.1.1    192.168.1.100     25
+        127.0.0.0        255.0.0.0         On-link         127.0.0.1    331
+"""
+
+LINUX_ROUTES = """\
+10.8.0.0/24 via 10.0.0.1 dev tun0 proto static metric 50
+default via 192.168.1.1 dev eth0 proto dhcp src 192.168.1.100 metric 100
+"""
+
+MACOS_ROUTES = """\
+Routing tables
+
+Internet:
+Destination        Gateway            Flags        Netif Expire
+default            192.168.1.1        UGScg          en0
+127                127.0.0.1          UCS            lo0
+"""
+
+
+def _pairs(output: str) -> list[tuple[str, str]]:
+    return [(device.ip, device.mac) for device in parse_arp_output(output)]
+
+
+def test_parse_arp_output_windows() -> None:
+    assert _pairs(WINDOWS_ARP)[:2] == [
+        ("192.168.1.1", "00:1a:2b:3c:4d:5e"),
+        ("192.168.1.20", "a4:5e:60:0b:1c:2d"),
+    ]
+
+
+def test_parse_arp_output_linux_keeps_incomplete_entries_as_unknown() -> None:
+    assert _pairs(LINUX_ARP) == [
+        ("192.168.1.1", "00:1a:2b:3c:4d:5e"),
+        ("192.168.1.20", "a4:5e:60:0b:1c:2d"),
+        ("192.168.1.30", "(unknown)"),
+    ]
+
+
+def test_parse_arp_output_macos_pads_short_mac_groups() -> None:
+    assert _pairs(MACOS_ARP) == [
+        ("192.168.1.1", "00:1a:2b:3c:4d:5e"),
+        ("192.168.1.20", "a4:5e:60:0b:1c:2d"),
+        ("192.168.1.30", "(unknown)"),
+    ]
+
+
+def test_parse_arp_output_ignores_noise() -> None:
+    assert parse_arp_output("No ARP Entries Found.\n") == []
+
+
+def test_parse_default_gateway_windows_skips_on_link() -> None:
+    assert parse_default_gateway(WINDOWS_ROUTES, windows=True) == "192.168.1.1"
+
+
+def test_parse_default_gateway_linux() -> None:
+    assert parse_default_gateway(LINUX_ROUTES, windows=False) == "192.168.1.1"
+
+
+def test_parse_default_gateway_macos() -> None:
+    assert parse_default_gateway(MACOS_ROUTES, windows=False) == "192.168.1.1"
+
+
+def test_parse_default_gateway_without_a_default_route() -> None:
+    assert parse_default_gateway("10.8.0.0/24 via 10.0.0.1 dev tun0\n", windows=False) == ""
+    assert parse_default_gateway(WINDOWS_ROUTES.replace("192.168.1.1 ", "On-link"), windows=True) == ""
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from network_utility.port_scan import grab_banner, parse_ports, scan_ports
+
+
+def test_parse_ports_expands_ranges_and_drops_duplicates() -> None:
+    assert parse_ports("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    assert parse_ports("") == []
+
+
+@pytest.mark.parametrize("spec", ["0", "65536", "90-80", "http", "1-2-3"])
+def test_parse_ports_rejects_invalid_input(spec: str) -> None:
+    with pytest.raises(ValueError):
+        parse_ports(spec)
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    stop = threading.Event()
+
+    def accept() -> None:
+        server.settimeout(0.05)
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                continue
+            conn.close()
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield server.getsockname()[1]
+    stop.set()
+    thread.join()
+    server.close()
+
+
+def _closed_port() -> int:
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def test_scan_ports_reports_open_and_closed_ports(listener: int) -> None:
+    closed = _closed_port()
+    records = []
+    open_count = scan_ports(
+        ["127.0.0.1"], [listener, closed], records.append, banners=False, host_rate=0, report_closed=True
+    )
+    states = {record.port: record.state for record in records}
+    assert open_count == 1
+    assert states == {listener: "open", closed: "closed"}
+
+
+def test_scan_ports_only_reports_open_ports_by_default(listener: int) -> None:
+    records = []
+    scan_ports(["127.0.0.1"], [listener, _closed_port()], records.append, banners=False, host_rate=0)
+    assert [record.port for record in records] == [listener]
+
+
+def _banner(port: int, greeting: bytes) -> tuple[str, bytes]:
+    # The port only decides the protocol, so a socket pair stands in for it.
+    client, server = socket.socketpair()
+
+    async def run() -> str:
+        client.setblocking(False)
+        return await grab_banner(asyncio.get_running_loop(), client, port)
+
+    server.sendall(greeting)
+    try:
+        banner = asyncio.run(run())
+        server.setblocking(False)
+        try:
+            sent = server.recv(1024)
+        except BlockingIOError:
+            sent = b""
+        return banner, sent
+    finally:
+        client.close()
+        server.close()
+
+
+def test_grab_banner_reads_server_first_greeting() -> None:
+    banner, sent = _banner(22, b"SSH-2.0-OpenSSH_9.6\r\n")
+    assert banner == "SSH-2.0-OpenSSH_9.6"
+    assert sent == b""
+
+
+def test_grab_banner_sends_head_and_keeps_server_header() -> None:
+    banner, sent = _banner(80, b"HTTP/1.0 200 OK\r\nDate: now\r\nServer: nginx\r\n\r\n")
+    assert banner == "HTTP/1.0 200 OK | Server: nginx"
+    assert sent.startswith(b"HEAD / HTTP/1.0")
+
+
+def test_grab_banner_skips_unknown_protocols() -> None:
+    assert _banner(12345, b"hello\r\n")[0] == ""
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from network_utility.models import STATUS_FAILED, STATUS_OK, ScriptResult
+from network_utility.run_history import RunHistory, percentile
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> RunHistory:
+    return RunHistory(tmp_path / "run_history.sqlite3")
+
+
+def _record(history: RunHistory, path: str, durations: list[float], status: str = STATUS_OK) -> None:
+    for duration in durations:
+        history.record(path, ScriptResult(0, duration=duration, peak_rss=1024), status)
+
+
+def test_percentile_is_nearest_rank() -> None:
+    assert percentile([], 0.95) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([float(value) for value in range(1, 21)], 0.95) == 19.0
+    assert percentile([5.0], 0.95) == 5.0
+
+
+def test_stats_are_per_script_and_ignore_failed_runs(history: RunHistory) -> None:
+    _record(history, "a.py", [1.0, 2.0, 3.0])
+    _record(history, "b.py", [10.0])
+    _record(history, "a.py", [60.0], status=STATUS_FAILED)
+
+    stats = history.stats("a.py")
+    assert (stats.runs, stats.last_duration, stats.p95_duration) == (3, 60.0, 3.0)
+    assert history.stats("b.py").p95_duration == 10.0
+    assert history.stats("missing.py") is None
+    assert history.scripts() == ["a.py", "b.py"]
+
+
+def test_regressions_need_a_baseline(history: RunHistory) -> None:
+    _record(history, "a.py", [1.0, 1.0, 1.0, 1.0, 5.0])
+    assert history.regressions() == []
+
+
+def test_regressions_use_the_factor_and_noise_floor(history: RunHistory) -> None:
+    _record(history, "slow.py", [1.0] * 6 + [2.0])
+    _record(history, "same.py", [1.0] * 6 + [1.4])
+    _record(history, "tiny.py", [0.01] * 6 + [0.04])
+
+    [regression] = history.regressions()
+    assert (regression.path, regression.metric) == ("slow.py", "duration")
+    assert (regression.value, regression.baseline) == (2.0, 1.0)
+    assert history.regressions(factor=1.3)[0].path in {"same.py", "slow.py"}
+    assert len(history.regressions(factor=1.3)) == 2
+
+
+def test_regressions_compare_against_the_window(history: RunHistory) -> None:
+    _record(history, "a.py", [1.0] * 8 + [3.0, 3.0])
+    assert len(history.regressions(window=50)) == 2
+    # With a two-run window the last run's baseline already includes a slow run.
+    assert len(history.regressions(window=2)) == 1
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from network_utility.models import ScriptJob
+from network_utility.run_history import RunHistory
+from network_utility.script_executor import (
+    STATUS_CANCELLED,
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_RUNNING,
+    STATUS_SKIPPED,
+    STATUS_TIMED_OUT,
+    STATUS_WAITING,
+    ScriptQueueExecutor,
+    order_jobs,
+)
+
+
+def test_order_jobs_puts_dependencies_first() -> None:
+    jobs = [ScriptJob("report", ["backup", "fetch"]), ScriptJob("backup", ["fetch"]), ScriptJob("fetch")]
+    assert order_jobs(jobs) == ["fetch", "backup", "report"]
+
+
+def test_order_jobs_rejects_unknown_dependencies() -> None:
+    with pytest.raises(ValueError, match="not queued: missing"):
+        order_jobs([ScriptJob("report", ["missing"])])
+
+
+def test_order_jobs_rejects_cycles() -> None:
+    jobs = [ScriptJob("a", ["c"]), ScriptJob("b", ["a"]), ScriptJob("c", ["b"]), ScriptJob("d")]
+    with pytest.raises(ValueError, match="cycle between: a, b, c"):
+        order_jobs(jobs)
+
+
+def _script(tmp_path: Path, name: str, body: str) -> str:
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def _executor(tmp_path: Path, jobs: list[ScriptJob]) -> ScriptQueueExecutor:
+    return ScriptQueueExecutor(
+        jobs, workers=2, log_dir=tmp_path / "logs", history=RunHistory(tmp_path / "history.sqlite3")
+    )
+
+
+def test_failed_script_skips_everything_that_depends_on_it(tmp_path: Path) -> None:
+    fail = _script(tmp_path, "fail.py", "raise SystemExit(3)\n")
+    child = _script(tmp_path, "child.py", "print('should not run')\n")
+    grandchild = _script(tmp_path, "grandchild.py", "print('should not run')\n")
+    other = _script(tmp_path, "other.py", "print('independent')\n")
+    finished = []
+    executor = _executor(
+        tmp_path,
+        [ScriptJob(fail), ScriptJob(child, [fail]), ScriptJob(grandchild, [child]), ScriptJob(other)],
+    )
+    executor.on_finished = lambda job, result: finished.append((job.path, result.returncode))
+
+    statuses = executor.run()
+
+    assert statuses == {
+        fail: STATUS_FAILED, child: STATUS_SKIPPED, grandchild: STATUS_SKIPPED, other: STATUS_OK
+    }
+    assert sorted(finished) == sorted([(fail, 3), (other, 0)])
+
+
+def test_dependants_run_after_success_and_timeouts_are_reported(tmp_path: Path) -> None:
+    marker = tmp_path / "marker"
+    first = _script(tmp_path, "first.py", f"open({str(marker)!r}, 'w').write('done')\n")
+    second = _script(tmp_path, "second.py", f"assert open({str(marker)!r}).read() == 'done'\n")
+    slow = _script(tmp_path, "slow.py", "import time\ntime.sleep(30)\n")
+
+    statuses = _executor(
+        tmp_path, [ScriptJob(second, [first]), ScriptJob(first), ScriptJob(slow, timeout=0.5)]
+    ).run()
+
+    assert statuses == {first: STATUS_OK, second: STATUS_OK, slow: STATUS_TIMED_OUT}
+
+
+def test_cancelling_a_waiting_job_marks_it_cancelled_at_once(tmp_path: Path) -> None:
+    slow = _script(tmp_path, "slow.py", "import time\ntime.sleep(1)\n")
+    waiting = _script(tmp_path, "waiting.py", "print('should not run')\n")
+    after = _script(tmp_path, "after.py", "print('should not run')\n")
+    executor = _executor(tmp_path, [ScriptJob(slow), ScriptJob(waiting, [slow]), ScriptJob(after, [waiting])])
+    seen: list[tuple[str, str]] = []
+
+    def on_status(path: str, status: str) -> None:
+        seen.append((path, status))
+        if (path, status) == (slow, STATUS_RUNNING):
+            executor.cancel(waiting)
+            # Already reported, long before slow.py finishes.
+            assert seen[-2:] == [(waiting, STATUS_CANCELLED), (after, STATUS_SKIPPED)]
+
+    executor.on_status = on_status
+    statuses = executor.run()
+
+    assert statuses == {slow: STATUS_OK, waiting: STATUS_CANCELLED, after: STATUS_SKIPPED}
+    assert [status for path, status in seen if path == waiting] == [STATUS_WAITING, STATUS_CANCELLED]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from network_utility import script_runner
+from network_utility.script_runner import MAX_LINE_BYTES, _OutputCollector, prune_run_logs, run_script
+
+
+def _collect(monkeypatch: pytest.MonkeyPatch, data: bytes, tail_lines: int = 10) -> list[str]:
+    monkeypatch.setattr(script_runner.locale, "getpreferredencoding", lambda do_setlocale=True: "utf-8")
+    seen: list[str] = []
+    collector = _OutputCollector(None, tail_lines, lambda stream, line: seen.append(line))
+    collector.pump("stdout", io.BytesIO(data))
+    return seen
+
+
+def test_long_lines_are_cut_at_the_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    lines = _collect(monkeypatch, b"x" * (2 * MAX_LINE_BYTES + 5) + b"\nshort\n")
+    assert [len(line) for line in lines] == [MAX_LINE_BYTES, MAX_LINE_BYTES, 5, 5]
+    assert lines[-1] == "short"
+
+
+def test_cut_never_splits_a_multibyte_character(monkeypatch: pytest.MonkeyPatch) -> None:
+    lines = _collect(monkeypatch, b"a" * (MAX_LINE_BYTES - 1) + "é€".encode() + b"\n")
+    assert lines == ["a" * (MAX_LINE_BYTES - 1), "é€"]
+    assert "�" not in "".join(lines)
+
+
+def test_output_without_trailing_newline_is_kept(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert _collect(monkeypatch, b"one\r\n\ntwo") == ["one", "", "two"]
+
+
+def _script(tmp_path: Path, name: str, body: str) -> str:
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def test_run_script_keeps_a_tail_and_spills_everything_to_the_log(tmp_path: Path) -> None:
+    path = _script(
+        tmp_path,
+        "chatty.py",
+        "import sys\n"
+        "for index in range(50):\n"
+        "    print(f'line {index}')\n"
+        "print('oops', file=sys.stderr)\n"
+        "sys.exit(5)\n",
+    )
+    streamed: list[tuple[str, str]] = []
+    result = run_script(
+        path,
+        on_line=lambda stream, line: streamed.append((stream, line)),
+        log_dir=tmp_path / "logs",
+        tail_lines=3,
+    )
+
+    assert result.returncode == 5
+    assert result.error is None
+    assert result.stdout == "line 47\nline 48\nline 49"
+    assert result.stderr == "oops"
+    assert len(streamed) == 51
+    assert ("stderr", "oops") in streamed
+    log = Path(result.log_path).read_text(encoding="utf-8").splitlines()
+    assert log[0] == "line 0"
+    assert "[stderr] oops" in log
+    assert len(log) == 51
+    assert result.duration > 0
+    if sys.platform.startswith("linux"):
+        assert result.peak_rss > 0
+        assert result.cpu_user + result.cpu_system > 0
+
+
+def test_run_script_reports_timeouts_and_unsupported_files(tmp_path: Path) -> None:
+    result = run_script(_script(tmp_path, "slow.py", "import time\ntime.sleep(30)\n"), timeout=0.3)
+    assert result.error == "Timed out after 0.3s"
+    assert result.returncode is not None
+    assert run_script(str(tmp_path / "notes.txt")).error == "Unsupported extension: .txt"
+
+
+def test_prune_run_logs_keeps_the_newest(tmp_path: Path) -> None:
+    for index in range(5):
+        log = tmp_path / f"{index}.log"
+        log.write_text("")
+        os.utime(log, (index, index))
+    prune_run_logs(tmp_path, keep=2)
+    assert sorted(path.name for path in tmp_path.glob("*.log")) == ["3.log", "4.log"]
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_relative_scripts_run_in_the_given_cwd(tmp_path: Path, warm: bool) -> None:
+    from network_utility.warm_pool import WarmPythonPool
+
+    if warm and not WarmPythonPool.is_supported():
+        pytest.skip("the warm pool needs fork() and Unix domain sockets")
+    _script(tmp_path, "where.py", "import os\nprint(os.getcwd())\n")
+    pool = WarmPythonPool() if warm else None
+    try:
+        result = run_script("where.py", cwd=str(tmp_path), python_pool=pool)
+    finally:
+        if pool is not None:
+            pool.close()
+    assert result.returncode == 0
+    assert result.stdout == str(tmp_path)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from network_utility.script_runner import kill_process_tree
+from network_utility.warm_pool import _POOLS, WarmPythonPool
+
+pytestmark = pytest.mark.skipif(not WarmPythonPool.is_supported(), reason="needs fork() and AF_UNIX")
+
+
+@pytest.fixture
+def pool():
+    pool = WarmPythonPool(preload=())
+    yield pool
+    pool.close()
+
+
+def test_spawn_runs_script_with_args_and_exit_code(pool: WarmPythonPool, tmp_path: Path) -> None:
+    script = tmp_path / "echo.py"
+    script.write_text("import sys\nprint(' '.join(sys.argv[1:]))\nsys.exit(3)\n")
+    process = pool.spawn(str(script), ["a", "b"], cwd=str(tmp_path))
+    assert process.stdout.read() == b"a b\n"
+    assert process.wait() == 3
+    process.stdout.close()
+    process.stderr.close()
+
+
+def test_kill_right_after_spawn_reaches_the_script(pool: WarmPythonPool, tmp_path: Path) -> None:
+    # spawn() only returns once the child leads its own process group, so an
+    # immediate cancel must not be lost.
+    script = tmp_path / "sleep.py"
+    script.write_text("import time\ntime.sleep(30)\n")
+    for _ in range(5):
+        process = pool.spawn(str(script))
+        started = time.monotonic()
+        kill_process_tree(process)
+        assert process.wait() == -signal.SIGKILL
+        assert time.monotonic() - started < 5
+        process.stdout.close()
+        process.stderr.close()
+
+
+def test_kill_after_exit_is_a_no_op(pool: WarmPythonPool, tmp_path: Path) -> None:
+    script = tmp_path / "quick.py"
+    script.write_text("")
+    process = pool.spawn(str(script))
+    assert process.wait() == 0
+    kill_process_tree(process)
+    assert process.wait() == 0
+    # The server still serves new scripts afterwards.
+    again = pool.spawn(str(script))
+    assert again.wait() == 0
+    for handle in (process, again):
+        handle.stdout.close()
+        handle.stderr.close()
+
+
+def test_pools_are_not_kept_alive_for_atexit() -> None:
+    before = len(_POOLS)
+    pool = WarmPythonPool(preload=())
+    assert pool in _POOLS
+    del pool
+    assert len(_POOLS) == before
+
+
+def test_script_starts_like_a_fresh_interpreter(pool: WarmPythonPool, tmp_path: Path) -> None:
+    script = tmp_path / "probe.py"
+    script.write_text(
+        "import os, signal, time\n"
+        "fds = os.listdir('/proc/self/fd') if os.path.isdir('/proc/self/fd') else []\n"
+        "links = []\n"
+        "for fd in fds:\n"
+        "    try:\n"
+        "        links.append(os.readlink(f'/proc/self/fd/{fd}'))\n"
+        "    except OSError:\n"
+        "        pass\n"
+        "print('epoll' if any('eventpoll' in link for link in links) else 'clean')\n"
+        "try:\n"
+        "    os.kill(os.getpid(), signal.SIGINT)\n"
+        "    time.sleep(5)\n"
+        "except KeyboardInterrupt:\n"
+        "    print('interrupted')\n"
+    )
+    process = pool.spawn(str(script))
+    output = process.stdout.read().decode().split()
+    errors = process.stderr.read().decode()
+    assert process.wait() == 0, errors
+    # No selector (epoll) fd leaked in from the fork-server, and SIGINT
+    # raises KeyboardInterrupt instead of killing the script outright.
+    assert output == ["clean", "interrupted"]
+    process.stdout.close()
+    process.stderr.close()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from network_utility.models import DeviceRecord
+from network_utility.watch import diff_devices, mac_change_note
+
+
+def _previous(*devices: DeviceRecord) -> dict[str, DeviceRecord]:
+    return {device.ip: device for device in devices}
+
+
+def test_unchanged_devices_produce_an_empty_diff() -> None:
+    previous = _previous(DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01", hostname="router"))
+    assert not diff_devices(previous, [DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01")])
+
+
+def test_joined_and_left_devices() -> None:
+    previous = _previous(DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01"))
+    diff = diff_devices(previous, [DeviceRecord("10.0.0.2", "aa:aa:aa:aa:aa:02")])
+    assert [device.ip for device in diff.joined] == ["10.0.0.2"]
+    assert [device.ip for device in diff.left] == ["10.0.0.1"]
+    assert not diff.moved
+
+
+def test_enrichment_is_kept_when_a_sighting_only_knows_ip_and_mac() -> None:
+    previous = _previous(DeviceRecord("10.0.0.1", "(pending)", hostname="nas", vendor="Synology"))
+    diff = diff_devices(previous, [DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01")])
+    assert diff.updated == [DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01", hostname="nas", vendor="Synology")]
+    # Filling in a placeholder MAC is not a change of MAC.
+    assert not diff.mac_changes
+
+
+def test_mac_change_is_flagged_and_its_note_clears_once_stable() -> None:
+    previous = _previous(DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01"))
+    diff = diff_devices(previous, [DeviceRecord("10.0.0.1", "bb:bb:bb:bb:bb:01")])
+    changes = [(device.mac, old_mac) for device, old_mac in diff.mac_changes]
+    assert changes == [("bb:bb:bb:bb:bb:01", "aa:aa:aa:aa:aa:01")]
+
+    flagged = DeviceRecord("10.0.0.1", "bb:bb:bb:bb:bb:01", note=mac_change_note("aa:aa:aa:aa:aa:01"))
+    diff = diff_devices(_previous(flagged), [DeviceRecord("10.0.0.1", "bb:bb:bb:bb:bb:01")])
+    assert [device.note for device in diff.updated] == [""]
+    assert not diff.mac_changes
+
+
+def test_other_notes_survive_a_plain_sighting() -> None:
+    previous = _previous(DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01", note="Default Gateway"))
+    assert not diff_devices(previous, [DeviceRecord("10.0.0.1", "aa:aa:aa:aa:aa:01")])
+
+
+def test_device_that_changed_address_is_matched_by_mac() -> None:
+    previous = _previous(
+        DeviceRecord("10.0.0.5", "aa:aa:aa:aa:aa:05", hostname="laptop"),
+        DeviceRecord("10.0.0.6", "(unknown)"),
+    )
+    current = [DeviceRecord("10.0.0.9", "AA:AA:AA:AA:AA:05"), DeviceRecord("10.0.0.7", "(unknown)")]
+    diff = diff_devices(previous, current)
+    assert [(device.ip, device.hostname, old_ip) for device, old_ip in diff.moved] == [
+        ("10.0.0.9", "laptop", "10.0.0.5")
+    ]
+    # Placeholder MACs say nothing about identity.
+    assert [device.ip for device in diff.joined] == ["10.0.0.7"]
+    assert [device.ip for device in diff.left] == ["10.0.0.6"]